@@ -0,0 +1,51 @@
+"""Compare BundleCatalog queries with a linear scan over the bundles.
+
+Run from the repository root:
+
+    python benchmarks/bench_catalog.py
+"""
+
+import sys
+import time
+import timeit
+
+sys.path.insert(0, ".")
+
+from cnab import BundleCatalog  # noqa: E402
+from cnab.decoder import decode_bundle  # noqa: E402
+from synthetic import synthetic_bundle  # noqa: E402
+
+
+def scan(bundles: list, image: str) -> list:
+    return [
+        bundle
+        for bundle in bundles
+        if any(i.image == image for i in bundle.images.values())
+        or any(i.image == image for i in bundle.invocation_images)
+    ]
+
+
+def main() -> None:
+    bundles = [
+        decode_bundle(synthetic_bundle(name=f"bundle{i}", images=10))
+        for i in range(10000)
+    ]
+    start = time.perf_counter()
+    catalog = BundleCatalog(bundles)
+    print(f"index {len(bundles)} bundles: {time.perf_counter() - start:.2f}s")
+
+    image = "example.com/bundle5000/image3:1.0"
+    assert [b.name for b in scan(bundles, image)] == [
+        b.name for b in catalog.find(image=image)
+    ]
+    number = 20
+    linear = timeit.timeit(lambda: scan(bundles, image), number=number) / number
+    indexed = timeit.timeit(lambda: catalog.find(image=image), number=number) / number
+    print(
+        f"bundles using {image}: scan {linear * 1e3:.2f}ms  "
+        f"catalog {indexed * 1e3:.3f}ms  speedup {linear / indexed:.0f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
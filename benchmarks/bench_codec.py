@@ -0,0 +1,61 @@
+"""Compare the JSON codecs for loading, canonical encoding and digests.
+
+Run from the repository root:
+
+    python benchmarks/bench_codec.py
+"""
+
+import json
+import sys
+import timeit
+
+sys.path.insert(0, ".")
+
+from cnab.codec import Codec, OrjsonCodec, set_codec  # noqa: E402
+from cnab.decoder import decode_bundle  # noqa: E402
+from synthetic import synthetic_bundle  # noqa: E402
+
+
+def measure(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main() -> None:
+    with open("fixtures/hellohelm/bundle.json") as f:
+        small = json.load(f)
+    documents = [
+        ("hellohelm", small, 2000),
+        ("synthetic", synthetic_bundle(parameters=50, images=20), 200),
+        ("large", synthetic_bundle(parameters=1000, images=100), 10),
+    ]
+
+    for label, doc, number in documents:
+        raw = json.dumps(doc).encode()
+        bundle = decode_bundle(doc)
+        value = bundle.to_dict()
+        results = {}
+        for codec in [Codec(), OrjsonCodec()]:
+            assert codec.canonical(value) == Codec().canonical(value)
+            set_codec(codec)
+
+            def digest() -> str:
+                # assigning a field drops the memoized encoding
+                bundle.version = bundle.version
+                return bundle.digest()
+
+            results[codec.name] = (
+                measure(lambda: codec.loads(raw), number),
+                measure(lambda: codec.canonical(value), number),
+                measure(digest, number),
+            )
+        set_codec(None)
+
+        for name, (loads, canonical, digest_time) in results.items():
+            print(
+                f"{label:>10} {name:>7}: loads {loads:9.1f}us  "
+                f"canonical {canonical:9.1f}us  digest {digest_time:9.1f}us"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Compare the compiled decoder and validator with Bundle.from_dict.
+
+Run from the repository root:
+
+    python benchmarks/bench_decoder.py
+"""
+
+import json
+import sys
+import timeit
+
+sys.path.insert(0, ".")
+
+from cnab import Bundle  # noqa: E402
+from cnab.decoder import decode_bundle  # noqa: E402
+from cnab.schema import BundleValidator  # noqa: E402
+from synthetic import synthetic_bundle  # noqa: E402
+
+
+def main() -> None:
+    data = synthetic_bundle(parameters=50, images=20)
+    with open("fixtures/hellohelm/bundle.json") as f:
+        small = json.load(f)
+
+    validator = BundleValidator()
+    for label, doc in [("hellohelm", small), ("synthetic", data)]:
+        assert decode_bundle(doc) == Bundle.from_dict(doc)
+        number = 2000
+        baseline = timeit.timeit(lambda: Bundle.from_dict(doc), number=number)
+        compiled = timeit.timeit(lambda: decode_bundle(doc), number=number)
+        validated = timeit.timeit(lambda: validator.errors(doc), number=number)
+        print(
+            f"{label:>10}: from_dict {baseline / number * 1e6:8.1f}us  "
+            f"decode_bundle {compiled / number * 1e6:8.1f}us  "
+            f"speedup {baseline / compiled:4.1f}x  "
+            f"validate {validated / number * 1e6:8.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    main()
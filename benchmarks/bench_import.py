@@ -0,0 +1,59 @@
+"""Measure how long importing parts of the package takes.
+
+Each statement runs in a fresh interpreter, and the time to start an
+interpreter that imports nothing is subtracted. Run from the repository root:
+
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --max-ms 60
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+STATEMENTS = [
+    "pass",
+    "import cnab",
+    "from cnab import CNABDirectory",
+    "from cnab import Bundle",
+    "from cnab import CNAB",
+    "from cnab import CNAB; CNAB('fixtures/helloworld/bundle.json').bundle.to_json()",
+]
+
+
+def measure(statement: str, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=11)
+    parser.add_argument(
+        "--max-ms",
+        type=float,
+        help="exit with a non-zero status if `import cnab` takes longer",
+    )
+    args = parser.parse_args()
+
+    baseline = measure(STATEMENTS[0], args.repeat)
+    print(f"{'interpreter start up':<80} {baseline * 1e3:7.1f}ms")
+    results = {}
+    for statement in STATEMENTS[1:]:
+        results[statement] = measure(statement, args.repeat) - baseline
+        print(f"{statement:<80} {results[statement] * 1e3:+7.1f}ms")
+
+    if args.max_ms is not None and results["import cnab"] * 1e3 > args.max_ms:
+        print(f"import cnab is slower than {args.max_ms}ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+"""Measure the memory held by many parsed bundles in one process.
+
+Run from the repository root:
+
+    python benchmarks/bench_memory.py [count]
+"""
+
+import gc
+import json
+import resource
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, ".")
+
+from cnab.decoder import decode_bundle  # noqa: E402
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with open("fixtures/hellohelm/bundle.json") as f:
+        data = json.load(f)
+
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    bundles = [decode_bundle(data) for _ in range(count)]
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # ru_maxrss is reported in kilobytes on Linux
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"bundles:          {len(bundles)}")
+    print(f"parse time:       {elapsed:.2f}s")
+    print(f"traced memory:    {current / 2 ** 20:.1f} MiB")
+    print(f"bytes per bundle: {current / count:.0f}")
+    print(f"peak rss:         {rss:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
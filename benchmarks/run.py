@@ -0,0 +1,164 @@
+"""Benchmark suite for the parse, serialize and run preparation hot paths.
+
+Run from the repository root:
+
+    python benchmarks/run.py
+    python benchmarks/run.py --save baseline.json
+    python benchmarks/run.py --compare baseline.json --threshold 1.25
+
+With --compare the exit status is non-zero if any case is slower than the
+baseline by more than the threshold.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import timeit
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, ".")
+
+from cnab import (  # noqa: E402
+    CNAB,
+    Bundle,
+    CNABDirectory,
+    Destination,
+    InvocationImage,
+    Parameter,
+)
+from cnab.decoder import decode_bundle  # noqa: E402
+from cnab.testing import FakeDockerClient  # noqa: E402
+from synthetic import (  # noqa: E402
+    synthetic_bundle,
+    synthetic_credentials,
+    synthetic_parameters,
+)
+
+SIZES = {
+    "small": dict(parameters=5, credentials=1, images=1),
+    "medium": dict(parameters=25, credentials=4, images=10),
+    "large": dict(parameters=200, credentials=20, images=100, invocation_images=3),
+}
+
+
+def cases(size: str, directory: str) -> List[Tuple[str, Callable]]:
+    doc = synthetic_bundle(**SIZES[size])
+    path = os.path.join(directory, f"{size}.json")
+    with open(path, "w") as f:
+        json.dump(doc, f)
+
+    bundle = decode_bundle(doc)
+
+    def to_json_cold() -> str:
+        # assigning a field drops the memoized encoding
+        bundle.version = bundle.version
+        return bundle.to_json()
+
+    # the run path needs a single docker invocation image
+    runnable = dict(doc, invocationImages=doc["invocationImages"][:1])
+    app = CNAB(runnable)
+    parameters = synthetic_parameters(doc)
+    credentials = synthetic_credentials(doc)
+    batch = [parameters] * 1000
+
+    result = [
+        ("Bundle.from_dict", lambda: Bundle.from_dict(doc)),
+        ("decode_bundle", lambda: decode_bundle(doc)),
+        ("Bundle.to_dict", bundle.to_dict),
+        ("Bundle.to_json", to_json_cold),
+        ("Bundle.to_json (memoized)", bundle.to_json),
+        ("CNAB(path)", lambda: CNAB(path)),
+        (
+            "CNAB.environment",
+            lambda: app.environment("install", credentials, parameters),
+        ),
+        ("validate_many (1000 sets)", lambda: app.validator.validate_many(batch)),
+        (
+            "CNABDirectory.valid",
+            lambda: CNABDirectory("fixtures/invocationimage").valid(),
+        ),
+    ]
+
+    try:
+        import docker  # type: ignore  # noqa: F401
+    except ImportError:
+        pass
+    else:
+        client = FakeDockerClient()
+        result.append(
+            (
+                "CNAB.run (fake client)",
+                lambda: app.run("install", credentials, parameters, client=client),
+            )
+        )
+    return [(f"{size}: {name}", fn) for name, fn in result]
+
+
+def constructor_cases() -> List[Tuple[str, Callable]]:
+    # building objects directly, which change tracking must not slow down
+    with open("fixtures/hellohelm/bundle.json") as f:
+        doc = json.load(f)
+    images = [InvocationImage(image="cnab/sample:0.1.0")]
+
+    return [
+        ("hellohelm: Bundle.from_dict", lambda: Bundle.from_dict(doc)),
+        (
+            "Parameter()",
+            lambda: Parameter(type="int", destination=Destination(env="PORT")),
+        ),
+        (
+            "Bundle()",
+            lambda: Bundle(name="sample", version="0.1.0", invocation_images=images),
+        ),
+    ]
+
+
+def measure(fn: Callable, repeat: int) -> float:
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", choices=list(SIZES), action="append")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare against results in this file")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    args = parser.parse_args()
+
+    baseline: Dict[str, float] = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    results: Dict[str, float] = {}
+    regressions = []
+    with tempfile.TemporaryDirectory() as directory:
+        groups = [constructor_cases()]
+        groups += [cases(size, directory) for size in args.size or list(SIZES)]
+        for group in groups:
+            for name, fn in group:
+                seconds = measure(fn, args.repeat)
+                results[name] = seconds
+                line = f"{name:<40} {seconds * 1e6:12.1f}us"
+                if name in baseline:
+                    ratio = seconds / baseline[name]
+                    line += f"  {ratio:5.2f}x baseline"
+                    if ratio > args.threshold:
+                        line += "  REGRESSION"
+                        regressions.append(name)
+                print(line)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
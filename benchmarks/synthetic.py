@@ -0,0 +1,76 @@
+"""Generate synthetic bundle.json documents of a given size."""
+
+import json
+import os
+from typing import Dict, List
+
+
+def synthetic_bundle(
+    parameters: int = 10,
+    credentials: int = 2,
+    images: int = 5,
+    invocation_images: int = 1,
+    name: str = "synthetic",
+) -> dict:
+    return {
+        "name": name,
+        "version": "0.1.0",
+        "description": f"{name} bundle for benchmarking",
+        "keywords": ["synthetic", "benchmark"],
+        "maintainers": [{"name": "bench", "email": "bench@example.com"}],
+        "invocationImages": [
+            {
+                "imageType": "docker",
+                "image": f"example.com/{name}/invocation{i}:0.1.0",
+                "digest": f"sha256:{i:064x}",
+            }
+            for i in range(invocation_images)
+        ],
+        "images": {
+            f"image{i}": {
+                "image": f"example.com/{name}/image{i}:1.0",
+                "description": f"image {i}",
+                "imageType": "docker",
+                "digest": f"sha256:{i:064x}",
+                "size": 1024 * i,
+                "refs": [{"path": "values.yaml", "field": f"image{i}.repository"}],
+            }
+            for i in range(images)
+        },
+        "parameters": {
+            f"param{i}": {
+                "type": "int",
+                "defaultValue": i,
+                "minValue": 0,
+                "maxValue": 1_000_000,
+                "destination": {"env": f"PARAM_{i}"},
+                "metadata": {"description": f"parameter {i}"},
+            }
+            for i in range(parameters)
+        },
+        "credentials": {
+            f"cred{i}": ({"path": f"/root/.cred{i}"} if i % 2 else {"env": f"CRED_{i}"})
+            for i in range(credentials)
+        },
+        "actions": {"status": {"modifies": False, "stateless": True}},
+    }
+
+
+def synthetic_parameters(bundle: dict) -> Dict[str, int]:
+    return {name: 1 for name in bundle.get("parameters", {})}
+
+
+def synthetic_credentials(bundle: dict) -> Dict[str, str]:
+    return {name: "secret" for name in bundle.get("credentials", {})}
+
+
+def write_bundles(root: str, count: int, **kwargs) -> List[str]:
+    paths = []
+    for i in range(count):
+        directory = os.path.join(root, f"bundle{i}")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, "bundle.json")
+        with open(path, "w") as f:
+            json.dump(synthetic_bundle(name=f"bundle{i}", **kwargs), f)
+        paths.append(path)
+    return paths
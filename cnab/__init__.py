@@ -1,15 +1,81 @@
-from cnab.types import (
-    Action,
-    Credential,
-    ImagePlatform,
-    Ref,
-    Image,
-    InvocationImage,
-    Maintainer,
-    Destination,
-    Metadata,
-    Parameter,
-    Bundle,
-)
-from cnab.cnab import CNAB
-from cnab.invocation_image import CNABDirectory
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, List
+
+# Names are imported from their modules when first used, so that a script
+# using one part of the package doesn't pay to import the rest of it.
+_EXPORTS = {
+    "Action": "cnab.types",
+    "Credential": "cnab.types",
+    "ImagePlatform": "cnab.types",
+    "Ref": "cnab.types",
+    "Image": "cnab.types",
+    "InvocationImage": "cnab.types",
+    "Maintainer": "cnab.types",
+    "Destination": "cnab.types",
+    "Metadata": "cnab.types",
+    "Parameter": "cnab.types",
+    "Bundle": "cnab.types",
+    "BundleCache": "cnab.cache",
+    "BundleCatalog": "cnab.catalog",
+    "Claim": "cnab.claims",
+    "ClaimStore": "cnab.claims",
+    "DockerClientPool": "cnab.client",
+    "CNAB": "cnab.cnab",
+    "LogStream": "cnab.cnab",
+    "CNABDirectory": "cnab.invocation_image",
+    "validate_directories": "cnab.invocation_image",
+    "load_directory": "cnab.loader",
+    "load_many": "cnab.loader",
+    "prefetch": "cnab.images",
+    "run_many": "cnab.runner",
+    "BundleValidator": "cnab.schema",
+    "validate_bundles": "cnab.schema",
+    "Span": "cnab.tracing",
+    "SpanCollector": "cnab.tracing",
+    "verify_bundle": "cnab.verify",
+    "WarmContainerPool": "cnab.warm",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
+
+
+if TYPE_CHECKING:
+    from cnab.types import (
+        Action,
+        Credential,
+        ImagePlatform,
+        Ref,
+        Image,
+        InvocationImage,
+        Maintainer,
+        Destination,
+        Metadata,
+        Parameter,
+        Bundle,
+    )
+    from cnab.cache import BundleCache
+    from cnab.catalog import BundleCatalog
+    from cnab.claims import Claim, ClaimStore
+    from cnab.client import DockerClientPool
+    from cnab.cnab import CNAB, LogStream
+    from cnab.invocation_image import CNABDirectory, validate_directories
+    from cnab.loader import load_directory, load_many
+    from cnab.images import prefetch
+    from cnab.runner import run_many
+    from cnab.schema import BundleValidator, validate_bundles
+    from cnab.tracing import Span, SpanCollector
+    from cnab.verify import verify_bundle
+    from cnab.warm import WarmContainerPool
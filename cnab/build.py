@@ -0,0 +1,237 @@
+import hashlib
+import json
+import os
+import tarfile
+from dataclasses import dataclass, field
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+# files are read and hashed in chunks of this size, so memory use does not
+# depend on the size of the context
+CHUNK_SIZE = 1024 * 1024
+BLOCK_SIZE = tarfile.BLOCKSIZE
+RECORD_SIZE = tarfile.RECORDSIZE
+
+
+class BuildContextChangedError(Exception):
+    pass
+
+
+@dataclass
+class FileEntry:
+    size: int
+    mtime_ns: int
+    executable: bool
+    sha256: str
+    link: Optional[str] = None
+
+    @staticmethod
+    def from_dict(obj: Any) -> "FileEntry":
+        assert isinstance(obj, dict)
+        return FileEntry(
+            obj["size"],
+            obj["mtime_ns"],
+            obj["executable"],
+            obj["sha256"],
+            obj.get("link"),
+        )
+
+    def to_dict(self) -> dict:
+        result = {
+            "size": self.size,
+            "mtime_ns": self.mtime_ns,
+            "executable": self.executable,
+            "sha256": self.sha256,
+        }
+        if self.link is not None:
+            result["link"] = self.link
+        return result
+
+
+@dataclass
+class Manifest:
+    """The content hash of every file in a build context.
+
+    Each directory also has a digest of everything beneath it, so that the
+    directories that changed between two builds can be found, and the digest
+    of the top directory identifies the whole context."""
+
+    root: str = "cnab"
+    files: Dict[str, FileEntry] = field(default_factory=dict)
+    directories: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def digest(self) -> str:
+        return "sha256:" + self.directories[self.root]
+
+    def changed_directories(self, previous: Optional["Manifest"]) -> List[str]:
+        old = previous.directories if previous is not None else {}
+        return sorted(
+            d for d, digest in self.directories.items() if old.get(d) != digest
+        )
+
+    @staticmethod
+    def from_dict(obj: Any) -> "Manifest":
+        assert isinstance(obj, dict)
+        return Manifest(
+            obj["root"],
+            {k: FileEntry.from_dict(v) for k, v in obj["files"].items()},
+            dict(obj["directories"]),
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "root": self.root,
+            "files": {k: v.to_dict() for k, v in self.files.items()},
+            "directories": self.directories,
+        }
+
+    @staticmethod
+    def load(path: str) -> "Manifest":
+        with open(path) as f:
+            return Manifest.from_dict(json.load(f))
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, sort_keys=True)
+
+
+def _hash_file(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class BuildContext:
+    """A deterministic tar of the cnab directory of an invocation image.
+
+    Entries are sorted, with ownership and timestamps cleared and modes
+    normalised, so the same tree always produces the same bytes. Given the
+    manifest of a previous build, files whose size and modification time are
+    unchanged reuse their recorded hash rather than being read again, and
+    `changed` tells whether anything needs to be sent at all."""
+
+    path: str
+    previous: Optional[Manifest]
+    manifest: Manifest
+    # the files read and hashed while scanning
+    hashed: List[str]
+
+    def __init__(
+        self, path: str, previous: Optional[Manifest] = None, root: str = "cnab"
+    ):
+        self.path = path
+        self.previous = previous
+        self.hashed = []
+        self._entries: List[Tuple[str, str]] = []
+        self.manifest = Manifest(root)
+        self._scan(root)
+
+    def _scan(self, directory: str) -> str:
+        old = self.previous.files if self.previous is not None else {}
+        files = self.manifest.files
+        sha = hashlib.sha256()
+        self._entries.append((directory, "d"))
+        with os.scandir(os.path.join(self.path, directory)) as it:
+            entries = sorted(it, key=lambda e: e.name)
+        for entry in entries:
+            name = f"{directory}/{entry.name}"
+            if entry.is_dir(follow_symlinks=False):
+                sha.update(f"d {entry.name} {self._scan(name)}\n".encode())
+                continue
+            if entry.is_symlink():
+                link = os.readlink(entry.path)
+                digest = hashlib.sha256(link.encode()).hexdigest()
+                files[name] = FileEntry(0, 0, False, digest, link)
+                kind = "l"
+            elif entry.is_file(follow_symlinks=False):
+                stat = entry.stat(follow_symlinks=False)
+                executable = bool(stat.st_mode & 0o111)
+                previous = old.get(name)
+                if (
+                    previous is not None
+                    and previous.link is None
+                    and previous.size == stat.st_size
+                    and previous.mtime_ns == stat.st_mtime_ns
+                ):
+                    digest = previous.sha256
+                else:
+                    digest = _hash_file(entry.path)
+                    self.hashed.append(name)
+                files[name] = FileEntry(
+                    stat.st_size, stat.st_mtime_ns, executable, digest
+                )
+                kind = "x" if executable else "f"
+            else:
+                # sockets, fifos and devices have no place in a build context
+                continue
+            self._entries.append((name, kind))
+            sha.update(f"{kind} {entry.name} {digest}\n".encode())
+        digest = sha.hexdigest()
+        self.manifest.directories[directory] = digest
+        return digest
+
+    @property
+    def digest(self) -> str:
+        return self.manifest.digest
+
+    @property
+    def changed(self) -> bool:
+        return self.previous is None or self.previous.digest != self.digest
+
+    def changed_directories(self) -> List[str]:
+        return self.manifest.changed_directories(self.previous)
+
+    def _header(self, name: str, kind: str) -> bytes:
+        info = tarfile.TarInfo(name)
+        info.mtime = 0
+        info.uid = info.gid = 0
+        info.uname = info.gname = ""
+        if kind == "d":
+            info.type = tarfile.DIRTYPE
+            info.mode = 0o755
+        elif kind == "l":
+            info.type = tarfile.SYMTYPE
+            info.linkname = self.manifest.files[name].link or ""
+            info.mode = 0o777
+        else:
+            info.size = self.manifest.files[name].size
+            info.mode = 0o755 if kind == "x" else 0o644
+        return info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+
+    def chunks(self, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """Generate the tar archive, reading one chunk of a file at a time."""
+        written = 0
+        for name, kind in self._entries:
+            header = self._header(name, kind)
+            written += len(header)
+            yield header
+            if kind not in ("f", "x"):
+                continue
+            size = self.manifest.files[name].size
+            remaining = size
+            with open(os.path.join(self.path, name), "rb") as f:
+                while remaining:
+                    chunk = f.read(min(chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    yield chunk
+                if remaining or f.read(1):
+                    raise BuildContextChangedError(f"{name} changed while packing")
+            written += size
+            padding = -size % BLOCK_SIZE
+            if padding:
+                written += padding
+                yield b"\0" * padding
+        end = 2 * BLOCK_SIZE
+        end += -(written + end) % RECORD_SIZE
+        yield b"\0" * end
+
+    def write(self, fileobj: IO[bytes]) -> int:
+        total = 0
+        for chunk in self.chunks():
+            fileobj.write(chunk)
+            total += len(chunk)
+        return total
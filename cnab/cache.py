@@ -0,0 +1,157 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import suppress
+from typing import Optional, Tuple
+
+from cnab import types
+from cnab.tracking import Watched
+from cnab.types import Bundle
+from cnab.decoder import decode_bundle
+from cnab.codec import loads
+
+
+def _format() -> str:
+    # Pickles only hold the values of slots, so one written before a field
+    # was added would load without error and leave that slot unset. The slots
+    # of every type are part of the name of each file on disk, so any change
+    # to them makes older files misses.
+    layout = sorted(
+        f"{cls.__name__}:{','.join(cls.__slots__)}"
+        for cls in vars(types).values()
+        if isinstance(cls, type) and issubclass(cls, Watched)
+    )
+    description = f"{pickle.HIGHEST_PROTOCOL};" + ";".join(layout)
+    return hashlib.sha256(description.encode()).hexdigest()[:16]
+
+
+FORMAT = _format()
+
+
+def _read(path: str) -> Tuple[bytes, str]:
+    with open(path, "rb") as f:
+        data = f.read()
+    return data, hashlib.sha256(data).hexdigest()
+
+
+class BundleCache:
+    """An LRU cache of parsed bundle files.
+
+    Entries are keyed on the path, modification time and size of the file, and
+    optionally on the sha256 of its contents. With a `directory` parsed bundles
+    are also stored on disk by content hash, so that they survive restarts. The
+    contents are only hashed for the disk when the file isn't in memory.
+
+    Bundles returned from the cache are shared between callers and should be
+    treated as read-only."""
+
+    maxsize: int
+    directory: Optional[str]
+    hash_contents: bool
+
+    def __init__(
+        self,
+        maxsize: int = 128,
+        directory: Optional[str] = None,
+        hash_contents: bool = False,
+    ):
+        self.maxsize = maxsize
+        self.directory = directory
+        self.hash_contents = hash_contents
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _lookup(self, path: str, signature: Tuple) -> Optional[Bundle]:
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry[0] != signature:
+                return None
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return entry[1]
+
+    def _store(self, path: str, signature: Tuple, bundle: Bundle) -> None:
+        with self._lock:
+            self._entries[path] = (signature, bundle)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _disk_path(self, digest: str) -> str:
+        assert self.directory
+        return os.path.join(self.directory, f"{digest}-{FORMAT}.pickle")
+
+    def _load_from_disk(self, digest: str) -> Optional[Bundle]:
+        try:
+            with open(self._disk_path(digest), "rb") as f:
+                bundle = pickle.load(f)
+        except Exception:
+            # a missing, truncated or outdated entry is just a miss
+            return None
+        return bundle if isinstance(bundle, Bundle) else None
+
+    def _save_to_disk(self, digest: str, bundle: Bundle) -> None:
+        assert self.directory
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(bundle, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._disk_path(digest))
+        except Exception:
+            # as with loading, the disk is only a cache, so a bundle that
+            # can't be written is left out of it
+            pass
+        finally:
+            with suppress(OSError):
+                os.unlink(tmp)
+
+    def load(self, path: str) -> Bundle:
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        signature: Tuple = (stat.st_mtime_ns, stat.st_size)
+
+        data = None
+        digest = None
+        if self.hash_contents:
+            data, digest = _read(path)
+            signature += (digest,)
+
+        bundle = self._lookup(path, signature)
+        if bundle is not None:
+            return bundle
+
+        if self.directory:
+            if digest is None:
+                data, digest = _read(path)
+            bundle = self._load_from_disk(digest)
+            if bundle is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                self._store(path, signature, bundle)
+                return bundle
+
+        with self._lock:
+            self.misses += 1
+        if data is None:
+            with open(path, "rb") as f:
+                data = f.read()
+        bundle = decode_bundle(loads(data))
+        self._store(path, signature, bundle)
+        if digest and self.directory:
+            self._save_to_disk(digest, bundle)
+        return bundle
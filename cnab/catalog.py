@@ -0,0 +1,155 @@
+import threading
+import weakref
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from cnab.tracking import watch
+from cnab.types import Bundle
+
+FIELDS = ("keyword", "maintainer", "image", "repository", "digest", "parameter")
+
+
+def repository(image: str) -> str:
+    """The repository of an image reference, without its tag or digest."""
+    name = image.split("@", 1)[0]
+    slash = name.rfind("/")
+    colon = name.rfind(":")
+    return name[:colon] if colon > slash else name
+
+
+def terms(bundle: Bundle) -> Set[Tuple[str, str]]:
+    result = set()
+    for keyword in bundle.keywords or []:
+        result.add(("keyword", keyword))
+    for maintainer in bundle.maintainers or []:
+        if maintainer.name:
+            result.add(("maintainer", maintainer.name))
+        if maintainer.email:
+            result.add(("maintainer", maintainer.email))
+    images = list((bundle.images or {}).values()) + list(bundle.invocation_images or [])
+    for image in images:
+        result.add(("image", image.image))
+        result.add(("repository", repository(image.image)))
+        if image.digest:
+            result.add(("digest", image.digest))
+    for name in bundle.parameters or {}:
+        result.add(("parameter", name))
+    return result
+
+
+class _Entry:
+    # registered as a watcher of a bundle, so that a change to the bundle
+    # marks it to be indexed again
+    __slots__ = ("key", "bundle", "terms", "dirty", "__weakref__")
+
+    def __init__(self, key: str, bundle: Bundle, dirty: Set[str]):
+        self.key = key
+        self.bundle = bundle
+        self.terms: Set[Tuple[str, str]] = set()
+        self.dirty = dirty
+
+    def _changed(self) -> None:
+        self.dirty.add(self.key)
+
+
+class BundleCatalog:
+    """Bundles indexed by keyword, maintainer, image and parameter name.
+
+    Each field maps values to the keys of the bundles that have them, so a
+    query touches only the matching bundles. Bundles are watched once added:
+    a change to one, or anything beneath it, is picked up by the next query.
+    Bundles are keyed by `name:version` unless a key is given."""
+
+    def __init__(self, bundles: Iterable[Bundle] = ()):
+        self._entries: Dict[str, _Entry] = {}
+        self._index: Dict[str, Dict[str, Set[str]]] = {f: {} for f in FIELDS}
+        self._dirty: Set[str] = set()
+        self._lock = threading.RLock()
+        for bundle in bundles:
+            self.add(bundle)
+
+    def _index_entry(self, entry: _Entry) -> None:
+        new = terms(entry.bundle)
+        for field, value in entry.terms - new:
+            keys = self._index[field][value]
+            keys.discard(entry.key)
+            if not keys:
+                del self._index[field][value]
+        for field, value in new - entry.terms:
+            self._index[field].setdefault(value, set()).add(entry.key)
+        entry.terms = new
+        # everything indexed is at most two levels beneath the bundle, for
+        # instance the name of an image in the images dictionary
+        watch(entry.bundle, weakref.ref(entry), 2)
+
+    def _refresh(self) -> None:
+        while self._dirty:
+            entry = self._entries.get(self._dirty.pop())
+            if entry is not None:
+                self._index_entry(entry)
+
+    def add(self, bundle: Bundle, key: Optional[str] = None) -> str:
+        if key is None:
+            key = f"{bundle.name}:{bundle.version}"
+        with self._lock:
+            if key in self._entries:
+                self.remove(key)
+            entry = _Entry(key, bundle, self._dirty)
+            self._entries[key] = entry
+            self._index_entry(entry)
+        return key
+
+    def remove(self, key: str) -> Bundle:
+        with self._lock:
+            entry = self._entries.pop(key)
+            self._dirty.discard(key)
+            for field, value in entry.terms:
+                keys = self._index[field][value]
+                keys.discard(key)
+                if not keys:
+                    del self._index[field][value]
+        return entry.bundle
+
+    def get(self, key: str) -> Optional[Bundle]:
+        entry = self._entries.get(key)
+        return entry.bundle if entry is not None else None
+
+    def keys(self, **criteria: str) -> List[str]:
+        """The keys of bundles matching every one of the criteria.
+
+        Each criterion names a field, for example `image="alpine:3.9"`."""
+        unknown = set(criteria) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown catalog fields: {', '.join(sorted(unknown))}")
+        with self._lock:
+            self._refresh()
+            matches: Optional[Set[str]] = None
+            # intersect starting from the smallest set
+            sets = sorted(
+                (self._index[f].get(v, set()) for f, v in criteria.items()), key=len
+            )
+            for keys in sets:
+                matches = set(keys) if matches is None else matches & keys
+                if not matches:
+                    return []
+            if matches is None:
+                return sorted(self._entries)
+            return sorted(matches)
+
+    def find(self, **criteria: str) -> List[Bundle]:
+        keys = self.keys(**criteria)
+        return [self._entries[key].bundle for key in keys]
+
+    def values(self, field: str) -> List[str]:
+        """Every distinct value of a field, for instance every keyword."""
+        with self._lock:
+            self._refresh()
+            return sorted(self._index[field])
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._entries))
@@ -0,0 +1,213 @@
+import datetime
+import json
+import sqlite3
+import threading
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+
+SUCCESS = "success"
+FAILURE = "failure"
+# the run was stopped before the action finished, for instance by closing
+# its output stream or cancelling the task running it
+CANCELLED = "cancelled"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS claims (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    revision TEXT NOT NULL UNIQUE,
+    installation TEXT NOT NULL,
+    bundle_name TEXT,
+    bundle_version TEXT,
+    bundle_digest TEXT NOT NULL,
+    action TEXT NOT NULL,
+    parameters TEXT NOT NULL,
+    status TEXT NOT NULL,
+    message TEXT,
+    created TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS claims_installation ON claims (installation, id);
+CREATE TABLE IF NOT EXISTS installations (
+    installation TEXT PRIMARY KEY,
+    claim INTEGER NOT NULL REFERENCES claims (id)
+);
+"""
+
+COLUMNS = (
+    "id, revision, installation, bundle_name, bundle_version, bundle_digest, "
+    "action, parameters, status, message, created"
+)
+
+
+def _now() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+def _revision() -> str:
+    return uuid.uuid4().hex
+
+
+@dataclass
+class Claim:
+    installation: str
+    bundle_digest: str
+    action: str
+    status: str
+    parameters: dict = field(default_factory=dict)
+    message: Optional[str] = None
+    bundle_name: Optional[str] = None
+    bundle_version: Optional[str] = None
+    revision: str = field(default_factory=_revision)
+    created: str = field(default_factory=_now)
+    # assigned by the store, and used as the cursor when paginating
+    id: Optional[int] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == SUCCESS
+
+
+def _claim(row: tuple) -> Claim:
+    id, revision, installation, name, version, digest = row[:6]
+    action, parameters, status, message, created = row[6:]
+    return Claim(
+        installation,
+        digest,
+        action,
+        status,
+        json.loads(parameters),
+        message,
+        name,
+        version,
+        revision,
+        created,
+        id,
+    )
+
+
+class ClaimStore:
+    """A record of the actions run against each installation, kept in SQLite.
+
+    Claims are indexed by installation, and the latest claim for each
+    installation is tracked as it is recorded, so finding what is installed
+    does not scan the history. Listings are paginated by passing the `id` of
+    the last claim, or the last installation name, as `after`."""
+
+    path: str
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            # with a write-ahead log, syncing at checkpoints rather than on
+            # every commit still survives the process crashing
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    def record(self, claim: Claim) -> Claim:
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                f"INSERT INTO claims ({COLUMNS}) VALUES (?,?,?,?,?,?,?,?,?,?,?)",
+                (
+                    None,
+                    claim.revision,
+                    claim.installation,
+                    claim.bundle_name,
+                    claim.bundle_version,
+                    claim.bundle_digest,
+                    claim.action,
+                    json.dumps(claim.parameters, sort_keys=True),
+                    claim.status,
+                    claim.message,
+                    claim.created,
+                ),
+            )
+            claim.id = cursor.lastrowid
+            self._db.execute(
+                "INSERT OR REPLACE INTO installations VALUES (?, ?)",
+                (claim.installation, claim.id),
+            )
+        return claim
+
+    def _query(self, sql: str, *args) -> List[Claim]:
+        with self._lock:
+            rows = self._db.execute(sql, args).fetchall()
+        return [_claim(row) for row in rows]
+
+    def get(self, revision: str) -> Optional[Claim]:
+        claims = self._query(
+            f"SELECT {COLUMNS} FROM claims WHERE revision = ?", revision
+        )
+        return claims[0] if claims else None
+
+    def latest(self, installation: str) -> Optional[Claim]:
+        claims = self._query(
+            f"SELECT {COLUMNS} FROM claims WHERE id = "
+            "(SELECT claim FROM installations WHERE installation = ?)",
+            installation,
+        )
+        return claims[0] if claims else None
+
+    def history(
+        self, installation: str, limit: int = 100, before: Optional[int] = None
+    ) -> List[Claim]:
+        """Claims for one installation, newest first."""
+        if before is None:
+            return self._query(
+                f"SELECT {COLUMNS} FROM claims WHERE installation = ? "
+                "ORDER BY id DESC LIMIT ?",
+                installation,
+                limit,
+            )
+        return self._query(
+            f"SELECT {COLUMNS} FROM claims WHERE installation = ? AND id < ? "
+            "ORDER BY id DESC LIMIT ?",
+            installation,
+            before,
+            limit,
+        )
+
+    def list(self, limit: int = 100, after: Optional[int] = None) -> List[Claim]:
+        """Every claim, oldest first."""
+        return self._query(
+            f"SELECT {COLUMNS} FROM claims WHERE id > ? ORDER BY id LIMIT ?",
+            after or 0,
+            limit,
+        )
+
+    def installations(
+        self, limit: int = 100, after: Optional[str] = None, installed: bool = True
+    ) -> List[Claim]:
+        """The latest claim for each installation, ordered by name.
+
+        By default installations whose last action was a successful uninstall
+        are left out."""
+        columns = ", ".join(f"c.{column}" for column in COLUMNS.split(", "))
+        condition = (
+            f"AND NOT (c.action = 'uninstall' AND c.status = '{SUCCESS}')"
+            if installed
+            else ""
+        )
+        return self._query(
+            f"SELECT {columns} FROM installations i JOIN claims c ON c.id = i.claim "
+            f"WHERE i.installation > ? {condition} "
+            "ORDER BY i.installation LIMIT ?",
+            after or "",
+            limit,
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM claims").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> "ClaimStore":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
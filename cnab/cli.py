@@ -0,0 +1,443 @@
+import argparse
+import json
+import os
+import socket
+import stat
+import sys
+from typing import IO, TYPE_CHECKING, Any, Dict, List, Optional
+
+if TYPE_CHECKING:
+    import socketserver
+
+    from cnab.cache import BundleCache
+    from cnab.schema import BundleValidator
+    from cnab.types import Bundle
+
+SOCKET_ENV = "CNAB_SOCKET"
+# the daemon reads one request per connection, as a line of JSON
+MAX_REQUEST = 1024 * 1024
+RESPONSE_KEYS = {"status", "stdout", "stderr"}
+
+
+class UsageError(Exception):
+    pass
+
+
+class DaemonError(Exception):
+    pass
+
+
+class _Exit(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class _Parser(argparse.ArgumentParser):
+    # the daemon answers a bad request, or one asking for help, rather than
+    # exiting or writing to its own output
+    def error(self, message):
+        raise UsageError(message)
+
+    def print_help(self, file=None):
+        raise _Exit(0, self.format_help())
+
+    def exit(self, status=0, message=None):
+        raise _Exit(status, message or "")
+
+
+class Context:
+    """Where commands load bundles and run actions.
+
+    The daemon keeps one context for its lifetime, so bundles parsed by one
+    request and Docker clients used by another are reused by the next."""
+
+    cache: Optional["BundleCache"]
+    client: Any
+
+    def __init__(self, cache: Optional["BundleCache"] = None, client: Any = None):
+        self.cache = cache
+        self.client = client
+        self._validator: Optional["BundleValidator"] = None
+
+    def validator(self) -> "BundleValidator":
+        if self._validator is None:
+            from cnab.schema import BundleValidator
+
+            self._validator = BundleValidator()
+        return self._validator
+
+    def load(self, path: str) -> "Bundle":
+        if self.cache is not None:
+            return self.cache.load(path)
+        from cnab.codec import load_path
+        from cnab.decoder import decode_bundle
+
+        return decode_bundle(load_path(path))
+
+
+def _assignments(values: List[str], cwd: str, files: bool = False) -> Dict[str, Any]:
+    result: Dict[str, Any] = {}
+    for value in values:
+        name, sep, raw = value.partition("=")
+        if not sep or not name:
+            raise ValueError(f"Expected NAME=VALUE, got {value!r}")
+        if files and raw.startswith("@"):
+            with open(os.path.join(cwd, raw[1:])) as f:
+                result[name] = f.read()
+        elif files:
+            result[name] = raw
+        else:
+            # parameters are typed, so numbers and booleans are read as JSON
+            try:
+                result[name] = json.loads(raw)
+            except ValueError:
+                result[name] = raw
+    return result
+
+
+def validate(args, context: Context, stdout: IO[str], stderr: IO[str]) -> int:
+    from cnab.codec import load_path
+    from cnab.invocation_image import CNABDirectory
+
+    status = 0
+    for path in args.paths:
+        full = os.path.join(args.cwd, path)
+        if os.path.isdir(full):
+            errors = CNABDirectory(full).errors()
+        else:
+            try:
+                data = load_path(full)
+            except (ValueError, OSError) as e:
+                errors = [str(e)]
+            else:
+                errors = [
+                    f"{error.pointer}: {error.message}"
+                    for error in context.validator().errors(data)
+                ]
+        if errors:
+            status = 1
+            for error in errors:
+                print(f"{path}: {error}", file=stdout)
+        else:
+            print(f"{path}: valid", file=stdout)
+    return status
+
+
+def inspect(args, context: Context, stdout: IO[str], stderr: IO[str]) -> int:
+    from cnab.cnab import CNAB
+
+    app = CNAB(context.load(os.path.join(args.cwd, args.path)))
+    bundle = app.bundle
+    summary = {
+        "name": bundle.name,
+        "version": bundle.version,
+        "description": bundle.description,
+        "digest": bundle.digest(),
+        "actions": sorted(app.actions),
+        "parameters": sorted(bundle.parameters or {}),
+        "credentials": sorted(bundle.credentials or {}),
+        "invocationImages": [image.image for image in bundle.invocation_images],
+        "images": sorted(image.image for image in (bundle.images or {}).values()),
+    }
+    print(json.dumps(summary, indent=2), file=stdout)
+    return 0
+
+
+def digest(args, context: Context, stdout: IO[str], stderr: IO[str]) -> int:
+    for path in args.paths:
+        bundle = context.load(os.path.join(args.cwd, path))
+        print(f"{bundle.digest()}  {path}", file=stdout)
+    return 0
+
+
+def run(args, context: Context, stdout: IO[str], stderr: IO[str]) -> int:
+    import docker  # type: ignore
+    from cnab.cnab import CNAB
+
+    app = CNAB(
+        context.load(os.path.join(args.cwd, args.path)),
+        name=args.name,
+        client=context.client,
+    )
+    parameters = _assignments(args.parameter, args.cwd)
+    credentials = _assignments(args.credential, args.cwd, files=True)
+    try:
+        output = app.run(args.action, credentials=credentials, parameters=parameters)
+    except docker.errors.ContainerError as e:
+        print(str(e), file=stderr)
+        return e.exit_status or 1
+    stdout.write(output.decode("utf-8", errors="replace"))
+    return 0
+
+
+def parser() -> argparse.ArgumentParser:
+    parser = _Parser(
+        prog="cnab", description="Work with CNAB bundles and invocation images"
+    )
+    parser.add_argument(
+        "--socket",
+        default=os.environ.get(SOCKET_ENV),
+        help=f"send commands to a daemon listening on this socket (${SOCKET_ENV})",
+    )
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+    commands.required = True
+
+    command = commands.add_parser(
+        "validate", help="validate bundle files and invocation image directories"
+    )
+    command.add_argument("paths", nargs="+", metavar="PATH")
+    command.set_defaults(handler=validate)
+
+    command = commands.add_parser("inspect", help="summarise a bundle as JSON")
+    command.add_argument("path", metavar="PATH")
+    command.set_defaults(handler=inspect)
+
+    command = commands.add_parser("digest", help="print the digest of bundles")
+    command.add_argument("paths", nargs="+", metavar="PATH")
+    command.set_defaults(handler=digest)
+
+    command = commands.add_parser("run", help="run an action from a bundle")
+    command.add_argument("path", metavar="PATH")
+    command.add_argument("action", metavar="ACTION")
+    command.add_argument("--name", help="the installation name")
+    command.add_argument(
+        "--parameter", "-p", action="append", default=[], metavar="NAME=VALUE"
+    )
+    command.add_argument(
+        "--credential",
+        "-c",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="a credential value, or @PATH to read it from a file",
+    )
+    command.set_defaults(handler=run)
+
+    command = commands.add_parser(
+        "daemon", help="keep bundles and Docker clients warm behind a unix socket"
+    )
+    command.add_argument("--cache-size", type=int, default=128)
+    command.add_argument("--clients", type=int, default=4)
+    command.add_argument(
+        "--client-timeout",
+        type=float,
+        default=60.0,
+        metavar="SECONDS",
+        help="how long a run waits for a free Docker client",
+    )
+    command.set_defaults(handler=None)
+    return parser
+
+
+def execute(
+    argv: List[str],
+    context: Context,
+    stdout: IO[str],
+    stderr: IO[str],
+    cwd: Optional[str] = None,
+) -> int:
+    try:
+        args = parser().parse_args(argv)
+    except UsageError as e:
+        print(f"cnab: error: {e}", file=stderr)
+        return 2
+    except _Exit as e:
+        (stderr if e.status else stdout).write(e.message)
+        return e.status
+    if args.handler is None:
+        print("cnab: the daemon can't be started from a request", file=stderr)
+        return 2
+    args.cwd = cwd or os.getcwd()
+    try:
+        return args.handler(args, context, stdout, stderr)
+    except Exception as e:
+        print(f"cnab: {e}", file=stderr)
+        return 1
+
+
+def _forwarded(argv: List[str]) -> List[str]:
+    # drop the socket option, which comes before the command
+    forwarded = list(argv)
+    for i, arg in enumerate(forwarded):
+        if arg == "--socket":
+            del forwarded[i : i + 2]
+            break
+        if arg.startswith("--socket="):
+            del forwarded[i]
+            break
+        if not arg.startswith("-"):
+            break
+    return forwarded
+
+
+def _connect(path: str) -> socket.socket:
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(path)
+    except OSError:
+        conn.close()
+        raise
+    return conn
+
+
+def _exchange(conn: socket.socket, argv: List[str], cwd: str) -> Dict[str, Any]:
+    with conn:
+        conn.sendall(json.dumps({"argv": argv, "cwd": cwd}).encode() + b"\n")
+        conn.shutdown(socket.SHUT_WR)
+        with conn.makefile("rb") as f:
+            data = f.read()
+    # an empty or truncated response means the daemon failed mid request
+    try:
+        response = json.loads(data)
+    except ValueError:
+        response = None
+    if not isinstance(response, dict) or not RESPONSE_KEYS <= response.keys():
+        raise DaemonError(f"invalid response from the daemon: {data[:100]!r}")
+    return response
+
+
+def request(path: str, argv: List[str], cwd: str) -> Dict[str, Any]:
+    return _exchange(_connect(path), argv, cwd)
+
+
+def _remove_stale_socket(path: str) -> None:
+    # only a socket left behind by a daemon which has stopped is replaced
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise DaemonError(f"{path} exists and is not a socket")
+    try:
+        conn = _connect(path)
+    except OSError:
+        os.unlink(path)
+        return
+    conn.close()
+    raise DaemonError(f"a daemon is already listening on {path}")
+
+
+def serve(
+    path: str, context: Optional[Context] = None, ready: Any = None
+) -> "socketserver.UnixStreamServer":
+    """Return a server answering requests on the unix socket at `path`.
+
+    Each request is a line of JSON with the `argv` and `cwd` of a command, and
+    is answered with its `status`, `stdout` and `stderr`. A socket left by a
+    stopped daemon is replaced, but `DaemonError` is raised if anything else
+    is at `path`."""
+
+    import io
+    import socketserver
+
+    if context is None:
+        context = Context()
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            line = self.rfile.readline(MAX_REQUEST)
+            stdout, stderr = io.StringIO(), io.StringIO()
+            try:
+                message = json.loads(line)
+                status = execute(
+                    list(message["argv"]),
+                    context,
+                    stdout,
+                    stderr,
+                    cwd=message.get("cwd"),
+                )
+            except (ValueError, KeyError, TypeError) as e:
+                status = 2
+                print(f"cnab: invalid request: {e}", file=stderr)
+            response = {
+                "status": status,
+                "stdout": stdout.getvalue(),
+                "stderr": stderr.getvalue(),
+            }
+            self.wfile.write(json.dumps(response).encode())
+
+    _remove_stale_socket(path)
+    # the socket is created private, rather than made private once it exists
+    umask = os.umask(0o177)
+    try:
+        server = socketserver.ThreadingUnixStreamServer(path, Handler)
+    finally:
+        os.umask(umask)
+    server.daemon_threads = True
+    return server
+
+
+def daemon(
+    path: str,
+    cache_size: int = 128,
+    clients: int = 4,
+    client_timeout: Optional[float] = 60.0,
+) -> int:
+    from cnab.cache import BundleCache
+    from cnab.client import DockerClientPool
+
+    import signal
+
+    def terminate(signum, frame):
+        raise KeyboardInterrupt
+
+    # a run waiting longer than this for a client fails, rather than holding
+    # a handler thread indefinitely
+    pool = DockerClientPool(size=clients, timeout=client_timeout)
+    try:
+        server = serve(path, Context(BundleCache(maxsize=cache_size), pool))
+    except DaemonError as e:
+        pool.close()
+        print(f"cnab: {e}", file=sys.stderr)
+        return 1
+    signal.signal(signal.SIGTERM, terminate)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.close()
+        os.unlink(path)
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    try:
+        args = parser().parse_args(argv)
+    except UsageError as e:
+        print(f"cnab: error: {e}", file=sys.stderr)
+        return 2
+    except _Exit as e:
+        (sys.stderr if e.status else sys.stdout).write(e.message)
+        return e.status
+    if args.command == "daemon":
+        if not args.socket:
+            print(f"cnab: daemon needs --socket or ${SOCKET_ENV}", file=sys.stderr)
+            return 2
+        return daemon(args.socket, args.cache_size, args.clients, args.client_timeout)
+
+    if args.socket and os.path.exists(args.socket):
+        try:
+            conn: Optional[socket.socket] = _connect(args.socket)
+        except OSError:
+            # no daemon is listening, so run the command here instead
+            conn = None
+        if conn is not None:
+            try:
+                response = _exchange(conn, _forwarded(argv), os.getcwd())
+            except (OSError, DaemonError) as e:
+                print(f"cnab: {e}", file=sys.stderr)
+                return 1
+            sys.stdout.write(response["stdout"])
+            sys.stderr.write(response["stderr"])
+            return response["status"]
+
+    return execute(argv, Context(), sys.stdout, sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+class DockerClientPool:
+    """A thread-safe pool of Docker clients shared between CNAB instances.
+
+    Clients are created on demand, up to `size`, and reused between actions so
+    that connection setup and version negotiation only happen once per client.
+    Clients left idle for longer than `keep_alive` seconds are closed rather than
+    reused. Waiting for a client gives up after `timeout` seconds, unless a
+    timeout is given when acquiring it. Any other keyword arguments are passed
+    to `docker.from_env`."""
+
+    size: int
+    keep_alive: Optional[float]
+    timeout: Optional[float]
+
+    def __init__(
+        self,
+        size: int = 4,
+        keep_alive: Optional[float] = 60.0,
+        factory: Optional[Callable[[], Any]] = None,
+        timeout: Optional[float] = None,
+        **kwargs,
+    ):
+        self.size = size
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        if factory is None:
+            import docker  # type: ignore
+
+            def factory():
+                return docker.from_env(**kwargs)
+
+        self._factory = factory
+        self._idle: List[Tuple[Any, float]] = []
+        self._created = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def acquire(self, timeout: Optional[float] = None) -> Any:
+        if timeout is None:
+            timeout = self.timeout
+        client = self._acquire(timeout, block=True)
+        assert client is not None
+        return client
+
+    def try_acquire(self) -> Optional[Any]:
+        """Return a client without waiting, or None if they are all in use."""
+        return self._acquire(None, block=False)
+
+    def _acquire(self, timeout: Optional[float], block: bool) -> Optional[Any]:
+        stale = []
+        with self._condition:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while True:
+                if self._closed:
+                    raise PoolTimeoutError("Docker client pool is closed")
+                now = time.monotonic()
+                client = None
+                reserved = False
+                while self._idle and client is None:
+                    candidate, last_used = self._idle.pop()
+                    if self.keep_alive is None or now - last_used <= self.keep_alive:
+                        client = candidate
+                    else:
+                        stale.append(candidate)
+                        self._created -= 1
+                if client is not None or self._created < self.size:
+                    if client is None:
+                        # a new client is created outside the lock
+                        self._created += 1
+                        reserved = True
+                    break
+                if not block:
+                    break
+                remaining = None if deadline is None else deadline - now
+                if remaining is not None and remaining <= 0:
+                    raise PoolTimeoutError("Timed out waiting for a Docker client")
+                self._condition.wait(remaining)
+
+        for old in stale:
+            _close(old)
+        if reserved:
+            try:
+                client = self._factory()
+            except Exception:
+                with self._condition:
+                    self._created -= 1
+                    self._condition.notify()
+                raise
+        return client
+
+    def release(self, client: Any) -> None:
+        with self._condition:
+            if self._closed:
+                self._created -= 1
+            else:
+                self._idle.append((client, time.monotonic()))
+                client = None
+            self._condition.notify()
+        if client is not None:
+            _close(client)
+
+    @contextmanager
+    def client(self, timeout: Optional[float] = None) -> Iterator[Any]:
+        client = self.acquire(timeout)
+        try:
+            yield client
+        finally:
+            self.release(client)
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            idle = [client for client, _ in self._idle]
+            self._created -= len(idle)
+            self._idle = []
+            self._condition.notify_all()
+        for client in idle:
+            _close(client)
+
+    def __enter__(self) -> "DockerClientPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _close(client: Any) -> None:
+    close = getattr(client, "close", None)
+    if close is not None:
+        try:
+            close()
+        except Exception:
+            pass
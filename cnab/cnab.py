@@ -1,141 +1,568 @@
-import json
-import tempfile
-from typing import Union
+import weakref
+from contextlib import asynccontextmanager, contextmanager, ExitStack
+from functools import partial
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    ContextManager,
+    Dict,
+    Generator,
+    Iterator,
+    Optional,
+    Tuple,
+    Union,
+)
 
 from cnab.types import Bundle, Action
+from cnab.client import DockerClientPool
+from cnab.codec import load_path
+from cnab.decoder import decode_bundle
+from cnab.parameters import ParameterValidator
+from cnab.staging import (
+    ARCHIVE,
+    DIRECTORY,
+    IMAGE_MAP_PATH,
+    build_archive,
+    credential_files,
+    image_map,
+    staging_directory,
+)
+from cnab.tracing import Tracer, span
+from cnab.tracking import watch
 from cnab.util import extract_docker_images
 
+if TYPE_CHECKING:
+    import asyncio
+    from concurrent.futures import Executor
+
+    from cnab.cache import BundleCache
+    from cnab.claims import Claim, ClaimStore
+    from cnab.warm import WarmContainerPool
+
+RUN_COMMAND = "/cnab/app/run"
+
+# the largest chunk of output yielded at once when streaming logs
+CHUNK_SIZE = 64 * 1024
+
+# the longest error message recorded in a claim
+MESSAGE_LIMIT = 4096
+
+
+def _outcome(e: BaseException) -> Tuple[str, str]:
+    # the status and message of a claim for a run which raised e
+    from cnab.claims import CANCELLED, FAILURE
+
+    if isinstance(e, GeneratorExit):
+        return CANCELLED, "Output stream closed before the action finished"
+    import asyncio
+
+    if isinstance(e, asyncio.CancelledError):
+        return CANCELLED, "Cancelled before the action finished"
+    return FAILURE, f"{type(e).__name__}: {e}"[:MESSAGE_LIMIT]
+
+
+async def _try_acquire(
+    pool: DockerClientPool, call: Callable[..., Awaitable]
+) -> Optional[Any]:
+    # the executor thread still takes a client if the waiting task is
+    # cancelled, so it is given back once the thread finishes
+    import asyncio
+
+    future = asyncio.ensure_future(call(pool.try_acquire))
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        future.add_done_callback(partial(_release_acquired, pool))
+        raise
+
+
+def _release_acquired(pool: DockerClientPool, future: "asyncio.Future") -> None:
+    if not future.cancelled() and future.exception() is None:
+        client = future.result()
+        if client is not None:
+            pool.release(client)
+
+
+class LogStream:
+    """Output from an action, read from the container as it is produced.
+
+    Iterating yields chunks of standard output of at most `chunk_size` bytes.
+    Once the output is exhausted `exit_code` is set and, as with `CNAB.run`, a
+    `ContainerError` is raised if it is non-zero. Closing the stream early
+    removes the container."""
+
+    exit_code: Optional[int] = None
+
+    def __init__(self, chunks: Generator[bytes, None, int]):
+        self._chunks = chunks
+
+    def __iter__(self) -> "LogStream":
+        return self
+
+    def __next__(self) -> bytes:
+        import docker  # type: ignore
+
+        try:
+            return next(self._chunks)
+        except StopIteration as e:
+            self.exit_code = e.value
+            raise
+        except docker.errors.ContainerError as e:
+            self.exit_code = e.exit_status
+            raise
+
+    def close(self) -> None:
+        self._chunks.close()
+
+    def __enter__(self) -> "LogStream":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
 
 class CNAB:
     bundle: Bundle
     name: str
+    client: Any
+    # how per-run files are passed to the container, and where a staging
+    # directory is created, for instance a tmpfs such as /dev/shm
+    staging: str = DIRECTORY
+    staging_root: Optional[str] = None
+    warm_pool: Optional["WarmContainerPool"]
+    claims: Optional["ClaimStore"]
+    tracer: Optional[Tracer]
+    _validator: Optional[ParameterValidator] = None
+    _ref: Optional["weakref.ref"] = None
 
-    def __init__(self, bundle: Union[Bundle, dict, str], name: str = None):
+    def __init__(
+        self,
+        bundle: Union[Bundle, dict, str],
+        name: Optional[str] = None,
+        cache: Optional["BundleCache"] = None,
+        client: Any = None,
+        warm_pool: Optional["WarmContainerPool"] = None,
+        claims: Optional["ClaimStore"] = None,
+        tracer: Optional[Tracer] = None,
+    ):
         if isinstance(bundle, Bundle):
             self.bundle = bundle
         elif isinstance(bundle, dict):
-            self.bundle = Bundle.from_dict(bundle)
+            self.bundle = decode_bundle(bundle)
+        elif isinstance(bundle, str) and cache is not None:
+            self.bundle = cache.load(bundle)
         elif isinstance(bundle, str):
-            with open(bundle) as f:
-                data = json.load(f)
-            self.bundle = Bundle.from_dict(data)
+            self.bundle = decode_bundle(load_path(bundle))
         else:
             raise TypeError
 
         self.name = name or self.bundle.name
+        # either a Docker client or a DockerClientPool, shared between runs
+        self.client = client
+        # started containers used to run stateless actions
+        self.warm_pool = warm_pool
+        # where a claim is recorded for each action run
+        self.claims = claims
+        # called with a timed span for each phase of running an action
+        self.tracer = tracer
 
-    def run(self, action: str, credentials: dict = {}, parameters: dict = {}):
-        import docker  # type: ignore
-
+    def environment(
+        self, action: str, credentials: dict = {}, parameters: dict = {}
+    ) -> dict:
         # check if action is supported
-        assert action in self.actions
+        with self._span("check_action", action):
+            assert action in self.actions
+
+        # check parameters passed in against the bundle parameters
+        with self._span("validate_parameters", action):
+            validator = self.validator
+            validator.check(parameters)
+
+        with self._span("build_environment", action):
+            env: dict = {
+                "CNAB_INSTALLATION_NAME": self.name,
+                "CNAB_BUNDLE_NAME": self.bundle.name,
+                "CNAB_ACTION": action,
+            }
+
+            # build environment hash
+            env.update(validator.environment(parameters))
 
-        client = docker.from_env()
+            if self.bundle.credentials:
+                for name in self.bundle.credentials:
+                    # check credential has been provided
+                    assert name in credentials
+
+                    credential = self.bundle.credentials[name]
+                    if credential.env:
+                        # discussing behavour in https://github.com/deislabs/cnab-spec/issues/69
+                        assert credential.env[:5] != "CNAB_"
+                        env[credential.env] = credentials[name]
+
+        return env
+
+    def _span(self, name: str, action: str) -> ContextManager:
+        return span(self.tracer, name, action, self.name)
+
+    def _staged_files(self, action: str, credentials: dict) -> Dict[str, bytes]:
+        with self._span("stage_credentials", action):
+            files = credential_files(self.bundle, credentials)
+        with self._span("stage_image_map", action):
+            files[IMAGE_MAP_PATH] = image_map(self.bundle)
+        return files
+
+    def _invocation_image(self) -> str:
         docker_images = extract_docker_images(self.bundle.invocation_images)
         assert len(docker_images) == 1
+        return docker_images[0].image
 
-        # check if parameters passed in are in bundle parameters
-        errors = []
-        for key in parameters:
-            if key not in self.bundle.parameters:
-                errors.append(f"Invalid parameter provided: {key}")
-        assert len(errors) == 0
-
-        # check if required parameters have been passed in
-        required = []
-        for param in self.bundle.parameters:
-            parameter = self.bundle.parameters[param]
-            if parameter.required:
-                required.append(param)
-
-        for param in required:
-            assert param in parameters
-
-        # validate passed in params
-        for param in parameters:
-            parameter = self.bundle.parameters[param]
-            if parameter.allowed_values:
-                assert param in parameter.allowed_values
-            if isinstance(param, int):
-                if parameter.max_value:
-                    assert param <= parameter.max_value
-                if parameter.min_value:
-                    assert param >= parameter.min_value
-            elif isinstance(param, str):
-                if parameter.max_length:
-                    assert len(param) <= parameter.max_length
-                if parameter.min_length:
-                    assert len(param) >= parameter.min_length
-
-        env = {
-            "CNAB_INSTALLATION_NAME": self.name,
-            "CNAB_BUNDLE_NAME": self.bundle.name,
-            "CNAB_ACTION": action,
-        }
+    def _create_container(
+        self,
+        stack: ExitStack,
+        client: Any,
+        image: str,
+        env: dict,
+        credentials: dict,
+        staging: str,
+    ) -> Any:
+        import docker  # type: ignore
 
-        # build environment hash
-        for param in self.bundle.parameters:
-            parameter = self.bundle.parameters[param]
-            if parameter.destination:
-                if parameter.destination.env:
-                    key = parameter.destination.env
-                    value = (
-                        parameters[param]
-                        if param in parameters
-                        else parameter.default_value
-                    )
-                    env[key] = value
-                if parameter.destination.path:
-                    # not yet supported
-                    pass
-
-        mounts = []
-        if self.bundle.credentials:
-            for name in self.bundle.credentials:
-                # check credential has been provided
-                assert name in credentials
-
-                credential = self.bundle.credentials[name]
-                if credential.env:
-                    # discussing behavour in https://github.com/deislabs/cnab-spec/issues/69
-                    assert credential.env[:5] != "CNAB_"
-                    env[credential.env] = credentials[name]
-
-                if credential.path:
-                    tmp = tempfile.NamedTemporaryFile(mode="w+", delete=True)
-                    tmp.write(credentials[name])
-                    tmp.flush()
-                    mounts.append(
-                        docker.types.Mount(
-                            target=credential.path,
-                            source=tmp.name,
-                            read_only=True,
-                            type="bind",
-                        )
-                    )
+        action = env["CNAB_ACTION"]
+        files = self._staged_files(action, credentials)
+        options: dict = {"environment": env}
+        if staging == DIRECTORY:
+            with self._span("stage_files", action):
+                options["mounts"] = stack.enter_context(
+                    staging_directory(files, self.staging_root)
+                )
+        elif staging != ARCHIVE:
+            raise ValueError(f"Unknown staging mode: {staging}")
 
-        # Mount image maps for runtime usage
-        tmp = tempfile.NamedTemporaryFile(mode="w+", delete=True)
-        tmp.write(json.dumps(self.bundle.images))
-        tmp.flush()
-        mounts.append(
-            docker.types.Mount(
-                target="/cnab/app/image-map.json",
-                source=tmp.name,
-                read_only=True,
-                type="bind",
+        try:
+            with self._span("create_container", action):
+                container = client.containers.create(image, RUN_COMMAND, **options)
+        except docker.errors.ImageNotFound:
+            with self._span("pull_image", action):
+                client.images.pull(image)
+            with self._span("create_container", action):
+                container = client.containers.create(image, RUN_COMMAND, **options)
+        # registered after the staging directory, so the container is removed
+        # before the directory is
+        stack.callback(container.remove, force=True)
+
+        if staging == ARCHIVE:
+            with self._span("stage_files", action):
+                container.put_archive("/", build_archive(files))
+        return container
+
+    @staticmethod
+    def _check(container: Any, image: str, exit_code: int) -> None:
+        import docker  # type: ignore
+
+        if exit_code != 0:
+            stderr = container.logs(stdout=False, stderr=True)
+            raise docker.errors.ContainerError(
+                container, exit_code, RUN_COMMAND, image, stderr
             )
+
+    @classmethod
+    def _result(cls, container: Any, image: str, exit_code: int) -> bytes:
+        cls._check(container, image, exit_code)
+        return container.logs(stdout=True, stderr=False)
+
+    @contextmanager
+    def _docker_client(self, client: Any) -> Iterator[Any]:
+        if client is None:
+            client = self.client
+        if isinstance(client, DockerClientPool):
+            with client.client() as pooled:
+                yield pooled
+        elif client is None:
+            import docker  # type: ignore
+
+            yield docker.from_env()
+        else:
+            yield client
+
+    def run(
+        self,
+        action: str,
+        credentials: dict = {},
+        parameters: dict = {},
+        client: Any = None,
+        staging: Optional[str] = None,
+    ):
+        with self._span("run", action):
+            env = self.environment(action, credentials, parameters)
+            image = self._invocation_image()
+
+            with self._claim(action, parameters):
+                # a client or staging given for this run means a new container
+                pool = self.warm_pool
+                warm = client is None and staging is None
+                if warm and pool is not None and self.actions[action].stateless:
+                    return self._run_warm(pool, image, env, credentials)
+
+                with self._docker_client(client) as client:
+                    stack = ExitStack()
+                    try:
+                        container = self._create_container(
+                            stack,
+                            client,
+                            image,
+                            env,
+                            credentials,
+                            staging or self.staging,
+                        )
+                        with self._span("start_container", action):
+                            container.start()
+                        with self._span("wait_container", action):
+                            exit_code = container.wait()["StatusCode"]
+                        with self._span("collect_output", action):
+                            return self._result(container, image, exit_code)
+                    finally:
+                        with self._span("cleanup", action):
+                            stack.close()
+
+    @contextmanager
+    def _claim(self, action: str, parameters: dict) -> Iterator[None]:
+        claims = self.claims
+        if claims is None:
+            yield
+            return
+        from cnab.claims import SUCCESS
+
+        status, message = SUCCESS, None
+        try:
+            yield
+        except BaseException as e:
+            status, message = _outcome(e)
+            raise
+        finally:
+            claims.record(self._new_claim(action, parameters, status, message))
+
+    @asynccontextmanager
+    async def _aclaim(
+        self, action: str, parameters: dict, call: Callable[..., Awaitable]
+    ) -> AsyncIterator[None]:
+        # as _claim, but the claim is written from the executor
+        claims = self.claims
+        if claims is None:
+            yield
+            return
+        from cnab.claims import SUCCESS
+
+        status, message = SUCCESS, None
+        try:
+            yield
+        except BaseException as e:
+            status, message = _outcome(e)
+            raise
+        finally:
+            claim = self._new_claim(action, parameters, status, message)
+            await call(claims.record, claim)
+
+    def _new_claim(
+        self, action: str, parameters: dict, status: str, message: Optional[str]
+    ) -> "Claim":
+        from cnab.claims import Claim
+
+        values = {
+            name: parameter.default
+            for name, parameter in self.validator.parameters.items()
+            if parameter.default is not None
+        }
+        values.update(parameters)
+        return Claim(
+            self.name,
+            self.bundle.digest(),
+            action,
+            status,
+            values,
+            message,
+            self.bundle.name,
+            self.bundle.version,
         )
 
-        return client.containers.run(
-            docker_images[0].image,
-            "/cnab/app/run",
-            auto_remove=False,
-            remove=True,
-            environment=env,
-            mounts=mounts,
+    def _run_warm(
+        self, pool: "WarmContainerPool", image: str, env: dict, credentials: dict
+    ) -> bytes:
+        import docker  # type: ignore
+
+        if pool.image != image:
+            raise ValueError(f"Warm container pool is for {pool.image}, not {image}")
+        action = env["CNAB_ACTION"]
+        files = self._staged_files(action, credentials)
+        with self._span("acquire_container", action):
+            container = pool.acquire()
+        exit_code = None
+        try:
+            with self._span("stage_files", action):
+                container.put_archive("/", build_archive(files))
+            with self._span("exec_action", action):
+                exit_code, (stdout, stderr) = container.exec_run(
+                    RUN_COMMAND, environment=env, demux=True
+                )
+        finally:
+            # a container is only reused once the action succeeded and the
+            # files it was given, credentials included, have been removed
+            with self._span("cleanup", action):
+                reuse = exit_code == 0 and self._unstage(container, files)
+                pool.release(container, reuse)
+        if exit_code != 0:
+            raise docker.errors.ContainerError(
+                container, exit_code, RUN_COMMAND, image, stderr or b""
+            )
+        return stdout or b""
+
+    @staticmethod
+    def _unstage(container: Any, files: Dict[str, bytes]) -> bool:
+        try:
+            exit_code, _ = container.exec_run(["rm", "-f"] + sorted(files))
+        except Exception:
+            return False
+        return exit_code == 0
+
+    def stream(
+        self,
+        action: str,
+        credentials: dict = {},
+        parameters: dict = {},
+        client: Any = None,
+        staging: Optional[str] = None,
+        chunk_size: int = CHUNK_SIZE,
+    ) -> LogStream:
+        """Run an action, returning its output as it is produced.
+
+        Arguments are checked straight away, but the container is only
+        created once the stream is first read from."""
+        env = self.environment(action, credentials, parameters)
+        image = self._invocation_image()
+        return LogStream(
+            self._stream(
+                action,
+                parameters,
+                image,
+                env,
+                credentials,
+                client,
+                staging or self.staging,
+                chunk_size,
+            )
         )
 
+    def _stream(
+        self,
+        action: str,
+        parameters: dict,
+        image: str,
+        env: dict,
+        credentials: dict,
+        client: Any,
+        staging: str,
+        chunk_size: int,
+    ) -> Generator[bytes, None, int]:
+        with self._claim(action, parameters), self._docker_client(client) as client:
+            stack = ExitStack()
+            try:
+                container = self._create_container(
+                    stack, client, image, env, credentials, staging
+                )
+                with self._span("start_container", action):
+                    container.start()
+                with self._span("collect_output", action):
+                    for chunk in container.logs(
+                        stdout=True, stderr=False, stream=True, follow=True
+                    ):
+                        if len(chunk) <= chunk_size:
+                            yield chunk
+                        else:
+                            view = memoryview(chunk)
+                            for i in range(0, len(chunk), chunk_size):
+                                yield bytes(view[i : i + chunk_size])
+                with self._span("wait_container", action):
+                    exit_code = container.wait()["StatusCode"]
+                self._check(container, image, exit_code)
+                return exit_code
+            finally:
+                with self._span("cleanup", action):
+                    stack.close()
+
+    async def arun(
+        self,
+        action: str,
+        credentials: dict = {},
+        parameters: dict = {},
+        client: Any = None,
+        poll_interval: float = 0.5,
+        executor: Optional["Executor"] = None,
+        staging: Optional[str] = None,
+    ):
+        """Run an action without blocking the event loop.
+
+        Each call to the Docker API runs on `executor`, or the loop's default
+        executor, but the container is waited on by polling from the event
+        loop, so no thread is held for the lifetime of the container."""
+        import docker  # type: ignore
+
+        import asyncio
+
+        loop = asyncio.get_event_loop()
+
+        def call(fn: Callable, *args, **kwargs) -> Awaitable:
+            return loop.run_in_executor(executor, partial(fn, *args, **kwargs))
+
+        with self._span("run", action):
+            env = self.environment(action, credentials, parameters)
+            image = self._invocation_image()
+
+            async with self._aclaim(action, parameters, call):
+                if client is None:
+                    client = self.client
+                pool = None
+                if isinstance(client, DockerClientPool):
+                    # waiting on the pool from an executor thread could use up
+                    # the threads the holders of its clients need to finish
+                    pool = client
+                    client = await _try_acquire(pool, call)
+                    while client is None:
+                        await asyncio.sleep(poll_interval)
+                        client = await _try_acquire(pool, call)
+                elif client is None:
+                    client = await call(docker.from_env)
+
+                stack = ExitStack()
+                try:
+                    container = await call(
+                        self._create_container,
+                        stack,
+                        client,
+                        image,
+                        env,
+                        credentials,
+                        staging or self.staging,
+                    )
+                    with self._span("start_container", action):
+                        await call(container.start)
+                    with self._span("wait_container", action):
+                        while True:
+                            await call(container.reload)
+                            if container.status in ("exited", "dead"):
+                                break
+                            await asyncio.sleep(poll_interval)
+
+                    exit_code = container.attrs["State"]["ExitCode"]
+                    with self._span("collect_output", action):
+                        return await call(self._result, container, image, exit_code)
+                finally:
+                    with self._span("cleanup", action):
+                        await call(stack.close)
+                    if pool is not None:
+                        pool.release(client)
+
     @property
     def actions(self) -> dict:
         actions = {
@@ -147,6 +574,26 @@ class CNAB:
             actions.update(self.bundle.actions)
         return actions
 
+    @property
+    def validator(self) -> ParameterValidator:
+        # compiled on first use, and again if the parameters are replaced or
+        # anything beneath them changes
+        validator = self._validator
+        bundle = self.bundle
+        if validator is None or validator.source is not bundle.parameters:
+            if self._ref is None:
+                self._ref = weakref.ref(self)
+            parameters = watch(bundle.parameters, self._ref)
+            if parameters is not bundle.parameters:
+                # the same definitions, so the bundle's encoding still holds
+                object.__setattr__(bundle, "parameters", parameters)
+            validator = ParameterValidator(parameters)
+            self._validator = validator
+        return validator
+
+    def _changed(self) -> None:
+        self._validator = None
+
     @property
     def parameters(self) -> dict:
         return self.bundle.parameters
@@ -0,0 +1,158 @@
+import json
+import os
+from typing import IO, Any, Optional, Union
+
+# The backend can be chosen with this variable, otherwise orjson is used when
+# it is installed
+CODEC_ENV = "CNAB_JSON"
+
+# orjson reads integers outside the 64 bit range as floats, so documents which
+# might contain one are left to the standard library. Digits are mapped to 0
+# and the characters which can end a number to a comma, so that a long number
+# is a long run of zeros followed by a comma, or at the end of the document.
+_NUMBERS = bytes.maketrans(b"0123456789]} \t\r\n", b"0000000000,,,,,,")
+_LONG_NUMBER = b"0" * 19 + b","
+
+
+def _long_numbers(data: Union[str, bytes]) -> bool:
+    if isinstance(data, str):
+        data = data.encode()
+    numbers = data.translate(_NUMBERS)
+    return _LONG_NUMBER in numbers or numbers.endswith(_LONG_NUMBER[:-1])
+
+
+class Codec:
+    """Parses JSON and produces the canonical encoding used for digests.
+
+    This uses the standard library for parsing and canonicaljson for encoding,
+    which defines the canonical form every other codec must match byte for
+    byte."""
+
+    name = "stdlib"
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+    def load(self, f: IO) -> Any:
+        return self.loads(f.read())
+
+    def canonical(self, value: Any) -> bytes:
+        import canonicaljson  # type: ignore
+
+        return canonicaljson.encode_canonical_json(value)
+
+    def pretty(self, value: Any) -> bytes:
+        import canonicaljson  # type: ignore
+
+        return canonicaljson.encode_pretty_printed_json(value)
+
+
+def _plain(x: Any) -> bool:
+    # orjson formats floats differently from the standard library, for instance
+    # 1e16 rather than 1e+16, and writes NaN as null, so only values built from
+    # exactly these types are encoded with it
+    kind = type(x)
+    if kind is dict:
+        x = x.values()
+    elif kind is list:
+        pass
+    else:
+        return kind is str or kind is int or kind is bool or x is None
+    for y in x:
+        kind = type(y)
+        if kind is str or kind is int or kind is bool or y is None:
+            continue
+        if (kind is not dict and kind is not list) or not _plain(y):
+            return False
+    return True
+
+
+class OrjsonCodec(Codec):
+    """A codec using orjson where its results match those of `Codec`.
+
+    Anything orjson can't handle identically, such as floats, integers beyond
+    64 bits, non-string keys or NaN literals, goes through `Codec` instead."""
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson  # type: ignore
+
+        self._orjson = orjson
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        if _long_numbers(data):
+            return super().loads(data)
+        try:
+            return self._orjson.loads(data)
+        except self._orjson.JSONDecodeError:
+            # also raises the standard error for documents which are invalid
+            return super().loads(data)
+
+    def canonical(self, value: Any) -> bytes:
+        orjson = self._orjson
+        if _plain(value):
+            try:
+                return orjson.dumps(value, option=orjson.OPT_SORT_KEYS)
+            except orjson.JSONEncodeError:
+                pass
+        return super().canonical(value)
+
+
+_codec: Optional[Codec] = None
+
+
+def get_codec() -> Codec:
+    global _codec
+    if _codec is None:
+        _codec = _default()
+    return _codec
+
+
+def set_codec(codec: Union[Codec, str, None]) -> Codec:
+    """Set the codec used by the package, by instance or name.
+
+    None chooses the default again."""
+    global _codec
+    if codec is None:
+        _codec = _default()
+    elif isinstance(codec, str):
+        _codec = _named(codec)
+    else:
+        _codec = codec
+    return _codec
+
+
+def _named(name: str) -> Codec:
+    if name == Codec.name:
+        return Codec()
+    if name == OrjsonCodec.name:
+        return OrjsonCodec()
+    raise ValueError(f"Unknown JSON codec {name!r}")
+
+
+def _default() -> Codec:
+    name = os.environ.get(CODEC_ENV)
+    if name:
+        return _named(name)
+    try:
+        return OrjsonCodec()
+    except ImportError:
+        return Codec()
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    return get_codec().loads(data)
+
+
+def load_path(path: str) -> Any:
+    with open(path, "rb") as f:
+        return get_codec().loads(f.read())
+
+
+def canonical(value: Any) -> bytes:
+    return get_codec().canonical(value)
+
+
+def pretty(value: Any) -> bytes:
+    return get_codec().pretty(value)
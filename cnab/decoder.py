@@ -0,0 +1,393 @@
+from dataclasses import fields
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from cnab.types import (
+    Action,
+    Credential,
+    ImagePlatform,
+    Ref,
+    Image,
+    InvocationImage,
+    Maintainer,
+    Destination,
+    Metadata,
+    Parameter,
+    Bundle,
+)
+
+
+class InvalidBundleError(Exception):
+    def __init__(self, message: str, path: Tuple = ()):
+        super().__init__(message, path)
+        self.message = message
+        self.path = path
+
+    def __str__(self) -> str:
+        if self.path:
+            location = ".".join(str(part) for part in self.path)
+            return f"{location}: {self.message}"
+        return self.message
+
+    @property
+    def pointer(self) -> str:
+        # the location of the bad value as a JSON pointer (RFC 6901)
+        return "".join(
+            "/" + str(part).replace("~", "~0").replace("/", "~1") for part in self.path
+        )
+
+
+# A dispatch table maps the exact type of a decoded JSON value to the converter
+# for that value. A converter of None means the value is used as-is.
+Dispatch = Dict[type, Optional[Callable[[Any], Any]]]
+
+NoneType = type(None)
+
+STR: Dispatch = {str: None}
+OPTIONAL_STR: Dispatch = {str: None, NoneType: None}
+OPTIONAL_BOOL: Dispatch = {bool: None, NoneType: None}
+OPTIONAL_INT: Dispatch = {int: None, NoneType: None}
+DEFAULT_VALUE: Dispatch = {int: None, bool: None, NoneType: None, str: None}
+
+
+def _convert(dispatch: Dispatch, x: Any) -> Any:
+    try:
+        converter = dispatch[type(x)]
+    except KeyError:
+        converter = _fallback(dispatch, x)
+    if converter is None:
+        return x
+    return converter(x)
+
+
+def _fallback(dispatch: Dispatch, x: Any) -> Optional[Callable[[Any], Any]]:
+    # Values produced by json.load always hit the table directly, this handles
+    # subclasses such as OrderedDict. bool can't be subclassed, and must never
+    # be accepted where an int is expected.
+    if not isinstance(x, bool):
+        for kind, converter in dispatch.items():
+            if kind is not NoneType and isinstance(x, kind):
+                return converter
+    expected = " or ".join(
+        "null" if kind is NoneType else kind.__name__ for kind in dispatch
+    )
+    raise InvalidBundleError(f"expected {expected}, got {type(x).__name__}")
+
+
+def decode_field(key: str, dispatch: Dispatch, x: Any) -> Any:
+    try:
+        return _convert(dispatch, x)
+    except InvalidBundleError as e:
+        raise InvalidBundleError(e.message, (key,) + e.path)
+
+
+class ClassDecoder:
+    cls: Type
+    names: List[str]
+    table: List[Tuple[str, Dispatch]]
+    setters: List[Callable[[Any, Any], None]]
+
+    def __init__(self, cls: Type, names: List[str], table: List[Tuple[str, Dispatch]]):
+        self.cls = cls
+        self.names = names
+        self.table = table
+        self.setters = [cls.__dict__[name].__set__ for name in names]
+
+    def __call__(self, obj: Any) -> Any:
+        if type(obj) is not dict and not isinstance(obj, dict):
+            raise InvalidBundleError(f"expected dict, got {type(obj).__name__}")
+        get = obj.get
+        args = []
+        for key, dispatch in self.table:
+            x = get(key)
+            try:
+                converter = dispatch[type(x)]
+            except KeyError:
+                try:
+                    converter = _fallback(dispatch, x)
+                except InvalidBundleError as e:
+                    raise InvalidBundleError(e.message, (key,) + e.path)
+            if converter is None:
+                args.append(x)
+            else:
+                try:
+                    args.append(converter(x))
+                except InvalidBundleError as e:
+                    raise InvalidBundleError(e.message, (key,) + e.path)
+        # every field has a value, so the generated __init__, and its change
+        # notifications, can be skipped by filling the slots directly
+        cls: Any = self.cls
+        obj = cls.__new__(cls)
+        for setter, value in zip(self.setters, args):
+            setter(obj, value)
+        return obj
+
+
+class ListOf:
+    dispatch: Dispatch
+
+    def __init__(self, dispatch: Dispatch):
+        self.dispatch = dispatch
+
+    def __call__(self, x: Any) -> list:
+        dispatch = self.dispatch
+        result = []
+        for i, y in enumerate(x):
+            try:
+                result.append(_convert(dispatch, y))
+            except InvalidBundleError as e:
+                raise InvalidBundleError(e.message, (i,) + e.path)
+        return result
+
+
+class DictOf:
+    dispatch: Dispatch
+
+    def __init__(self, dispatch: Dispatch):
+        self.dispatch = dispatch
+
+    def __call__(self, x: Any) -> dict:
+        dispatch = self.dispatch
+        result = {}
+        for k, v in x.items():
+            try:
+                result[k] = _convert(dispatch, v)
+            except InvalidBundleError as e:
+                raise InvalidBundleError(e.message, (k,) + e.path)
+        return result
+
+
+# The element dispatch is kept on the converter, so that other compilers such
+# as the schema validator can walk the same tables.
+def list_of(dispatch: Dispatch) -> ListOf:
+    return ListOf(dispatch)
+
+
+def dict_of(dispatch: Dispatch) -> DictOf:
+    return DictOf(dispatch)
+
+
+def compile_class(cls: Type, keys: Dict[str, Tuple[str, Dispatch]]) -> ClassDecoder:
+    # The table follows the dataclass field order so that the decoded values
+    # can be passed positionally to the constructor.
+    names = [f.name for f in fields(cls)]
+    return ClassDecoder(cls, names, [keys[name] for name in names])
+
+
+def _nested(decoder: ClassDecoder, optional: bool = True) -> Dispatch:
+    dispatch: Dispatch = {dict: decoder}
+    if optional:
+        dispatch[NoneType] = None
+    return dispatch
+
+
+decode_action = compile_class(
+    Action,
+    {
+        "modifies": ("modifies", OPTIONAL_BOOL),
+        "stateless": ("stateless", OPTIONAL_BOOL),
+        "description": ("description", OPTIONAL_STR),
+    },
+)
+
+decode_credential = compile_class(
+    Credential,
+    {
+        "description": ("description", OPTIONAL_STR),
+        "env": ("env", OPTIONAL_STR),
+        "path": ("path", OPTIONAL_STR),
+    },
+)
+
+decode_image_platform = compile_class(
+    ImagePlatform,
+    {"architecture": ("architecture", OPTIONAL_STR), "os": ("os", OPTIONAL_STR)},
+)
+
+decode_ref = compile_class(
+    Ref,
+    {
+        "field": ("field", OPTIONAL_STR),
+        "media_type": ("mediaType", OPTIONAL_STR),
+        "path": ("path", OPTIONAL_STR),
+    },
+)
+
+decode_image = compile_class(
+    Image,
+    {
+        "image": ("image", STR),
+        "description": ("description", OPTIONAL_STR),
+        "digest": ("digest", OPTIONAL_STR),
+        "image_type": ("imageType", OPTIONAL_STR),
+        "media_type": ("mediaType", OPTIONAL_STR),
+        "platform": ("platform", _nested(decode_image_platform)),
+        "refs": ("refs", {list: list_of(_nested(decode_ref, False)), NoneType: None}),
+        "size": ("size", OPTIONAL_INT),
+    },
+)
+
+decode_invocation_image = compile_class(
+    InvocationImage,
+    {
+        "image": ("image", STR),
+        "digest": ("digest", OPTIONAL_STR),
+        "image_type": ("imageType", OPTIONAL_STR),
+        "media_type": ("mediaType", OPTIONAL_STR),
+        "platform": ("platform", _nested(decode_image_platform)),
+        "size": ("size", OPTIONAL_STR),
+    },
+)
+
+decode_maintainer = compile_class(
+    Maintainer,
+    {
+        "name": ("name", OPTIONAL_STR),
+        "email": ("email", OPTIONAL_STR),
+        "url": ("url", OPTIONAL_STR),
+    },
+)
+
+decode_destination = compile_class(
+    Destination,
+    {
+        "description": ("description", OPTIONAL_STR),
+        "env": ("env", OPTIONAL_STR),
+        "path": ("path", OPTIONAL_STR),
+    },
+)
+
+decode_metadata = compile_class(
+    Metadata, {"description": ("description", OPTIONAL_STR)}
+)
+
+decode_parameter = compile_class(
+    Parameter,
+    {
+        "type": ("type", STR),
+        "destination": ("destination", _nested(decode_destination, False)),
+        "default_value": ("defaultValue", DEFAULT_VALUE),
+        "allowed_values": ("allowedValues", {list: list, NoneType: None}),
+        "max_length": ("maxLength", OPTIONAL_INT),
+        "max_value": ("maxValue", OPTIONAL_INT),
+        "metadata": ("metadata", _nested(decode_metadata)),
+        "min_length": ("minLength", OPTIONAL_INT),
+        "min_value": ("minValue", OPTIONAL_INT),
+        "required": ("required", OPTIONAL_BOOL),
+    },
+)
+
+decode_bundle = compile_class(
+    Bundle,
+    {
+        "name": ("name", STR),
+        "version": ("version", STR),
+        "invocation_images": (
+            "invocationImages",
+            {list: list_of(_nested(decode_invocation_image, False))},
+        ),
+        "schema_version": ("schemaVersion", OPTIONAL_STR),
+        "actions": (
+            "actions",
+            {dict: dict_of(_nested(decode_action, False)), NoneType: None},
+        ),
+        "credentials": (
+            "credentials",
+            {dict: dict_of(_nested(decode_credential, False)), NoneType: None},
+        ),
+        "description": ("description", OPTIONAL_STR),
+        "license": ("license", OPTIONAL_STR),
+        "images": (
+            "images",
+            {dict: dict_of(_nested(decode_image, False)), NoneType: None},
+        ),
+        "keywords": ("keywords", {list: list_of(STR), NoneType: None}),
+        "maintainers": (
+            "maintainers",
+            {list: list_of(_nested(decode_maintainer, False)), NoneType: None},
+        ),
+        "parameters": (
+            "parameters",
+            {dict: dict_of(_nested(decode_parameter, False)), NoneType: None},
+        ),
+    },
+)
+
+
+LAZY_SECTIONS = ("images", "parameters", "credentials", "maintainers")
+
+
+class LazySection:
+    key: str
+    dispatch: Dispatch
+
+    def __init__(self, slot: Any, key: str, dispatch: Dispatch):
+        # the decoded value is stored in the slot from Bundle that this
+        # descriptor shadows
+        self.slot = slot
+        self.key = key
+        self.dispatch = dispatch
+
+    def __get__(self, instance: Any, owner: Type) -> Any:
+        if instance is None:
+            return self
+        try:
+            return self.slot.__get__(instance, owner)
+        except AttributeError:
+            pass
+        value = decode_field(self.key, self.dispatch, instance._raw.get(self.key))
+        self.slot.__set__(instance, value)
+        return value
+
+    def __set__(self, instance: Any, value: Any) -> None:
+        self.slot.__set__(instance, value)
+
+    def is_decoded(self, instance: Any) -> bool:
+        try:
+            self.slot.__get__(instance, type(instance))
+        except AttributeError:
+            return False
+        return True
+
+
+def _section(name: str) -> LazySection:
+    key, dispatch = decode_bundle.table[decode_bundle.names.index(name)]
+    return LazySection(Bundle.__dict__[name], key, dispatch)
+
+
+class LazyBundle(Bundle):
+    """A Bundle which decodes its larger sections on first access.
+
+    The raw dictionary is kept, and `images`, `parameters`, `credentials` and
+    `maintainers` are only decoded, and validated, when they are first read.
+    The dictionary should not be modified while the bundle is in use."""
+
+    __slots__ = ("_raw",)
+
+    _raw: dict
+
+    images = _section("images")
+    parameters = _section("parameters")
+    credentials = _section("credentials")
+    maintainers = _section("maintainers")
+
+    @staticmethod
+    def from_dict(obj: Any) -> "LazyBundle":
+        if not isinstance(obj, dict):
+            raise InvalidBundleError(f"expected dict, got {type(obj).__name__}")
+        bundle = LazyBundle.__new__(LazyBundle)
+        bundle._raw = obj
+        fields = zip(decode_bundle.names, decode_bundle.setters, decode_bundle.table)
+        for name, setter, (key, dispatch) in fields:
+            if name not in LAZY_SECTIONS:
+                setter(bundle, decode_field(key, dispatch, obj.get(key)))
+        return bundle
+
+    def is_decoded(self, section: str) -> bool:
+        return getattr(LazyBundle, section).is_decoded(self)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Bundle):
+            return NotImplemented
+        return all(
+            getattr(self, name) == getattr(other, name) for name in decode_bundle.names
+        )
@@ -0,0 +1,112 @@
+import hashlib
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List
+
+from cnab.codec import canonical
+
+if TYPE_CHECKING:
+    from cnab.types import Bundle
+
+# sections of bundle.json made up of named entries, compared entry by entry
+SECTIONS = {
+    "actions": "actions",
+    "credentials": "credentials",
+    "images": "images",
+    "invocationImages": "invocation_images",
+    "parameters": "parameters",
+}
+
+# every other field of a bundle, compared as a whole
+FIELDS = {
+    "description": "description",
+    "keywords": "keywords",
+    "license": "license",
+    "maintainers": "maintainers",
+    "name": "name",
+    "schemaVersion": "schema_version",
+    "version": "version",
+}
+
+
+def _hash(value) -> str:
+    return hashlib.sha256(canonical(value)).hexdigest()
+
+
+@dataclass
+class BundleHashes:
+    """The hash of every section of a bundle, and of every entry within them."""
+
+    sections: Dict[str, str] = field(default_factory=dict)
+    entries: Dict[str, Dict[str, str]] = field(default_factory=dict)
+    fields: Dict[str, str] = field(default_factory=dict)
+
+
+def bundle_hashes(bundle: "Bundle") -> BundleHashes:
+    """The hashes of a bundle, kept until the bundle or anything in it changes."""
+    hashes = bundle._hashes
+    if hashes is None:
+        # computing the digest registers the bundle as a watcher of everything
+        # beneath it, so a change clears these hashes too
+        bundle.digest()
+        hashes = BundleHashes()
+        document = bundle.to_dict()
+        for key, section in SECTIONS.items():
+            value = document.get(key) or {}
+            if isinstance(value, list):
+                value = {str(i): entry for i, entry in enumerate(value)}
+            entries = {name: _hash(entry) for name, entry in value.items()}
+            hashes.entries[section] = entries
+            hashes.sections[section] = _hash(entries)
+        for key, name in FIELDS.items():
+            hashes.fields[name] = _hash(document.get(key))
+        bundle._hashes = hashes
+    return hashes
+
+
+@dataclass
+class SectionChanges:
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+
+@dataclass
+class Changeset:
+    """What changed between two bundles.
+
+    `sections` holds the entries added, removed or changed in each section
+    that differs, by name, or by position for invocation images. `fields`
+    lists the other fields that differ."""
+
+    sections: Dict[str, SectionChanges] = field(default_factory=dict)
+    fields: List[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.sections or self.fields)
+
+
+def diff(old: "Bundle", new: "Bundle") -> Changeset:
+    changes = Changeset()
+    if old is new or old.digest() == new.digest():
+        return changes
+    a, b = bundle_hashes(old), bundle_hashes(new)
+    for section, digest in a.sections.items():
+        if b.sections[section] == digest:
+            continue
+        before, after = a.entries[section], b.entries[section]
+        changes.sections[section] = SectionChanges(
+            added=[name for name in after if name not in before],
+            removed=[name for name in before if name not in after],
+            changed=[
+                name
+                for name, digest in after.items()
+                if name in before and before[name] != digest
+            ],
+        )
+    changes.fields = [
+        name for name, digest in a.fields.items() if b.fields[name] != digest
+    ]
+    return changes
@@ -0,0 +1,83 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from cnab.cnab import CNAB
+from cnab.client import DockerClientPool
+from cnab.types import Bundle
+from cnab.util import extract_docker_images
+
+PRESENT = "present"
+PULLED = "pulled"
+FAILED = "failed"
+
+
+@dataclass
+class PrefetchResult:
+    image: str
+    status: str
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status != FAILED
+
+
+def invocation_images(bundles: Iterable[Union[Bundle, CNAB]]) -> List[str]:
+    """The unique docker invocation images of the bundles, in order."""
+    images: Dict[str, None] = {}
+    for bundle in bundles:
+        if isinstance(bundle, CNAB):
+            bundle = bundle.bundle
+        for image in extract_docker_images(bundle.invocation_images or []):
+            images[image.image] = None
+    return list(images)
+
+
+def prefetch(
+    bundles: Iterable[Union[Bundle, CNAB]],
+    client: Any = None,
+    concurrency: int = 4,
+) -> List[PrefetchResult]:
+    """Pull the invocation images of many bundles ahead of running them.
+
+    Each image is only pulled once, however many bundles use it, and at most
+    `concurrency` pulls run at once. Images already present locally are
+    reported as such and not pulled. Results are in the order the images were
+    first found. A failed pull is reported rather than raised."""
+    import docker  # type: ignore
+
+    images = invocation_images(bundles)
+    owned = None
+    if client is None:
+        owned = client = docker.from_env()
+
+    def fetch(image: str) -> PrefetchResult:
+        try:
+            if isinstance(client, DockerClientPool):
+                with client.client() as pooled:
+                    return _fetch(pooled, image)
+            return _fetch(client, image)
+        except Exception as e:
+            return PrefetchResult(image, FAILED, f"{type(e).__name__}: {e}")
+
+    try:
+        if not images:
+            return []
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(images))) as pool:
+            return list(pool.map(fetch, images))
+    finally:
+        if owned is not None:
+            owned.close()
+
+
+def _fetch(client: Any, image: str) -> PrefetchResult:
+    import docker  # type: ignore
+
+    try:
+        client.images.get(image)
+        return PrefetchResult(image, PRESENT)
+    except docker.errors.ImageNotFound:
+        pass
+    client.images.pull(image)
+    return PrefetchResult(image, PULLED)
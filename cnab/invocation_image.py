@@ -1,70 +1,152 @@
 import os
-from typing import Union, List
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from cnab.build import BuildContext, Manifest
 
 
 class InvalidCNABDirectoryError(Exception):
     pass
 
 
+ALLOWED_DIRS = ["app", "build"]
+ALLOWED_FILES = ["LICENSE", "README.md", "README.txt"]
+
+
+class Snapshot:
+    # a plain class rather than a dataclass, so that checking a directory
+    # doesn't import dataclasses
+    __slots__ = (
+        "has_cnab",
+        "has_app",
+        "has_run",
+        "executable_run",
+        "dirs",
+        "files",
+        "error",
+    )
+
+    def __init__(self) -> None:
+        self.has_cnab = False
+        self.has_app = False
+        self.has_run = False
+        self.executable_run = False
+        # entries directly inside the cnab directory
+        self.dirs: List[str] = []
+        self.files: List[str] = []
+        # why the directory couldn't be read, for instance a permission error
+        self.error: Optional[str] = None
+
+
+def _scan(path: str) -> Optional[List[os.DirEntry]]:
+    try:
+        with os.scandir(path) as entries:
+            return list(entries)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+def take_snapshot(path: str) -> Snapshot:
+    snapshot = Snapshot()
+    try:
+        _fill(snapshot, path)
+    except OSError as e:
+        snapshot.error = f"Unable to read {e.filename or path}: {e.strerror or e}"
+    return snapshot
+
+
+def _fill(snapshot: Snapshot, path: str) -> None:
+    cnab = os.path.join(path, "cnab")
+    entries = _scan(cnab)
+    if entries is None:
+        return
+    snapshot.has_cnab = True
+    for entry in entries:
+        if entry.is_dir():
+            snapshot.dirs.append(entry.name)
+        else:
+            snapshot.files.append(entry.name)
+    snapshot.has_app = "app" in snapshot.dirs
+    if snapshot.has_app:
+        for entry in _scan(os.path.join(cnab, "app")) or []:
+            if entry.name == "run":
+                snapshot.has_run = entry.is_file()
+                snapshot.executable_run = os.access(entry.path, os.X_OK)
+                break
+
+
 class CNABDirectory(object):
+    """An invocation image directory.
+
+    The directory is read once, with a single scan of the cnab directory and
+    one of the app directory, and every check uses that snapshot. Call
+    `refresh` to read it again."""
+
     path: str
+    _snapshot: Optional[Snapshot]
 
     def __init__(self, path: str):
         self.path = path
+        self._snapshot = None
+
+    @property
+    def snapshot(self) -> Snapshot:
+        if self._snapshot is None:
+            self._snapshot = take_snapshot(self.path)
+        return self._snapshot
+
+    def refresh(self) -> None:
+        self._snapshot = None
 
     def has_cnab_directory(self) -> bool:
-        cnab = os.path.join(self.path, "cnab")
-        return os.path.isdir(cnab)
+        return self.snapshot.has_cnab
 
     def has_app_directory(self) -> bool:
-        app = os.path.join(self.path, "cnab", "app")
-        return os.path.isdir(app)
+        return self.snapshot.has_app
 
     def has_no_misc_files_in_cnab_dir(self) -> bool:
-        cnab = os.path.join(self.path, "cnab")
-        disallowed_dirs: List[str] = []
-        disallowed_files: List[str] = []
-        for root, dirs, files in os.walk(cnab):
-            disallowed_dirs = [x for x in dirs if x not in ["app", "build"]]
-            disallowed_files = [
-                x for x in files if x not in ["LICENSE", "README.md", "README.txt"]
-            ]
-            break
+        snapshot = self.snapshot
+        disallowed_dirs = [x for x in snapshot.dirs if x not in ALLOWED_DIRS]
+        disallowed_files = [x for x in snapshot.files if x not in ALLOWED_FILES]
         if disallowed_dirs or disallowed_files:
             return False
         else:
             return True
 
     def has_run(self) -> bool:
-        run = os.path.join(self.path, "cnab", "app", "run")
-        return os.path.isfile(run)
+        return self.snapshot.has_run
 
     def has_executable_run(self) -> bool:
-        run = os.path.join(self.path, "cnab", "app", "run")
-        return os.access(run, os.X_OK)
+        return self.snapshot.executable_run
+
+    def _read(self, name: str) -> str:
+        with open(os.path.join(self.path, "cnab", name), "r") as content:
+            return content.read()
 
     def readme(self) -> Union[bool, str]:
-        readme = os.path.join(self.path, "cnab", "README")
-        txt = readme + ".txt"
-        md = readme + ".md"
-        if os.path.isfile(txt):
-            with open(txt, "r") as content:
-                return content.read()
-        elif os.path.isfile(md):
-            with open(md, "r") as content:
-                return content.read()
+        files = self.snapshot.files
+        if "README.txt" in files:
+            return self._read("README.txt")
+        elif "README.md" in files:
+            return self._read("README.md")
         else:
             return False
 
     def license(self) -> Union[bool, str]:
-        license = os.path.join(self.path, "cnab", "LICENSE")
-        if os.path.isfile(license):
-            with open(license, "r") as content:
-                return content.read()
+        if "LICENSE" in self.snapshot.files:
+            return self._read("LICENSE")
         else:
             return False
 
-    def valid(self) -> bool:
+    def build_context(self, previous: Optional["Manifest"] = None) -> "BuildContext":
+        from cnab.build import BuildContext
+
+        return BuildContext(self.path, previous)
+
+    def errors(self) -> List[str]:
+        if self.snapshot.error is not None:
+            # nothing else can be checked
+            return [self.snapshot.error]
         errors = []
         if not self.has_executable_run():
             errors.append("Run entrypoint is not executable")
@@ -76,8 +158,30 @@ class CNABDirectory(object):
             errors.append("Missing the cnab directory")
         if not self.has_no_misc_files_in_cnab_dir():
             errors.append("Has additional files in the cnab directory")
+        return errors
 
+    def valid(self) -> bool:
+        errors = self.errors()
         if len(errors) == 0:
             return True
         else:
             raise InvalidCNABDirectoryError(errors)
+
+
+def _errors(path: str) -> Tuple[str, List[str]]:
+    return path, CNABDirectory(path).errors()
+
+
+def validate_directories(
+    paths: Iterable[str], workers: Optional[int] = None
+) -> Dict[str, List[str]]:
+    """Check many invocation image directories on a thread pool.
+
+    Returns every error for each directory, keyed by path in the order given.
+    A path given more than once is checked once. A valid directory has an
+    empty list."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    unique = list(dict.fromkeys(paths))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(pool.map(_errors, unique))
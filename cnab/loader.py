@@ -0,0 +1,83 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional
+
+from cnab.types import Bundle
+from cnab.decoder import decode_bundle
+from cnab.codec import load_path
+
+
+@dataclass
+class LoadResult:
+    path: str
+    bundle: Optional[Bundle] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def load_file(path: str) -> LoadResult:
+    try:
+        return LoadResult(path, bundle=decode_bundle(load_path(path)))
+    except Exception as e:
+        # errors are returned as text as not every exception survives
+        # being pickled back from a worker process
+        return LoadResult(path, error=f"{type(e).__name__}: {e}")
+
+
+def _load_batch(paths: List[str]) -> List[LoadResult]:
+    return [load_file(path) for path in paths]
+
+
+def _batches(paths: Iterable[str], size: int) -> Iterator[List[str]]:
+    batch: List[str] = []
+    for path in paths:
+        batch.append(path)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def find_bundles(root: str, filename: str = "bundle.json") -> Iterator[str]:
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        if filename in filenames:
+            yield os.path.join(dirpath, filename)
+
+
+def load_many(
+    paths: Iterable[str], workers: Optional[int] = None, batch_size: int = 32
+) -> Iterator[LoadResult]:
+    """Parse bundle files on a process pool, yielding results as they finish.
+
+    Results are not returned in input order. A file that fails to load is
+    reported through `LoadResult.error` rather than stopping the run. Passing
+    `workers=1` parses in the current process."""
+    if workers == 1:
+        for path in paths:
+            yield load_file(path)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    batches = _batches(paths, batch_size)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # only keep a couple of batches per worker in flight so that results
+        # stream back without the whole path list being queued up front
+        pending = set()
+        for batch in batches:
+            pending.add(executor.submit(_load_batch, batch))
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        for future in as_completed(pending):
+            yield from future.result()
+
+
+def load_directory(root: str, **kwargs) -> Iterator[LoadResult]:
+    return load_many(find_bundles(root), **kwargs)
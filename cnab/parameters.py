@@ -0,0 +1,130 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from cnab.types import Parameter
+
+
+class InvalidParametersError(Exception):
+    pass
+
+
+# Python types accepted for each parameter type in bundle.json
+TYPES: Dict[str, Tuple[type, ...]] = {
+    "int": (int,),
+    "integer": (int,),
+    "string": (str,),
+    "bool": (bool,),
+    "boolean": (bool,),
+}
+
+
+class CompiledParameter:
+    __slots__ = (
+        "name",
+        "required",
+        "types",
+        "allowed",
+        "min_value",
+        "max_value",
+        "min_length",
+        "max_length",
+        "env",
+        "default",
+    )
+
+    def __init__(self, name: str, parameter: Parameter):
+        self.name = name
+        self.required = bool(parameter.required)
+        self.types = TYPES.get(parameter.type)
+        self.allowed: Any = None
+        if parameter.allowed_values:
+            try:
+                self.allowed = frozenset(parameter.allowed_values)
+            except TypeError:
+                self.allowed = list(parameter.allowed_values)
+        self.min_value = parameter.min_value
+        self.max_value = parameter.max_value
+        self.min_length = parameter.min_length
+        self.max_length = parameter.max_length
+        destination = parameter.destination
+        self.env = destination.env if destination else None
+        self.default = parameter.default_value
+
+    def errors(self, value: Any) -> List[str]:
+        errors = []
+        name = self.name
+        types = self.types
+        if types is not None:
+            # bool is a subclass of int, but is not a valid int parameter
+            if not isinstance(value, types) or (
+                isinstance(value, bool) and bool not in types
+            ):
+                errors.append(f"Parameter {name} must be of type {types[0].__name__}")
+                return errors
+        if self.allowed is not None:
+            try:
+                allowed = value in self.allowed
+            except TypeError:
+                allowed = False
+            if not allowed:
+                errors.append(f"Parameter {name} must be one of the allowed values")
+        if isinstance(value, int) and not isinstance(value, bool):
+            if self.max_value is not None and value > self.max_value:
+                errors.append(f"Parameter {name} must be at most {self.max_value}")
+            if self.min_value is not None and value < self.min_value:
+                errors.append(f"Parameter {name} must be at least {self.min_value}")
+        elif isinstance(value, str):
+            if self.max_length is not None and len(value) > self.max_length:
+                errors.append(
+                    f"Parameter {name} must be at most {self.max_length} characters"
+                )
+            if self.min_length is not None and len(value) < self.min_length:
+                errors.append(
+                    f"Parameter {name} must be at least {self.min_length} characters"
+                )
+        return errors
+
+
+class ParameterValidator:
+    """A bundle's parameter definitions compiled for repeated validation."""
+
+    source: Optional[Dict[str, Parameter]]
+    parameters: Dict[str, CompiledParameter]
+    required: List[str]
+    env: List[CompiledParameter]
+
+    def __init__(self, parameters: Optional[Dict[str, Parameter]]):
+        self.source = parameters
+        self.parameters = {
+            name: CompiledParameter(name, parameter)
+            for name, parameter in (parameters or {}).items()
+        }
+        self.required = [p.name for p in self.parameters.values() if p.required]
+        self.env = [p for p in self.parameters.values() if p.env]
+
+    def validate(self, values: dict) -> List[str]:
+        errors = []
+        compiled = self.parameters
+        for key, value in values.items():
+            parameter = compiled.get(key)
+            if parameter is None:
+                errors.append(f"Invalid parameter provided: {key}")
+            else:
+                errors.extend(parameter.errors(value))
+        for name in self.required:
+            if name not in values:
+                errors.append(f"Missing required parameter: {name}")
+        return errors
+
+    def validate_many(self, batch: Iterable[dict]) -> List[List[str]]:
+        validate = self.validate
+        return [validate(values) for values in batch]
+
+    def check(self, values: dict) -> None:
+        errors = self.validate(values)
+        if errors:
+            raise InvalidParametersError(errors)
+
+    def environment(self, values: dict) -> dict:
+        return {
+            p.env: values[p.name] if p.name in values else p.default for p in self.env
+        }
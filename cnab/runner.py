@@ -0,0 +1,31 @@
+import asyncio
+from typing import Any, Iterable, List, Tuple, Union
+
+from cnab.cnab import CNAB
+
+
+async def run_many(
+    jobs: Iterable[Union[Tuple[CNAB, str], Tuple[CNAB, str, dict]]],
+    concurrency: int = 10,
+    return_exceptions: bool = True,
+    **kwargs,
+) -> List[Any]:
+    """Run many actions on one event loop, with at most `concurrency` at once.
+
+    Each job is a tuple of a CNAB and an action, optionally followed by a
+    dictionary of arguments for that job which are passed to `CNAB.arun` along
+    with `kwargs`. Results are returned in the order of the jobs. By default
+    a failed job returns its exception rather than cancelling the others."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(job: tuple) -> Any:
+        app, action = job[0], job[1]
+        options = dict(kwargs)
+        if len(job) > 2:
+            options.update(job[2])
+        async with semaphore:
+            return await app.arun(action, **options)
+
+    return await asyncio.gather(
+        *[run_one(job) for job in jobs], return_exceptions=return_exceptions
+    )
@@ -0,0 +1,159 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from cnab.decoder import (
+    ClassDecoder,
+    DictOf,
+    Dispatch,
+    InvalidBundleError,
+    ListOf,
+    NoneType,
+    decode_bundle,
+)
+
+# A check appends an error for each problem with a value to the list it is
+# given. Checks for a field are also given its key and the path of its parent,
+# so that the path of a scalar is only built when it is wrong.
+Check = Callable[[Any, Tuple, List[InvalidBundleError]], None]
+FieldCheck = Callable[[Any, Any, Tuple, List[InvalidBundleError]], None]
+
+
+class _Stop(Exception):
+    pass
+
+
+class _Errors(list):
+    # a list of errors which stops the walk once it has enough of them
+    def __init__(self, limit: int):
+        super().__init__()
+        self.limit = limit
+
+    def append(self, error: InvalidBundleError) -> None:
+        super().append(error)
+        if len(self) >= self.limit:
+            raise _Stop
+
+
+def _expected(dispatch: Dispatch) -> str:
+    return " or ".join(
+        "null" if kind is NoneType else kind.__name__ for kind in dispatch
+    )
+
+
+def _accepts(dispatch: Dispatch, x: Any) -> Optional[type]:
+    # mirrors the decoder, accepting subclasses of the expected types but never
+    # a bool where an int is expected
+    if not isinstance(x, bool):
+        for kind in dispatch:
+            if kind is not NoneType and isinstance(x, kind):
+                return kind
+    return None
+
+
+def compile_dispatch(dispatch: Dispatch) -> FieldCheck:
+    """Compile a check for a field decoded by `dispatch`."""
+
+    expected = _expected(dispatch)
+    nested: Dict[type, Check] = {}
+    for kind, converter in dispatch.items():
+        compiled = compile_converter(converter)
+        if compiled is not None:
+            nested[kind] = compiled
+
+    def check(x: Any, key: Any, path: Tuple, errors: List[InvalidBundleError]) -> None:
+        kind: Optional[type] = type(x)
+        if kind not in dispatch:
+            kind = _accepts(dispatch, x)
+        if kind is None:
+            message = f"expected {expected}, got {type(x).__name__}"
+            errors.append(InvalidBundleError(message, path + (key,)))
+        elif kind in nested:
+            nested[kind](x, path + (key,), errors)
+
+    return check
+
+
+def compile_converter(converter: Any) -> Optional[Check]:
+    if isinstance(converter, ClassDecoder):
+        return compile_class(converter)
+    if isinstance(converter, ListOf):
+        return _sequence(converter.dispatch, lambda x: enumerate(x))
+    if isinstance(converter, DictOf):
+        return _sequence(converter.dispatch, lambda x: x.items())
+    # anything else, such as list, accepts any contents
+    return None
+
+
+def _sequence(dispatch: Dispatch, items: Callable[[Any], Iterable]) -> Check:
+    item = compile_dispatch(dispatch)
+
+    def check(x: Any, path: Tuple, errors: List[InvalidBundleError]) -> None:
+        for key, value in items(x):
+            item(value, key, path, errors)
+
+    return check
+
+
+def compile_class(decoder: ClassDecoder) -> Check:
+    """Compile a check for an object decoded by `decoder`."""
+
+    # fields holding plain values only need their type checked, which is done
+    # inline as most fields of most bundles are fine
+    fields = [
+        (key, dispatch, not any(dispatch.values()), compile_dispatch(dispatch))
+        for key, dispatch in decoder.table
+    ]
+
+    def check(x: Any, path: Tuple, errors: List[InvalidBundleError]) -> None:
+        if not isinstance(x, dict):
+            message = f"expected dict, got {type(x).__name__}"
+            errors.append(InvalidBundleError(message, path))
+            return
+        get = x.get
+        for key, dispatch, scalar, field in fields:
+            value = get(key)
+            if scalar and type(value) in dispatch:
+                continue
+            field(value, key, path, errors)
+
+    return check
+
+
+class BundleValidator:
+    """Validates raw bundle dictionaries without decoding them.
+
+    The checks are compiled once from the decoder's tables, so a dictionary is
+    valid exactly when `decode_bundle` would accept it. Every error is reported,
+    with its location available as a JSON pointer."""
+
+    def __init__(self, decoder: ClassDecoder = decode_bundle):
+        self._check = compile_class(decoder)
+
+    def errors(self, obj: Any, limit: Optional[int] = None) -> List[InvalidBundleError]:
+        errors: List[InvalidBundleError] = [] if limit is None else _Errors(limit)
+        try:
+            self._check(obj, (), errors)
+        except _Stop:
+            pass
+        return list(errors)
+
+    def valid(self, obj: Any) -> bool:
+        # stops at the first error, for when the details aren't needed
+        return not self.errors(obj, limit=1)
+
+    def validate_many(
+        self, objs: Iterable[Any], limit: Optional[int] = None
+    ) -> List[List[InvalidBundleError]]:
+        return [self.errors(obj, limit) for obj in objs]
+
+
+_validator: Optional[BundleValidator] = None
+
+
+def validate_bundles(
+    objs: Iterable[Any], limit: Optional[int] = None
+) -> List[List[InvalidBundleError]]:
+    """Return the errors for each of many bundle dictionaries, in order."""
+    global _validator
+    if _validator is None:
+        _validator = BundleValidator()
+    return _validator.validate_many(objs, limit)
@@ -0,0 +1,79 @@
+import io
+import json
+import os
+import posixpath
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from cnab.types import Bundle
+
+IMAGE_MAP_PATH = "/cnab/app/image-map.json"
+
+# Per-run files are staged in one of two ways: written to a single temporary
+# directory and bind mounted, or packed into one tar archive and copied into
+# the created container before it is started.
+DIRECTORY = "directory"
+ARCHIVE = "archive"
+
+
+def credential_files(bundle: Bundle, credentials: dict) -> Dict[str, bytes]:
+    files: Dict[str, bytes] = {}
+    if bundle.credentials:
+        for name in bundle.credentials:
+            credential = bundle.credentials[name]
+            if credential.path:
+                files[credential.path] = _to_bytes(credentials[name])
+    return files
+
+
+def image_map(bundle: Bundle) -> bytes:
+    # Image maps for runtime usage
+    images = bundle.images or {}
+    return json.dumps({k: v.to_dict() for k, v in images.items()}).encode()
+
+
+def _to_bytes(value) -> bytes:
+    return value if isinstance(value, bytes) else str(value).encode()
+
+
+def build_archive(files: Dict[str, bytes]) -> bytes:
+    """Pack files into a tar archive to extract at the root of a container.
+
+    Missing parent directories are created by Docker when it is extracted."""
+    import tarfile
+
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        for path, content in sorted(files.items()):
+            info = tarfile.TarInfo(posixpath.normpath(path).lstrip("/"))
+            info.size = len(content)
+            info.mode = 0o644 if path == IMAGE_MAP_PATH else 0o600
+            tar.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
+
+@contextmanager
+def staging_directory(
+    files: Dict[str, bytes], root: Optional[str] = None
+) -> Iterator[List]:
+    """Write files to one temporary directory and yield bind mounts for them.
+
+    Pointing `root` at a tmpfs, such as /dev/shm, keeps the files off disk. The
+    directory is removed when the context exits."""
+    import tempfile
+
+    import docker  # type: ignore
+
+    with tempfile.TemporaryDirectory(prefix="cnab-", dir=root) as directory:
+        mounts = []
+        for i, (target, content) in enumerate(sorted(files.items())):
+            source = os.path.join(directory, str(i))
+            fd = os.open(source, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            mounts.append(
+                docker.types.Mount(
+                    target=target, source=source, read_only=True, type="bind"
+                )
+            )
+        yield mounts
@@ -0,0 +1,108 @@
+import io
+import os
+import tarfile
+
+import pytest  # type: ignore
+
+from cnab import CNABDirectory
+from cnab.build import BuildContext, BuildContextChangedError, Manifest
+
+
+@pytest.fixture
+def context_dir(tmpdir):
+    cnab = tmpdir.mkdir("cnab")
+    app = cnab.mkdir("app")
+    app.join("run").write("#!/bin/sh\necho hello\n")
+    os.chmod(str(app.join("run")), 0o700)
+    app.mkdir("charts").join("values.yaml").write("image: alpine\n" * 100)
+    cnab.mkdir("build").join("Dockerfile").write("FROM alpine\n")
+    cnab.join("README.md").write("# readme\n")
+    return tmpdir
+
+
+def members(context):
+    data = b"".join(context.chunks())
+    with tarfile.open(fileobj=io.BytesIO(data)) as tar:
+        return {m.name: (m, tar.extractfile(m)) for m in tar.getmembers()}
+
+
+class TestBuildContext(object):
+    def test_tar_contents(self, context_dir):
+        entries = members(BuildContext(str(context_dir)))
+        assert list(entries) == [
+            "cnab",
+            "cnab/README.md",
+            "cnab/app",
+            "cnab/app/charts",
+            "cnab/app/charts/values.yaml",
+            "cnab/app/run",
+            "cnab/build",
+            "cnab/build/Dockerfile",
+        ]
+        run, content = entries["cnab/app/run"]
+        assert content.read() == b"#!/bin/sh\necho hello\n"
+        assert run.mode == 0o755
+        assert run.mtime == 0 and run.uid == 0 and run.uname == ""
+        assert entries["cnab/README.md"][0].mode == 0o644
+
+    def test_deterministic(self, context_dir):
+        first = b"".join(BuildContext(str(context_dir)).chunks())
+        os.utime(str(context_dir.join("cnab", "README.md")), (0, 0))
+        second = b"".join(BuildContext(str(context_dir)).chunks())
+        assert first == second
+        assert len(first) % tarfile.RECORDSIZE == 0
+
+    def test_streams_in_chunks(self, context_dir):
+        chunks = list(BuildContext(str(context_dir)).chunks(chunk_size=100))
+        assert max(len(c) for c in chunks) <= tarfile.RECORDSIZE
+
+    def test_write(self, context_dir):
+        context = BuildContext(str(context_dir))
+        buffer = io.BytesIO()
+        assert context.write(buffer) == len(buffer.getvalue())
+        assert buffer.getvalue() == b"".join(context.chunks())
+
+    def test_only_changed_files_hashed(self, context_dir):
+        first = BuildContext(str(context_dir))
+        assert len(first.hashed) == 4
+        assert first.changed
+
+        second = BuildContext(str(context_dir), first.manifest)
+        assert second.hashed == []
+        assert not second.changed
+        assert second.changed_directories() == []
+
+        context_dir.join("cnab", "app", "charts", "values.yaml").write(
+            "image: busybox\n"
+        )
+        third = BuildContext(str(context_dir), second.manifest)
+        assert third.hashed == ["cnab/app/charts/values.yaml"]
+        assert third.changed
+        assert third.changed_directories() == ["cnab", "cnab/app", "cnab/app/charts"]
+
+    def test_symlinks(self, context_dir):
+        os.symlink("run", str(context_dir.join("cnab", "app", "start")))
+        entries = members(BuildContext(str(context_dir)))
+        link = entries["cnab/app/start"][0]
+        assert link.issym() and link.linkname == "run"
+
+    def test_file_changed_while_packing(self, context_dir):
+        context = BuildContext(str(context_dir))
+        context_dir.join("cnab", "README.md").write("# a longer readme\n")
+        with pytest.raises(BuildContextChangedError):
+            b"".join(context.chunks())
+
+    def test_from_directory(self):
+        context = CNABDirectory("fixtures/invocationimage").build_context()
+        assert "cnab/app/run" in context.manifest.files
+
+
+class TestManifest(object):
+    def test_round_trip(self, context_dir, tmpdir):
+        manifest = BuildContext(str(context_dir)).manifest
+        path = str(tmpdir.join("manifest.json"))
+        manifest.save(path)
+        loaded = Manifest.load(path)
+        assert loaded == manifest
+        assert loaded.digest.startswith("sha256:")
+        assert not BuildContext(str(context_dir), loaded).hashed
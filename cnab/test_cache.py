@@ -0,0 +1,140 @@
+import os
+import pickle
+import shutil
+import threading
+
+import pytest  # type: ignore
+
+from cnab import CNAB, Bundle, BundleCache
+
+
+@pytest.fixture
+def path(tmp_path):
+    target = tmp_path / "bundle.json"
+    shutil.copy("fixtures/helloworld/bundle.json", target)
+    return str(target)
+
+
+class TestMemoryCache(object):
+    @pytest.fixture
+    def cache(self):
+        return BundleCache(maxsize=2)
+
+    def test_second_load_is_a_hit(self, cache, path):
+        first = cache.load(path)
+        assert isinstance(first, Bundle)
+        assert cache.load(path) is first
+        assert cache.hits == 1
+        assert cache.misses == 1
+
+    def test_changed_file_is_parsed_again(self, cache, path):
+        first = cache.load(path)
+        with open(path) as f:
+            content = f.read().replace("0.1.1", "0.1.2")
+        with open(path, "w") as f:
+            f.write(content)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+        second = cache.load(path)
+        assert second is not first
+        assert second.version == "0.1.2"
+
+    def test_least_recently_used_is_evicted(self, cache, tmp_path, path):
+        others = []
+        for name in ["a", "b"]:
+            other = tmp_path / f"{name}.json"
+            shutil.copy(path, other)
+            others.append(str(other))
+        cache.load(path)
+        cache.load(others[0])
+        cache.load(path)
+        cache.load(others[1])
+        assert len(cache) == 2
+        cache.load(path)
+        assert cache.misses == 3
+
+
+def test_hash_contents_detects_same_size_edit(path):
+    cache = BundleCache(hash_contents=True)
+    cache.load(path)
+    stat = os.stat(path)
+    with open(path) as f:
+        content = f.read().replace("0.1.1", "0.1.2")
+    with open(path, "w") as f:
+        f.write(content)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert cache.load(path).version == "0.1.2"
+
+
+def test_disk_tier_survives_new_cache(tmp_path, path):
+    directory = str(tmp_path / "cache")
+    BundleCache(directory=directory).load(path)
+    cache = BundleCache(directory=directory)
+    bundle = cache.load(path)
+    assert bundle.name == "helloworld"
+    assert cache.disk_hits == 1
+    assert cache.misses == 0
+
+
+def test_disk_tier_from_another_format_is_a_miss(tmp_path, path, monkeypatch):
+    import cnab.cache
+
+    directory = str(tmp_path / "cache")
+    with monkeypatch.context() as m:
+        m.setattr(cnab.cache, "FORMAT", "older")
+        BundleCache(directory=directory).load(path)
+    cache = BundleCache(directory=directory)
+    assert cache.load(path).name == "helloworld"
+    assert cache.disk_hits == 0
+    assert cache.misses == 1
+    assert any(cnab.cache.FORMAT in name for name in os.listdir(directory))
+
+
+def test_disk_tier_only_hashes_on_a_miss(tmp_path, path, monkeypatch):
+    import cnab.cache
+
+    hashed = []
+    sha256 = cnab.cache.hashlib.sha256
+
+    def counting(data):
+        hashed.append(data)
+        return sha256(data)
+
+    monkeypatch.setattr(cnab.cache.hashlib, "sha256", counting)
+    cache = BundleCache(directory=str(tmp_path / "cache"))
+    for _ in range(3):
+        cache.load(path)
+    assert len(hashed) == 1
+    assert cache.hits == 2
+
+
+def test_unpicklable_bundle_leaves_no_temporary_file(tmp_path, path, monkeypatch):
+    import cnab.cache
+
+    def fail(*args, **kwargs):
+        raise pickle.PicklingError("cannot pickle")
+
+    monkeypatch.setattr(cnab.cache.pickle, "dump", fail)
+    directory = tmp_path / "cache"
+    assert BundleCache(directory=str(directory)).load(path).name == "helloworld"
+    assert os.listdir(directory) == []
+
+
+def test_counters_are_consistent_between_threads(path):
+    cache = BundleCache()
+
+    def load():
+        for _ in range(200):
+            cache.load(path)
+
+    threads = [threading.Thread(target=load) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.hits + cache.misses == 1600
+
+
+def test_cnab_uses_cache(path):
+    cache = BundleCache()
+    assert CNAB(path, cache=cache).bundle is CNAB(path, cache=cache).bundle
@@ -0,0 +1,148 @@
+import pytest  # type: ignore
+
+from cnab import Bundle, BundleCatalog, Image, InvocationImage, Maintainer
+from cnab.catalog import repository
+from cnab.decoder import decode_bundle
+
+
+def bundle(name, image, keywords=(), parameters=None, version="0.1.0"):
+    return decode_bundle(
+        {
+            "name": name,
+            "version": version,
+            "invocationImages": [
+                {"imageType": "docker", "image": image, "digest": f"sha256:{name}"}
+            ],
+            "keywords": list(keywords),
+            "maintainers": [{"name": f"{name} maintainer", "email": f"{name}@x"}],
+            "parameters": parameters or {},
+            "images": {
+                "db": {"image": "postgres:11", "imageType": "docker"},
+            },
+        }
+    )
+
+
+@pytest.fixture
+def catalog():
+    return BundleCatalog(
+        [
+            bundle("one", "cnab/one:latest", ["helm", "web"]),
+            bundle(
+                "two",
+                "cnab/two:1.0",
+                ["helm"],
+                {"port": {"type": "int", "destination": {"env": "PORT"}}},
+            ),
+            bundle("three", "registry:5000/cnab/one:2.0", ["terraform"]),
+        ]
+    )
+
+
+class TestRepository(object):
+    @pytest.mark.parametrize(
+        "image,expected",
+        [
+            ("alpine", "alpine"),
+            ("alpine:3.9", "alpine"),
+            ("registry:5000/cnab/one:2.0", "registry:5000/cnab/one"),
+            ("registry:5000/cnab/one", "registry:5000/cnab/one"),
+            ("alpine@sha256:abc", "alpine"),
+        ],
+    )
+    def test_repository(self, image, expected):
+        assert repository(image) == expected
+
+
+class TestBundleCatalog(object):
+    def test_find_by_keyword(self, catalog):
+        assert catalog.keys(keyword="helm") == ["one:0.1.0", "two:0.1.0"]
+
+    def test_find_by_image(self, catalog):
+        assert [b.name for b in catalog.find(image="postgres:11")] == [
+            "one",
+            "three",
+            "two",
+        ]
+        assert catalog.keys(image="cnab/two:1.0") == ["two:0.1.0"]
+        assert catalog.keys(repository="postgres") == catalog.keys()
+
+    def test_find_by_digest_maintainer_and_parameter(self, catalog):
+        assert catalog.keys(digest="sha256:three") == ["three:0.1.0"]
+        assert catalog.keys(maintainer="one@x") == ["one:0.1.0"]
+        assert catalog.keys(maintainer="one maintainer") == ["one:0.1.0"]
+        assert catalog.keys(parameter="port") == ["two:0.1.0"]
+
+    def test_criteria_are_combined(self, catalog):
+        assert catalog.keys(keyword="helm", parameter="port") == ["two:0.1.0"]
+        assert catalog.keys(keyword="terraform", parameter="port") == []
+        assert catalog.keys(keyword="missing") == []
+
+    def test_unknown_field(self, catalog):
+        with pytest.raises(ValueError):
+            catalog.keys(colour="blue")
+
+    def test_values(self, catalog):
+        assert catalog.values("keyword") == ["helm", "terraform", "web"]
+
+    def test_maintainers_without_a_name_or_email(self):
+        one = bundle("one", "cnab/one:latest").to_dict()
+        one["maintainers"] = [{"email": "a@b"}, {"name": "x"}]
+        catalog = BundleCatalog([decode_bundle(one)])
+        assert catalog.values("maintainer") == ["a@b", "x"]
+        assert catalog.keys(maintainer="a@b") == ["one:0.1.0"]
+
+    def test_remove(self, catalog):
+        removed = catalog.remove("one:0.1.0")
+        assert removed.name == "one"
+        assert "one:0.1.0" not in catalog
+        assert catalog.values("keyword") == ["helm", "terraform"]
+        with pytest.raises(KeyError):
+            catalog.remove("one:0.1.0")
+
+    def test_add_replaces(self, catalog):
+        catalog.add(bundle("one", "cnab/one:latest", ["ansible"]))
+        assert len(catalog) == 3
+        assert catalog.keys(keyword="web") == []
+        assert catalog.keys(keyword="ansible") == ["one:0.1.0"]
+
+    def test_add_with_key(self, catalog):
+        key = catalog.add(bundle("one", "cnab/one:latest"), key="path/bundle.json")
+        assert key == "path/bundle.json"
+        assert catalog.get(key).name == "one"
+
+    def test_changes_are_indexed(self, catalog):
+        one = catalog.get("one:0.1.0")
+        one.keywords.append("ansible")
+        assert catalog.keys(keyword="ansible") == ["one:0.1.0"]
+        one.invocation_images[0].image = "cnab/uno:latest"
+        assert catalog.keys(repository="cnab/one") == []
+        assert catalog.keys(repository="cnab/uno") == ["one:0.1.0"]
+        one.maintainers = [Maintainer(name="someone")]
+        assert catalog.keys(maintainer="one@x") == []
+        assert catalog.keys(maintainer="someone") == ["one:0.1.0"]
+        one.images["cache"] = Image(image="redis:5")
+        assert catalog.keys(image="redis:5") == ["one:0.1.0"]
+
+    def test_changes_after_removal_ignored(self, catalog):
+        one = catalog.remove("one:0.1.0")
+        one.keywords.append("ansible")
+        assert catalog.keys(keyword="ansible") == []
+
+    def test_bundle_objects(self):
+        catalog = BundleCatalog(
+            [
+                Bundle(
+                    name="sample",
+                    version="1.0",
+                    invocation_images=[InvocationImage(image="cnab/sample:1.0")],
+                )
+            ]
+        )
+        assert catalog.keys(repository="cnab/sample") == ["sample:1.0"]
+
+    def test_parameters_added_and_removed(self, catalog):
+        two = catalog.get("two:0.1.0")
+        two.parameters["host"] = two.parameters.pop("port")
+        assert catalog.keys(parameter="port") == []
+        assert catalog.keys(parameter="host") == ["two:0.1.0"]
@@ -0,0 +1,150 @@
+import asyncio
+import threading
+
+import pytest  # type: ignore
+
+from cnab import CNAB, ClaimStore
+from cnab.claims import CANCELLED, FAILURE, SUCCESS, Claim
+from cnab.testing import FakeDockerClient
+
+
+def claim(installation, action="install", status=SUCCESS, **kwargs):
+    return Claim(installation, "sha256:abc", action, status, **kwargs)
+
+
+@pytest.fixture
+def store():
+    with ClaimStore() as store:
+        yield store
+
+
+class TestClaimStore(object):
+    def test_record_and_get(self, store):
+        recorded = store.record(claim("one", parameters={"port": 80}))
+        assert recorded.id == 1
+        assert store.get(recorded.revision) == recorded
+        assert store.get("missing") is None
+        assert len(store) == 1
+
+    def test_latest(self, store):
+        store.record(claim("one"))
+        upgrade = store.record(claim("one", action="upgrade"))
+        store.record(claim("two"))
+        assert store.latest("one") == upgrade
+        assert store.latest("missing") is None
+
+    def test_history_is_paginated(self, store):
+        for i in range(25):
+            store.record(claim("one", parameters={"i": i}))
+            store.record(claim("two"))
+        first = store.history("one", limit=10)
+        second = store.history("one", limit=10, before=first[-1].id)
+        assert [c.parameters["i"] for c in first + second] == list(range(24, 4, -1))
+
+    def test_list_is_paginated(self, store):
+        for i in range(250):
+            store.record(claim(f"app{i % 7}"))
+        seen = []
+        page = store.list(limit=100)
+        while page:
+            seen.extend(page)
+            page = store.list(limit=100, after=page[-1].id)
+        assert [c.id for c in seen] == list(range(1, 251))
+
+    def test_installations(self, store):
+        for name in ["c", "a", "b"]:
+            store.record(claim(name))
+        store.record(claim("b", action="uninstall"))
+        store.record(claim("c", action="uninstall", status=FAILURE))
+        installed = store.installations()
+        assert [(c.installation, c.action) for c in installed] == [
+            ("a", "install"),
+            ("c", "uninstall"),
+        ]
+        assert len(store.installations(installed=False)) == 3
+        assert [c.installation for c in store.installations(limit=1, after="a")] == [
+            "c"
+        ]
+
+    def test_persists(self, tmpdir):
+        path = str(tmpdir.join("claims.db"))
+        with ClaimStore(path) as store:
+            store.record(claim("one"))
+        with ClaimStore(path) as store:
+            assert store.latest("one").action == "install"
+
+
+class TestRecordingClaims(object):
+    @pytest.fixture
+    def app(self, store):
+        return CNAB("fixtures/helloworld/bundle.json", name="hello", claims=store)
+
+    def test_run_records_claim(self, app, store):
+        app.run("install", parameters={"port": 9090}, client=FakeDockerClient())
+        recorded = store.latest("hello")
+        assert recorded.ok
+        assert recorded.action == "install"
+        assert recorded.parameters == {"port": 9090}
+        assert recorded.bundle_digest == app.bundle.digest()
+        assert recorded.bundle_name == "helloworld"
+
+    def test_defaults_recorded(self, app, store):
+        app.run("install", client=FakeDockerClient())
+        assert store.latest("hello").parameters == {"port": 8080}
+
+    def test_failure_recorded(self, app, store):
+        docker = pytest.importorskip("docker")
+        with pytest.raises(docker.errors.ContainerError):
+            app.run("install", client=FakeDockerClient(exit_code=1))
+        recorded = store.latest("hello")
+        assert recorded.status == FAILURE
+        assert recorded.message.startswith("ContainerError")
+
+    def test_invalid_arguments_not_recorded(self, app, store):
+        with pytest.raises(AssertionError):
+            app.run("explode", client=FakeDockerClient())
+        assert len(store) == 0
+
+    def test_arun_and_stream_record_claims(self, app, store):
+        client = FakeDockerClient()
+        asyncio.run(app.arun("install", client=client, poll_interval=0))
+        list(app.stream("upgrade", client=client))
+        assert [c.action for c in store.history("hello")] == ["upgrade", "install"]
+
+    def test_closed_stream_recorded_as_cancelled(self, app, store):
+        stream = app.stream("install", client=FakeDockerClient(output=b"x" * 2500))
+        next(stream)
+        stream.close()
+        recorded = store.latest("hello")
+        assert recorded.status == CANCELLED
+        assert "GeneratorExit" not in recorded.message
+
+    def test_cancelled_arun_recorded_as_cancelled(self, app, store):
+        client = FakeDockerClient(runs_for=1000)
+
+        async def cancel():
+            task = asyncio.ensure_future(
+                app.arun("install", client=client, poll_interval=0.001)
+            )
+            while not client.created or not client.created[0].reloads:
+                await asyncio.sleep(0.001)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(cancel())
+        assert store.latest("hello").status == CANCELLED
+        assert client.created[0].removed
+
+    def test_arun_records_claim_from_executor(self, app, store, monkeypatch):
+        threads = []
+        record = store.record
+
+        def recording(claim):
+            threads.append(threading.current_thread())
+            return record(claim)
+
+        monkeypatch.setattr(store, "record", recording)
+        asyncio.run(app.arun("install", client=FakeDockerClient(), poll_interval=0))
+        assert store.latest("hello").ok
+        assert threads and threads[0] is not threading.main_thread()
@@ -0,0 +1,230 @@
+import io
+import json
+import os
+import socket
+import stat
+import threading
+
+import pytest  # type: ignore
+
+from cnab import BundleCache
+from cnab.cli import Context, DaemonError, _forwarded, execute, main, request, serve
+from cnab.client import DockerClientPool
+from cnab.testing import FakeDockerClient
+
+HELLOWORLD = "fixtures/helloworld/bundle.json"
+HELLOHELM = "fixtures/hellohelm/bundle.json"
+
+
+def call(argv, context=None):
+    stdout, stderr = io.StringIO(), io.StringIO()
+    status = execute(argv, context or Context(), stdout, stderr)
+    return status, stdout.getvalue(), stderr.getvalue()
+
+
+class TestCommands(object):
+    def test_validate_bundle(self):
+        status, out, _ = call(["validate", HELLOWORLD])
+        assert status == 0
+        assert out == f"{HELLOWORLD}: valid\n"
+
+    def test_validate_invalid_bundle(self, tmpdir):
+        path = tmpdir.join("bundle.json")
+        path.write(json.dumps({"name": "broken", "version": 1}))
+        status, out, _ = call(["validate", str(path)])
+        assert status == 1
+        assert "/version: expected str, got int" in out
+
+    def test_validate_directories(self):
+        status, out, _ = call(
+            ["validate", "fixtures/invocationimage", "fixtures/invalidinvocationimage"]
+        )
+        assert status == 1
+        assert "fixtures/invocationimage: valid" in out
+        assert "fixtures/invalidinvocationimage: Missing a run entrypoint" in out
+
+    def test_inspect(self):
+        status, out, _ = call(["inspect", HELLOHELM])
+        summary = json.loads(out)
+        assert status == 0
+        assert summary["name"] == "hellohelm"
+        assert summary["parameters"] == ["port"]
+        assert summary["credentials"] == ["kubeconfig"]
+        assert "status" in summary["actions"]
+
+    def test_digest(self):
+        status, out, _ = call(["digest", HELLOWORLD, HELLOHELM])
+        lines = out.splitlines()
+        assert status == 0
+        assert len(lines) == 2
+        assert lines[0].startswith("sha256:")
+        assert lines[0].endswith(HELLOWORLD)
+
+    def test_missing_file(self):
+        status, _, err = call(["digest", "missing.json"])
+        assert status == 1
+        assert err.startswith("cnab: ")
+
+    def test_usage_error(self):
+        status, _, err = call(["unknown"])
+        assert status == 2
+        assert "invalid choice" in err
+
+    def test_help(self):
+        status, out, err = call(["validate", "--help"])
+        assert status == 0
+        assert out.startswith("usage: cnab validate")
+        assert err == ""
+
+    def test_run(self):
+        client = FakeDockerClient(output=b"hello")
+        status, out, _ = call(
+            ["run", HELLOHELM, "install", "-p", "port=8080", "-c", "kubeconfig=x"],
+            Context(client=client),
+        )
+        assert status == 0
+        assert out == "hello"
+        env = client.created[0].environment
+        assert env["PORT"] == 8080
+
+    def test_run_failure(self):
+        client = FakeDockerClient(exit_code=3)
+        status, _, _ = call(["run", HELLOWORLD, "install"], Context(client=client))
+        assert status == 3
+
+    def test_run_waiting_for_client_times_out(self):
+        pool = DockerClientPool(size=1, factory=FakeDockerClient, timeout=0.01)
+        pool.acquire()
+        status, _, err = call(["run", HELLOWORLD, "install"], Context(client=pool))
+        assert status == 1
+        assert "Timed out waiting for a Docker client" in err
+
+    def test_socket_option_is_not_forwarded(self):
+        assert _forwarded(["--socket", "s", "digest", "x"]) == ["digest", "x"]
+        assert _forwarded(["--socket=s", "digest", "x"]) == ["digest", "x"]
+        assert _forwarded(["digest", "--socket"]) == ["digest", "--socket"]
+
+
+class TestDaemon(object):
+    @pytest.fixture
+    def cache(self):
+        return BundleCache()
+
+    @pytest.fixture
+    def path(self, tmpdir):
+        return str(tmpdir.join("cnab.sock"))
+
+    @pytest.fixture
+    def server(self, path, cache):
+        server = serve(path, Context(cache, FakeDockerClient(output=b"warm")))
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield server
+        server.shutdown()
+        server.server_close()
+
+    def test_request(self, server, path):
+        response = request(path, ["digest", HELLOWORLD], os.getcwd())
+        assert response["status"] == 0
+        assert response["stdout"].startswith("sha256:")
+
+    def test_socket_is_private(self, server, path):
+        assert os.stat(path).st_mode & 0o777 == 0o600
+
+    def test_socket_is_created_private(self, tmpdir):
+        path = str(tmpdir.join("open.sock"))
+        umask = os.umask(0)
+        try:
+            server = serve(path)
+            assert os.umask(0) == 0
+        finally:
+            os.umask(umask)
+        server.server_close()
+        assert os.stat(path).st_mode & 0o777 == 0o600
+
+    def test_stale_socket_is_replaced(self, tmpdir):
+        path = str(tmpdir.join("stale.sock"))
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.bind(path)
+        serve(path).server_close()
+        assert stat.S_ISSOCK(os.stat(path).st_mode)
+
+    def test_existing_file_is_kept(self, tmpdir):
+        path = tmpdir.join("bundle.json")
+        path.write("{}")
+        with pytest.raises(DaemonError):
+            serve(str(path))
+        assert path.read() == "{}"
+
+    def test_running_daemon_is_kept(self, server, path):
+        with pytest.raises(DaemonError):
+            serve(path)
+        assert request(path, ["digest", HELLOWORLD], os.getcwd())["status"] == 0
+
+    def test_bundles_stay_parsed(self, server, path, cache):
+        for _ in range(3):
+            request(path, ["inspect", HELLOWORLD], os.getcwd())
+        assert cache.misses == 1
+        assert cache.hits == 2
+
+    def test_relative_paths_use_client_directory(self, server, path):
+        response = request(path, ["digest", "bundle.json"], "fixtures/helloworld")
+        assert response["status"] == 0
+
+    def test_invalid_request(self, server, path):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+            conn.connect(path)
+            conn.sendall(b"not json\n")
+            response = json.loads(conn.makefile("rb").read())
+        assert response["status"] == 2
+
+    def test_help_is_answered(self, server, path, capsys):
+        response = request(path, ["validate", "--help"], os.getcwd())
+        assert response["status"] == 0
+        assert "usage: cnab validate" in response["stdout"]
+        assert capsys.readouterr().out == ""
+
+    def test_daemon_cannot_be_started_remotely(self, server, path):
+        response = request(path, ["daemon"], os.getcwd())
+        assert response["status"] == 2
+
+    def test_main_forwards_to_daemon(self, server, path, cache, capsys):
+        assert main(["--socket", path, "run", HELLOWORLD, "install"]) == 0
+        assert capsys.readouterr().out == "warm"
+        assert cache.misses == 1
+
+    def test_main_runs_locally_without_daemon(self, tmpdir, capsys):
+        path = str(tmpdir.join("missing.sock"))
+        assert main(["--socket", path, "validate", HELLOWORLD]) == 0
+        assert "valid" in capsys.readouterr().out
+
+    def test_main_runs_locally_with_stale_socket(self, tmpdir, capsys):
+        path = str(tmpdir.join("stale.sock"))
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.bind(path)
+        assert main(["--socket", path, "validate", HELLOWORLD]) == 0
+        assert "valid" in capsys.readouterr().out
+
+    @pytest.mark.parametrize("reply", [b"", b'{"status": 0, "std'])
+    def test_main_reports_invalid_response(self, tmpdir, capsys, reply):
+        path = str(tmpdir.join("broken.sock"))
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(path)
+        listener.listen(1)
+
+        def answer():
+            conn, _ = listener.accept()
+            with conn:
+                conn.makefile("rb").readline()
+                conn.sendall(reply)
+
+        thread = threading.Thread(target=answer, daemon=True)
+        thread.start()
+        try:
+            assert main(["--socket", path, "validate", HELLOWORLD]) == 1
+        finally:
+            thread.join(5)
+            listener.close()
+        captured = capsys.readouterr()
+        assert captured.out == ""
+        assert "invalid response from the daemon" in captured.err
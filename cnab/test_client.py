@@ -0,0 +1,124 @@
+import threading
+import time
+
+import pytest  # type: ignore
+
+from cnab import CNAB
+from cnab.client import DockerClientPool, PoolTimeoutError
+from cnab.testing import FakeDockerClient
+
+
+@pytest.fixture
+def created():
+    return []
+
+
+@pytest.fixture
+def factory(created):
+    def factory():
+        client = FakeDockerClient()
+        created.append(client)
+        return client
+
+    return factory
+
+
+def test_clients_are_reused(factory, created):
+    pool = DockerClientPool(size=2, factory=factory)
+    for _ in range(5):
+        with pool.client() as client:
+            assert isinstance(client, FakeDockerClient)
+    assert len(created) == 1
+
+
+def test_pool_size_is_capped(factory, created):
+    pool = DockerClientPool(size=2, factory=factory)
+    first = pool.acquire()
+    pool.acquire()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire(timeout=0.01)
+    pool.release(first)
+    assert pool.acquire(timeout=0.01) is first
+    assert len(created) == 2
+
+
+def test_default_timeout(factory, created):
+    pool = DockerClientPool(size=1, factory=factory, timeout=0.01)
+    pool.acquire()
+    with pytest.raises(PoolTimeoutError):
+        with pool.client():
+            pass
+
+
+def test_try_acquire_does_not_wait(factory, created):
+    pool = DockerClientPool(size=1, factory=factory)
+    first = pool.try_acquire()
+    assert first is created[0]
+    assert pool.try_acquire() is None
+    pool.release(first)
+    assert pool.try_acquire() is first
+
+
+def test_idle_clients_are_closed(factory, created):
+    pool = DockerClientPool(size=2, keep_alive=0.01, factory=factory)
+    with pool.client():
+        pass
+    time.sleep(0.02)
+    with pool.client() as client:
+        assert client is not created[0]
+    assert created[0].closed
+
+
+def test_close_closes_idle_clients(factory, created):
+    with DockerClientPool(factory=factory) as pool:
+        with pool.client():
+            pass
+    assert created[0].closed
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+
+
+def test_shared_between_threads(factory, created):
+    pool = DockerClientPool(size=3, factory=factory)
+    in_use = set()
+    peak = []
+    lock = threading.Lock()
+
+    def work():
+        for _ in range(20):
+            with pool.client() as client:
+                with lock:
+                    assert id(client) not in in_use
+                    in_use.add(id(client))
+                    peak.append(len(in_use))
+                time.sleep(0.0005)
+                with lock:
+                    in_use.remove(id(client))
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) <= 3
+    assert max(peak) <= 3
+
+
+class TestCNABWithPool(object):
+    @pytest.fixture
+    def pool(self, factory):
+        return DockerClientPool(size=1, factory=factory)
+
+    def test_run_uses_pool(self, pool, created):
+        pytest.importorskip("docker")
+        apps = [CNAB("fixtures/helloworld/bundle.json", client=pool) for _ in range(3)]
+        for app in apps:
+            assert app.run("install") == b"output"
+        assert len(created) == 1
+        assert len(created[0].created) == 3
+
+    def test_client_released_after_failure(self, pool):
+        app = CNAB("fixtures/helloworld/bundle.json", client=pool)
+        with pytest.raises(AssertionError):
+            app.run("explode")
+        assert pool.acquire(timeout=0.01)
@@ -1,6 +1,8 @@
 import pytest  # type: ignore
 
-from cnab import CNAB, Bundle, InvocationImage
+from cnab import CNAB, Bundle, Destination, InvocationImage, Parameter
+from cnab.parameters import InvalidParametersError
+from cnab.testing import FakeDockerClient
 
 
 class HelloWorld(object):
@@ -36,6 +38,38 @@ class TestHelloWorld(HelloWorld):
     def test_invocation_images(self, app):
         assert len(app.bundle.invocation_images) == 1
 
+    def test_environment(self, app):
+        env = app.environment("install")
+        assert env["CNAB_ACTION"] == "install"
+        assert env["CNAB_INSTALLATION_NAME"] == "helloworld"
+        assert env["PORT"] == 8080
+
+    def test_environment_with_parameter(self, app):
+        assert app.environment("install", parameters={"port": 9090})["PORT"] == 9090
+
+    def test_environment_unknown_action(self, app):
+        with pytest.raises(AssertionError):
+            app.environment("explode")
+
+    def test_parameter_changed_in_place(self, app):
+        assert app.environment("install", {}, {"port": 9000})["PORT"] == 9000
+        app.bundle.parameters["port"].max_value = 100
+        with pytest.raises(InvalidParametersError):
+            app.environment("install", {}, {"port": 9000})
+
+    def test_parameter_added_in_place(self, app):
+        app.environment("install")
+        app.bundle.parameters["name"] = Parameter(
+            type="string", destination=Destination(env="NAME")
+        )
+        assert app.environment("install", {}, {"name": "x"})["NAME"] == "x"
+
+    def test_parameter_changes_keep_digest_current(self, app):
+        digest = app.bundle.digest()
+        app.environment("install")
+        app.bundle.parameters["port"].max_value = 100
+        assert app.bundle.digest() != digest
+
 
 @pytest.mark.docker
 class TestIntegrationHelloWorld(HelloWorld):
@@ -91,6 +125,56 @@ def test_app_from_bundle():
     assert CNAB(bundle)
 
 
+def test_environment_without_parameters():
+    bundle = Bundle(
+        name="sample",
+        version="0.1.0",
+        invocation_images=[
+            InvocationImage(image_type="docker", image="garethr/helloworld:0.1.0")
+        ],
+        parameters=None,
+    )
+    assert CNAB(bundle).environment("install")["CNAB_BUNDLE_NAME"] == "sample"
+
+
 def test_app_from_invalid_input():
     with pytest.raises(TypeError):
         CNAB(1)
+
+
+class TestStream(HelloWorld):
+    def test_stream_yields_output(self, app):
+        client = FakeDockerClient(output=b"x" * 2500)
+        stream = app.stream("install", client=client)
+        assert client.created == []
+        chunks = list(stream)
+        assert [len(c) for c in chunks] == [1024, 1024, 452]
+        assert stream.exit_code == 0
+        assert client.created[0].streamed
+        assert client.created[0].removed
+
+    def test_stream_bounds_chunk_size(self, app):
+        client = FakeDockerClient(output=b"x" * 2500)
+        chunks = list(app.stream("install", client=client, chunk_size=1000))
+        assert [len(c) for c in chunks] == [1000, 24, 1000, 24, 452]
+        assert b"".join(chunks) == b"x" * 2500
+
+    def test_stream_reports_failure(self, app):
+        docker = pytest.importorskip("docker")
+        stream = app.stream("install", client=FakeDockerClient(exit_code=3))
+        with pytest.raises(docker.errors.ContainerError):
+            list(stream)
+        assert stream.exit_code == 3
+
+    def test_stream_closed_early(self, app):
+        client = FakeDockerClient(output=b"x" * 2500)
+        with app.stream("install", client=client) as stream:
+            next(stream)
+        assert client.created[0].removed
+        assert stream.exit_code is None
+
+    def test_stream_checks_arguments(self, app):
+        client = FakeDockerClient()
+        with pytest.raises(AssertionError):
+            app.stream("explode", client=client)
+        assert client.created == []
@@ -0,0 +1,156 @@
+import json
+import math
+import random
+from collections import OrderedDict
+
+import pytest  # type: ignore
+
+from cnab import Bundle
+from cnab.codec import CODEC_ENV, Codec, get_codec, set_codec
+from cnab.test_decoder import FULL_BUNDLE
+
+orjson = pytest.importorskip("orjson")
+
+from cnab.codec import OrjsonCodec  # noqa: E402
+
+CORPUS: list = [
+    None,
+    True,
+    0,
+    -1,
+    2**63,
+    2**64,
+    -(2**70),
+    "",
+    "plain",
+    '\x00\x1f\x7f  ퟿\U0001f600 "quoted" \\ /',
+    "é日本",
+    [],
+    {},
+    [[], {}, [{}]],
+    {"b": 1, "a": 2, "": 3, "A": 4, "é": 5, "￿": 6, "\U00010000": 7},
+    {"nested": {"z": [1, "two", None, False], "a": {"b": {"c": {}}}}},
+    [0.0, -0.0, 1.0, 0.1, 1e-4, 1e-5, 1e-7, 1e16, 1e22, 123456789.123],
+    [5e-324, 1.7976931348623157e308, 2.5, 1 / 3],
+    {1: "int key"},
+    OrderedDict([("b", 1), ("a", 2)]),
+    ("tuple", 1),
+    FULL_BUNDLE,
+]
+
+
+def random_value(rng, depth=0):
+    kind = rng.randrange(8 if depth < 4 else 5)
+    if kind == 0:
+        return rng.choice([None, True, False])
+    if kind == 1:
+        return rng.choice([rng.randint(-1000, 1000), rng.getrandbits(70)])
+    if kind == 2:
+        return rng.choice(
+            [rng.random(), rng.uniform(-1e20, 1e20), 10 ** -rng.randrange(12)]
+        )
+    if kind in (3, 4):
+        points = [
+            rng.choice([rng.randrange(128), rng.randrange(0xD800)]) for _ in range(8)
+        ]
+        return "".join(chr(point) for point in points[: rng.randrange(8)])
+    if kind == 5:
+        return [random_value(rng, depth + 1) for _ in range(rng.randrange(4))]
+    # some keys aren't strings, which the standard library coerces
+    keys = [random_value(rng, 4) if kind == 6 else str(i) for i in range(4)]
+    return {key: random_value(rng, depth + 1) for key in keys[: rng.randrange(4)]}
+
+
+def corpus():
+    values = list(CORPUS)
+    for name in ["helloworld", "hellohelm"]:
+        with open(f"fixtures/{name}/bundle.json") as f:
+            values.append(json.load(f))
+    rng = random.Random(42)
+    values.extend(random_value(rng) for _ in range(500))
+    return values
+
+
+@pytest.fixture
+def stdlib():
+    return Codec()
+
+
+@pytest.fixture
+def fast():
+    return OrjsonCodec()
+
+
+def encodable(value):
+    try:
+        return Codec().canonical(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class TestOrjsonCodec(object):
+    def test_canonical_output_is_identical(self, stdlib, fast):
+        for value in corpus():
+            expected = encodable(value)
+            if expected is not None:
+                assert fast.canonical(value) == expected, value
+
+    def test_round_trip(self, stdlib, fast):
+        for value in corpus():
+            encoded = encodable(value)
+            if encoded is not None:
+                assert fast.loads(encoded) == stdlib.loads(encoded)
+                assert fast.canonical(fast.loads(encoded)) == encoded
+
+    def test_nan_is_rejected(self, stdlib, fast):
+        for value in [math.nan, [math.inf]]:
+            with pytest.raises(ValueError):
+                stdlib.canonical(value)
+            with pytest.raises(ValueError):
+                fast.canonical(value)
+
+    def test_loads_falls_back_for_standard_extensions(self, fast):
+        assert math.isnan(fast.loads("NaN"))
+        for number in [2**64, -(2**63) - 1, 2**70]:
+            assert fast.loads(str(number)) == number
+            assert fast.loads(str(number).encode()) == number
+
+    def test_loads_invalid(self, fast):
+        with pytest.raises(json.JSONDecodeError):
+            fast.loads(b"{")
+
+    def test_pretty_is_identical(self, stdlib, fast):
+        assert fast.pretty(FULL_BUNDLE) == stdlib.pretty(FULL_BUNDLE)
+
+    def test_bundle_digest_is_unchanged(self, stdlib, fast):
+        try:
+            set_codec(stdlib)
+            expected = Bundle.from_dict(FULL_BUNDLE)
+            digest = expected.digest()
+            set_codec(fast)
+            assert Bundle.from_dict(FULL_BUNDLE).digest() == digest
+        finally:
+            set_codec(None)
+
+
+class TestSelection(object):
+    @pytest.fixture(autouse=True)
+    def reset(self):
+        yield
+        set_codec(None)
+
+    def test_orjson_is_the_default(self, monkeypatch):
+        monkeypatch.delenv(CODEC_ENV, raising=False)
+        assert set_codec(None).name == "orjson"
+
+    def test_environment(self, monkeypatch):
+        monkeypatch.setenv(CODEC_ENV, "stdlib")
+        assert set_codec(None).name == "stdlib"
+
+    def test_by_name(self):
+        assert set_codec("stdlib") is get_codec()
+        assert get_codec().name == "stdlib"
+
+    def test_unknown(self):
+        with pytest.raises(ValueError):
+            set_codec("missing")
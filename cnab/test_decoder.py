@@ -0,0 +1,154 @@
+import json
+import pickle
+from collections import OrderedDict
+
+import pytest  # type: ignore
+
+from cnab import Bundle
+from cnab.decoder import decode_bundle, InvalidBundleError, LazyBundle
+
+FULL_BUNDLE = {
+    "name": "full",
+    "version": "1.0.0",
+    "schemaVersion": "v1",
+    "description": "every field set",
+    "license": "Apache-2.0",
+    "keywords": ["one", "two"],
+    "maintainers": [{"name": "test", "email": "test@example.com", "url": "x.com"}],
+    "invocationImages": [
+        {
+            "imageType": "docker",
+            "image": "cnab/full:latest",
+            "digest": "sha256:aaaa",
+            "mediaType": "application/vnd.docker.distribution.manifest.v2+json",
+            "platform": {"architecture": "amd64", "os": "linux"},
+            "size": "1024",
+        }
+    ],
+    "images": {
+        "demo": {
+            "description": "alpine",
+            "image": "technosophos/demo2alpine:0.1.0",
+            "imageType": "docker",
+            "digest": "sha256:bbbb",
+            "size": 2048,
+            "refs": [{"path": "values.yaml", "field": "image", "mediaType": "yaml"}],
+        }
+    },
+    "actions": {"status": {"modifies": False, "stateless": True}},
+    "credentials": {"kubeconfig": {"path": "/root/.kube/config", "env": "KUBE"}},
+    "parameters": {
+        "port": {
+            "defaultValue": 8080,
+            "type": "int",
+            "destination": {"env": "PORT"},
+            "metadata": {"description": "the public port"},
+            "minValue": 1,
+            "maxValue": 65535,
+            "required": False,
+        },
+        "flavour": {
+            "defaultValue": "vanilla",
+            "type": "string",
+            "allowedValues": ["vanilla", "chocolate"],
+            "destination": {"path": "/tmp/flavour"},
+            "maxLength": 10,
+            "minLength": 1,
+        },
+    },
+}
+
+
+@pytest.mark.parametrize(
+    "path", ["fixtures/helloworld/bundle.json", "fixtures/hellohelm/bundle.json"]
+)
+def test_decode_fixture_matches_from_dict(path):
+    with open(path) as f:
+        data = json.load(f)
+    assert decode_bundle(data) == Bundle.from_dict(data)
+
+
+def test_decode_full_bundle_matches_from_dict():
+    assert decode_bundle(FULL_BUNDLE) == Bundle.from_dict(FULL_BUNDLE)
+
+
+def test_decode_accepts_dict_subclasses():
+    data = OrderedDict(FULL_BUNDLE)
+    assert decode_bundle(data) == Bundle.from_dict(FULL_BUNDLE)
+
+
+def test_decode_does_not_alias_input_lists():
+    bundle = decode_bundle(FULL_BUNDLE)
+    allowed = FULL_BUNDLE["parameters"]["flavour"]["allowedValues"]
+    assert bundle.parameters["flavour"].allowed_values == allowed
+    assert bundle.parameters["flavour"].allowed_values is not allowed
+
+
+class TestInvalidBundles(object):
+    def test_missing_required_field(self):
+        with pytest.raises(InvalidBundleError) as e:
+            decode_bundle({"name": "missing", "invocationImages": []})
+        assert e.value.path == ("version",)
+
+    def test_bool_is_not_an_int(self):
+        data = json.loads(json.dumps(FULL_BUNDLE))
+        data["parameters"]["port"]["maxValue"] = True
+        with pytest.raises(InvalidBundleError) as e:
+            decode_bundle(data)
+        assert e.value.path == ("parameters", "port", "maxValue")
+
+    def test_nested_list_path(self):
+        data = json.loads(json.dumps(FULL_BUNDLE))
+        data["invocationImages"][0]["image"] = 1
+        with pytest.raises(InvalidBundleError) as e:
+            decode_bundle(data)
+        assert e.value.path == ("invocationImages", 0, "image")
+        assert str(e.value) == "invocationImages.0.image: expected str, got int"
+
+    def test_not_a_dict(self):
+        with pytest.raises(InvalidBundleError):
+            decode_bundle([])
+
+
+class TestLazyBundle(object):
+    @pytest.fixture
+    def bundle(self):
+        return LazyBundle.from_dict(FULL_BUNDLE)
+
+    def test_is_a_bundle(self, bundle):
+        assert isinstance(bundle, Bundle)
+
+    def test_sections_decoded_on_access(self, bundle):
+        assert not bundle.is_decoded("images")
+        assert bundle.name == "full"
+        assert bundle.images["demo"].size == 2048
+        assert bundle.is_decoded("images")
+        assert not bundle.is_decoded("parameters")
+
+    def test_sections_are_cached(self, bundle):
+        assert bundle.parameters is bundle.parameters
+
+    def test_pickle(self, bundle):
+        assert pickle.loads(pickle.dumps(bundle)) == bundle
+
+    def test_sections_can_be_replaced(self, bundle):
+        bundle.images = {}
+        assert bundle.images == {}
+
+    def test_equal_to_eager_bundle(self, bundle):
+        assert bundle == decode_bundle(FULL_BUNDLE)
+        assert decode_bundle(FULL_BUNDLE) == bundle
+
+    def test_to_dict_matches_eager(self, bundle):
+        assert bundle.to_dict() == decode_bundle(FULL_BUNDLE).to_dict()
+
+    def test_to_json_matches_eager(self, bundle):
+        assert bundle.to_json() == decode_bundle(FULL_BUNDLE).to_json()
+
+    def test_invalid_section_raises_on_access(self):
+        data = json.loads(json.dumps(FULL_BUNDLE))
+        data["images"]["demo"]["size"] = "big"
+        bundle = LazyBundle.from_dict(data)
+        with pytest.raises(InvalidBundleError) as e:
+            bundle.images
+        assert e.value.path == ("images", "demo", "size")
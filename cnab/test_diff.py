@@ -0,0 +1,75 @@
+import copy
+import json
+
+import pytest  # type: ignore
+
+from cnab import Bundle, Credential, Image
+from cnab.decoder import decode_bundle
+from cnab.diff import bundle_hashes
+
+
+@pytest.fixture
+def document():
+    with open("fixtures/hellohelm/bundle.json") as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def old(document):
+    return decode_bundle(document)
+
+
+@pytest.fixture
+def new(document):
+    return decode_bundle(copy.deepcopy(document))
+
+
+class TestDiff(object):
+    def test_equal_bundles(self, old, new):
+        changes = old.diff(new)
+        assert not changes
+        assert changes.sections == {} and changes.fields == []
+
+    def test_parameter_changed(self, old, new):
+        new.parameters["port"].default_value = 9090
+        changes = old.diff(new)
+        assert list(changes.sections) == ["parameters"]
+        assert changes.sections["parameters"].changed == ["port"]
+        assert changes.fields == []
+
+    def test_entries_added_and_removed(self, old, new):
+        new.credentials["token"] = Credential(env="TOKEN")
+        del new.images["demo"]
+        changes = old.diff(new)
+        assert changes.sections["credentials"].added == ["token"]
+        assert changes.sections["images"].removed == ["demo"]
+        assert not changes.sections["credentials"].changed
+
+    def test_nested_change(self, old, new):
+        new.images["demo"].refs[0].field = "image.name"
+        assert new.diff(old).sections["images"].changed == ["demo"]
+
+    def test_invocation_images_by_position(self, old, new):
+        new.invocation_images[0].image = "cnab/hellohelm:0.2.0"
+        assert old.diff(new).sections["invocation_images"].changed == ["0"]
+
+    def test_fields(self, old, new):
+        new.version = "0.2.0"
+        new.keywords = ["helm"]
+        changes = old.diff(new)
+        assert changes.fields == ["keywords", "version"]
+        assert changes.sections == {}
+
+    def test_hashes_are_kept_until_changed(self, old):
+        hashes = bundle_hashes(old)
+        assert bundle_hashes(old) is hashes
+        old.images["other"] = Image(image="alpine")
+        changed = bundle_hashes(old)
+        assert changed is not hashes
+        assert changed.sections["images"] != hashes.sections["images"]
+        assert changed.sections["parameters"] == hashes.sections["parameters"]
+
+    def test_bundle_objects(self):
+        a = Bundle(name="a", version="1", invocation_images=[])
+        b = Bundle(name="a", version="1", invocation_images=[], parameters=None)
+        assert not a.diff(b)
@@ -0,0 +1,83 @@
+import pytest  # type: ignore
+
+from cnab import CNAB, Bundle, DockerClientPool, InvocationImage
+from cnab.images import FAILED, PRESENT, PULLED, invocation_images, prefetch
+from cnab.testing import FakeDockerClient
+
+pytest.importorskip("docker")
+
+
+def bundle(*images):
+    return Bundle(
+        name="sample",
+        version="0.1.0",
+        invocation_images=[
+            InvocationImage(image_type="docker", image=image) for image in images
+        ],
+    )
+
+
+@pytest.fixture
+def bundles():
+    return [
+        bundle("a:1"),
+        bundle("b:1", "a:1"),
+        CNAB(bundle("c:1")),
+        Bundle(
+            name="oci",
+            version="0.1.0",
+            invocation_images=[InvocationImage(image_type="oci", image="d:1")],
+        ),
+    ]
+
+
+def test_invocation_images_are_unique(bundles):
+    assert invocation_images(bundles) == ["a:1", "b:1", "c:1"]
+
+
+def test_prefetch_pulls_missing_images(bundles):
+    client = FakeDockerClient(images=["b:1"])
+    results = prefetch(bundles, client=client)
+    assert [(r.image, r.status) for r in results] == [
+        ("a:1", PULLED),
+        ("b:1", PRESENT),
+        ("c:1", PULLED),
+    ]
+    assert all(r.ok for r in results)
+    pulls = sorted(name for call, name in client.calls if call == "pull")
+    assert pulls == ["a:1", "c:1"]
+
+
+def test_prefetch_reports_failures():
+    client = FakeDockerClient(images=[])
+    client.images.missing.add("b:1")
+    results = prefetch([bundle("a:1", "b:1")], client=client)
+    assert results[0].ok
+    assert results[1].status == FAILED
+    assert not results[1].ok
+    assert "NotFound" in results[1].error
+
+
+def test_prefetch_bounds_concurrency():
+    client = FakeDockerClient(images=[], pull_delay=0.01)
+    images = [f"image{i}:latest" for i in range(12)]
+    results = prefetch([bundle(*images)], client=client, concurrency=3)
+    assert [r.status for r in results] == [PULLED] * 12
+    assert 1 < client.images.peak <= 3
+
+
+def test_prefetch_with_pool():
+    clients = []
+
+    def factory():
+        clients.append(FakeDockerClient(images=[]))
+        return clients[-1]
+
+    with DockerClientPool(size=2, factory=factory) as pool:
+        results = prefetch([bundle("a:1", "b:1", "c:1")], client=pool)
+    assert all(r.status == PULLED for r in results)
+    assert 1 <= len(clients) <= 2
+
+
+def test_prefetch_nothing():
+    assert prefetch([], client=FakeDockerClient()) == []
@@ -1,7 +1,19 @@
+import os
+
 import pytest  # type: ignore
 
 from cnab import CNABDirectory
-from cnab.invocation_image import InvalidCNABDirectoryError
+from cnab.invocation_image import InvalidCNABDirectoryError, validate_directories
+
+
+def make_directory(root, name, run=True, extra=None):
+    app = root.mkdir(name).mkdir("cnab").mkdir("app")
+    if run:
+        app.join("run").write("#!/bin/sh\n")
+        os.chmod(str(app.join("run")), 0o755)
+    if extra:
+        app.dirpath().join(extra).write("")
+    return str(root.join(name))
 
 
 class SampleCNAB(object):
@@ -67,3 +79,78 @@ class TestInvalidCNABDirectory(InvalidCNAB):
     def test_is_invalid(self, directory):
         with pytest.raises(InvalidCNABDirectoryError):
             directory.valid()
+
+
+class TestSnapshot(object):
+    def test_checks_share_one_snapshot(self, tmpdir):
+        directory = CNABDirectory(make_directory(tmpdir, "image"))
+        assert directory.valid()
+        tmpdir.join("image", "cnab", "extra").write("")
+        assert directory.has_no_misc_files_in_cnab_dir()
+        directory.refresh()
+        assert not directory.has_no_misc_files_in_cnab_dir()
+
+    def test_missing_directory(self, tmpdir):
+        directory = CNABDirectory(str(tmpdir.join("missing")))
+        assert directory.errors() == [
+            "Run entrypoint is not executable",
+            "Missing a run entrypoint",
+            "Missing the app directory",
+            "Missing the cnab directory",
+        ]
+        assert not directory.readme()
+
+    def test_unreadable_directory(self, tmpdir, monkeypatch):
+        path = make_directory(tmpdir, "image")
+        scandir = os.scandir
+
+        def denied(target):
+            if target.endswith("app"):
+                raise PermissionError(13, "Permission denied", target)
+            return scandir(target)
+
+        monkeypatch.setattr(os, "scandir", denied)
+        directory = CNABDirectory(path)
+        app = os.path.join(path, "cnab", "app")
+        assert directory.errors() == [f"Unable to read {app}: Permission denied"]
+        with pytest.raises(InvalidCNABDirectoryError):
+            directory.valid()
+
+
+class TestValidateDirectories(object):
+    def test_returns_errors_for_each_directory(self, tmpdir):
+        paths = [make_directory(tmpdir, f"image{i}") for i in range(20)]
+        paths.append(make_directory(tmpdir, "norun", run=False))
+        paths.append(make_directory(tmpdir, "extra", extra="notes.txt"))
+        results = validate_directories(paths, workers=4)
+        assert list(results) == paths
+        assert all(results[path] == [] for path in paths[:20])
+        assert results[paths[20]] == [
+            "Run entrypoint is not executable",
+            "Missing a run entrypoint",
+        ]
+        assert results[paths[21]] == ["Has additional files in the cnab directory"]
+
+    def test_duplicate_paths_are_checked_once(self, tmpdir, monkeypatch):
+        import cnab.invocation_image
+
+        checked = []
+        errors = cnab.invocation_image._errors
+
+        def counting(path):
+            checked.append(path)
+            return errors(path)
+
+        monkeypatch.setattr(cnab.invocation_image, "_errors", counting)
+        first = make_directory(tmpdir, "first")
+        second = make_directory(tmpdir, "second")
+        results = validate_directories([first, second, first])
+        assert list(results) == [first, second]
+        assert sorted(checked) == [first, second]
+
+    def test_fixtures(self):
+        results = validate_directories(
+            ["fixtures/invocationimage", "fixtures/invalidinvocationimage"]
+        )
+        assert results["fixtures/invocationimage"] == []
+        assert len(results["fixtures/invalidinvocationimage"]) == 4
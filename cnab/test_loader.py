@@ -0,0 +1,55 @@
+import json
+import shutil
+
+import pytest  # type: ignore
+
+from cnab import Bundle
+from cnab.loader import find_bundles, load_directory, load_many
+
+
+@pytest.fixture
+def tree(tmp_path):
+    for name in ["helloworld", "hellohelm"]:
+        target = tmp_path / "bundles" / name
+        target.mkdir(parents=True)
+        shutil.copy(f"fixtures/{name}/bundle.json", target / "bundle.json")
+    broken = tmp_path / "bundles" / "broken"
+    broken.mkdir()
+    (broken / "bundle.json").write_text(json.dumps({"name": "broken"}))
+    truncated = tmp_path / "truncated"
+    truncated.mkdir()
+    (truncated / "bundle.json").write_text("{")
+    (tmp_path / "bundles" / "README.md").write_text("not a bundle")
+    return tmp_path
+
+
+def test_find_bundles(tree):
+    assert len(list(find_bundles(str(tree)))) == 4
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_load_directory(tree, workers):
+    results = {
+        r.path: r for r in load_directory(str(tree), workers=workers, batch_size=1)
+    }
+    assert len(results) == 4
+    loaded = [r for r in results.values() if r.ok]
+    failed = [r for r in results.values() if not r.ok]
+    assert sorted(r.bundle.name for r in loaded) == ["hellohelm", "helloworld"]
+    assert all(isinstance(r.bundle, Bundle) for r in loaded)
+    assert len(failed) == 2
+    assert all(r.bundle is None for r in failed)
+
+
+def test_load_many_reports_missing_files(tmp_path):
+    missing = str(tmp_path / "missing.json")
+    results = list(load_many([missing], workers=1))
+    assert results[0].path == missing
+    assert results[0].error.startswith("FileNotFoundError")
+
+
+def test_load_many_error_names_field(tree):
+    path = str(tree / "bundles" / "broken" / "bundle.json")
+    (result,) = load_many([path], workers=2)
+    assert "InvalidBundleError" in result.error
+    assert "version" in result.error
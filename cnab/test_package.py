@@ -0,0 +1,49 @@
+import pkgutil
+import subprocess
+import sys
+
+import pytest  # type: ignore
+
+import cnab
+
+
+def imported_after(statement):
+    code = f"import sys; {statement}; print(' '.join(sorted(sys.modules)))"
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, stdout=subprocess.PIPE
+    ).stdout
+    return set(output.decode().split())
+
+
+def test_import_is_lazy():
+    modules = imported_after("import cnab")
+    assert not {"cnab.types", "cnab.cnab", "canonicaljson"} & modules
+
+
+def test_directory_checks_only_import_what_they_need():
+    modules = imported_after("from cnab import CNABDirectory")
+    assert "cnab.invocation_image" in modules
+    assert not {"cnab.types", "cnab.build", "dataclasses"} & modules
+
+
+def test_canonicaljson_imported_when_encoding():
+    modules = imported_after("from cnab import Bundle")
+    assert "canonicaljson" not in modules
+
+
+@pytest.mark.parametrize("name", cnab.__all__)
+def test_exports(name):
+    assert getattr(cnab, name).__name__ == name
+    assert name in dir(cnab)
+
+
+def test_unknown_name():
+    with pytest.raises(AttributeError):
+        cnab.Missing
+
+
+def test_exports_do_not_share_a_name_with_a_module():
+    # importing a submodule sets it as an attribute of the package, which
+    # would hide a lazily imported name of the same name
+    modules = {name for _, name, _ in pkgutil.iter_modules(cnab.__path__)}
+    assert not modules & set(cnab.__all__)
@@ -0,0 +1,98 @@
+import pytest  # type: ignore
+
+from cnab import CNAB, Parameter, Destination
+from cnab.parameters import ParameterValidator, InvalidParametersError
+
+
+@pytest.fixture
+def validator():
+    return ParameterValidator(
+        {
+            "port": Parameter(
+                type="int",
+                destination=Destination(env="PORT"),
+                default_value=8080,
+                min_value=1,
+                max_value=65535,
+            ),
+            "flavour": Parameter(
+                type="string",
+                destination=Destination(env="FLAVOUR"),
+                allowed_values=["vanilla", "chocolate"],
+                required=True,
+            ),
+            "name": Parameter(
+                type="string",
+                destination=Destination(path="/tmp/name"),
+                min_length=2,
+                max_length=5,
+            ),
+        }
+    )
+
+
+def test_valid_parameters(validator):
+    assert validator.validate({"port": 80, "flavour": "vanilla", "name": "abc"}) == []
+
+
+@pytest.mark.parametrize(
+    "values,error",
+    [
+        ({"flavour": "vanilla", "colour": "red"}, "Invalid parameter provided: colour"),
+        ({}, "Missing required parameter: flavour"),
+        ({"flavour": "mint"}, "Parameter flavour must be one of the allowed values"),
+        ({"flavour": "vanilla", "port": 0}, "Parameter port must be at least 1"),
+        ({"flavour": "vanilla", "port": 70000}, "Parameter port must be at most 65535"),
+        ({"flavour": "vanilla", "port": "80"}, "Parameter port must be of type int"),
+        ({"flavour": "vanilla", "port": True}, "Parameter port must be of type int"),
+        (
+            {"flavour": "vanilla", "name": "a"},
+            "Parameter name must be at least 2 characters",
+        ),
+        (
+            {"flavour": "vanilla", "name": "abcdef"},
+            "Parameter name must be at most 5 characters",
+        ),
+    ],
+)
+def test_invalid_parameters(validator, values, error):
+    assert validator.validate(values) == [error]
+
+
+def test_all_errors_are_reported(validator):
+    errors = validator.validate({"port": 0, "colour": "red"})
+    assert len(errors) == 3
+
+
+def test_validate_many(validator):
+    batch = [{"flavour": "vanilla"}, {}, {"flavour": "mint", "port": 0}]
+    assert [len(errors) for errors in validator.validate_many(batch)] == [0, 1, 2]
+
+
+def test_check_raises_with_errors(validator):
+    with pytest.raises(InvalidParametersError) as e:
+        validator.check({"port": 0})
+    assert len(e.value.args[0]) == 2
+
+
+def test_environment(validator):
+    env = validator.environment({"flavour": "chocolate"})
+    assert env == {"PORT": 8080, "FLAVOUR": "chocolate"}
+
+
+class TestCNABValidator(object):
+    @pytest.fixture
+    def app(self):
+        return CNAB("fixtures/helloworld/bundle.json")
+
+    def test_validator_is_cached(self, app):
+        assert app.validator is app.validator
+
+    def test_validator_recompiled_when_parameters_replaced(self, app):
+        validator = app.validator
+        app.bundle.parameters = {}
+        assert app.validator is not validator
+
+    def test_environment_rejects_invalid_parameters(self, app):
+        with pytest.raises(InvalidParametersError):
+            app.environment("install", parameters={"port": "http"})
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest  # type: ignore
+
+from cnab import CNAB, DockerClientPool
+from cnab.runner import run_many
+from cnab.testing import FakeDockerClient
+
+docker = pytest.importorskip("docker")
+
+
+@pytest.fixture
+def app():
+    return CNAB("fixtures/helloworld/bundle.json")
+
+
+def test_arun_returns_output(app):
+    client = FakeDockerClient(runs_for=2)
+    output = asyncio.run(app.arun("install", client=client, poll_interval=0))
+    assert output == b"output"
+    (container,) = client.created
+    assert container.environment["CNAB_ACTION"] == "install"
+    assert container.reloads == 3
+    assert container.removed
+
+
+def test_arun_raises_on_failure(app):
+    client = FakeDockerClient(exit_code=1)
+    with pytest.raises(docker.errors.ContainerError):
+        asyncio.run(app.arun("install", client=client, poll_interval=0))
+    assert client.created[0].removed
+
+
+def test_run_many_bounds_concurrency(app):
+    client = FakeDockerClient(runs_for=2)
+    jobs = [(app, "install") for _ in range(10)]
+    results = asyncio.run(run_many(jobs, concurrency=3, client=client, poll_interval=0))
+    assert results == [b"output"] * 10
+    assert client.peak <= 3
+    assert client.active == 0
+
+
+def test_run_many_per_job_arguments(app):
+    client = FakeDockerClient()
+    jobs = [(app, "install", {"parameters": {"port": 9000 + i}}) for i in range(3)]
+    asyncio.run(run_many(jobs, client=client, poll_interval=0))
+    ports = sorted(c.environment["PORT"] for c in client.created)
+    assert ports == [9000, 9001, 9002]
+
+
+def test_run_many_returns_exceptions(app):
+    jobs = [(app, "install"), (app, "explode")]
+    results = asyncio.run(run_many(jobs, client=FakeDockerClient(), poll_interval=0))
+    assert results[0] == b"output"
+    assert isinstance(results[1], AssertionError)
+
+
+def test_run_many_with_more_jobs_than_pooled_clients(app):
+    # waiting for a client must not hold the executor threads that the runs
+    # holding clients need in order to finish
+    pool = DockerClientPool(size=1, factory=lambda: FakeDockerClient(runs_for=3))
+    jobs = [(app, "install") for _ in range(6)]
+
+    async def main():
+        with ThreadPoolExecutor(2) as executor:
+            return await asyncio.wait_for(
+                run_many(
+                    jobs,
+                    concurrency=3,
+                    client=pool,
+                    executor=executor,
+                    poll_interval=0.001,
+                ),
+                timeout=10,
+            )
+
+    assert asyncio.run(main()) == [b"output"] * 6
+
+
+def test_client_released_when_cancelled_while_acquiring(app):
+    creating = threading.Event()
+    created = threading.Event()
+
+    def factory():
+        creating.set()
+        created.wait(5)
+        return FakeDockerClient()
+
+    pool = DockerClientPool(size=1, factory=factory)
+
+    async def main():
+        with ThreadPoolExecutor(2) as executor:
+            task = asyncio.ensure_future(
+                app.arun("install", client=pool, executor=executor, poll_interval=0)
+            )
+            while not creating.is_set():
+                await asyncio.sleep(0.001)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            created.set()
+        # the executor has finished, let the release callback run
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+    assert pool.try_acquire() is not None
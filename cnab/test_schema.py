@@ -0,0 +1,97 @@
+import copy
+import json
+from collections import OrderedDict
+
+import pytest  # type: ignore
+
+from cnab import BundleValidator, validate_bundles
+from cnab.decoder import InvalidBundleError, decode_bundle
+from cnab.test_decoder import FULL_BUNDLE
+
+BROKEN = [
+    ("name", None, "/name"),
+    ("version", 1, "/version"),
+    ("invocationImages", None, "/invocationImages"),
+    ("invocationImages", [{"image": 3}], "/invocationImages/0/image"),
+    ("invocationImages", ["image"], "/invocationImages/0"),
+    ("keywords", ["one", True], "/keywords/1"),
+    ("images", {"a/b": {"image": 1}}, "/images/a~1b/image"),
+    ("images", {"demo": {"image": "x", "size": True}}, "/images/demo/size"),
+    ("parameters", {"port": {"type": "int"}}, "/parameters/port/destination"),
+    ("actions", {"status": {"modifies": "yes"}}, "/actions/status/modifies"),
+    ("maintainers", [{"name": 1}], "/maintainers/0/name"),
+]
+
+
+@pytest.fixture
+def validator():
+    return BundleValidator()
+
+
+def broken(key, value):
+    data = copy.deepcopy(FULL_BUNDLE)
+    data[key] = value
+    return data
+
+
+class TestBundleValidator(object):
+    def test_valid_bundle(self, validator):
+        assert validator.errors(FULL_BUNDLE) == []
+        assert validator.valid(FULL_BUNDLE)
+
+    def test_fixtures_are_valid(self, validator):
+        for name in ["helloworld", "hellohelm"]:
+            with open(f"fixtures/{name}/bundle.json") as f:
+                assert validator.valid(json.load(f))
+
+    def test_not_a_dict(self, validator):
+        errors = validator.errors([])
+        assert len(errors) == 1
+        assert errors[0].pointer == ""
+
+    @pytest.mark.parametrize("key,value,pointer", BROKEN)
+    def test_error_pointer(self, validator, key, value, pointer):
+        errors = validator.errors(broken(key, value))
+        assert [error.pointer for error in errors] == [pointer]
+        assert not validator.valid(broken(key, value))
+
+    @pytest.mark.parametrize("key,value,pointer", BROKEN)
+    def test_agrees_with_decoder(self, validator, key, value, pointer):
+        data = broken(key, value)
+        with pytest.raises(InvalidBundleError) as e:
+            decode_bundle(data)
+        error = validator.errors(data)[0]
+        assert error.path == e.value.path
+        assert error.message == e.value.message
+
+    def test_reports_every_error(self, validator):
+        data = broken("version", 1)
+        data["keywords"] = [1, 2]
+        data["parameters"]["port"]["minValue"] = "1"
+        pointers = [error.pointer for error in validator.errors(data)]
+        assert pointers == [
+            "/version",
+            "/keywords/0",
+            "/keywords/1",
+            "/parameters/port/minValue",
+        ]
+
+    def test_limit(self, validator):
+        data = broken("keywords", [1, 2, 3])
+        assert len(validator.errors(data, limit=2)) == 2
+
+    def test_accepts_subclasses(self, validator):
+        data = OrderedDict(FULL_BUNDLE)
+        data["images"] = OrderedDict(FULL_BUNDLE["images"])
+        assert validator.valid(data)
+
+    def test_unknown_fields_are_ignored(self, validator):
+        assert validator.valid(broken("custom", {"anything": 1}))
+
+
+class TestValidateBundles(object):
+    def test_results_in_order(self):
+        documents = [FULL_BUNDLE, broken("version", 1), FULL_BUNDLE]
+        results = validate_bundles(documents)
+        assert [len(errors) for errors in results] == [0, 1, 0]
+        assert results[1][0].pointer == "/version"
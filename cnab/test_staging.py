@@ -0,0 +1,110 @@
+import io
+import json
+import os
+import tarfile
+
+import pytest  # type: ignore
+
+from cnab import CNAB
+from cnab.staging import (
+    ARCHIVE,
+    IMAGE_MAP_PATH,
+    build_archive,
+    staging_directory,
+)
+from cnab.testing import FakeDockerClient
+
+docker = pytest.importorskip("docker")
+
+
+@pytest.fixture
+def app():
+    return CNAB("fixtures/hellohelm/bundle.json")
+
+
+@pytest.fixture
+def credentials():
+    return {"kubeconfig": "apiVersion: v1"}
+
+
+class TestStagedFiles(object):
+    def test_credentials_and_image_map(self, app, credentials):
+        files = app._staged_files("install", credentials)
+        assert files["/root/.kube/config"] == b"apiVersion: v1"
+        images = json.loads(files[IMAGE_MAP_PATH])
+        assert images["demo"]["image"] == "technosophos/demo2alpine:0.1.0"
+
+    def test_empty_image_map(self):
+        app = CNAB("fixtures/helloworld/bundle.json")
+        files = app._staged_files("install", {})
+        assert files == {IMAGE_MAP_PATH: b"{}"}
+
+
+class TestBuildArchive(object):
+    def test_archive_contents(self):
+        data = build_archive({"/b/file": b"two", "/a/file": b"one"})
+        with tarfile.open(fileobj=io.BytesIO(data)) as tar:
+            members = tar.getmembers()
+            assert [m.name for m in members] == ["a/file", "b/file"]
+            assert all(m.mode == 0o600 for m in members)
+            assert tar.extractfile(members[0]).read() == b"one"
+
+    def test_archive_is_deterministic(self):
+        files = {"/a": b"1", "/b": b"2"}
+        assert build_archive(files) == build_archive(dict(reversed(files.items())))
+
+
+class TestStagingDirectory(object):
+    def test_one_directory_removed_on_exit(self, tmpdir):
+        with staging_directory({"/a": b"1", "/b": b"2"}, str(tmpdir)) as mounts:
+            sources = {os.path.dirname(m["Source"]) for m in mounts}
+            assert len(sources) == 1
+            assert [m["Target"] for m in mounts] == ["/a", "/b"]
+            assert all(m["ReadOnly"] for m in mounts)
+        assert os.listdir(str(tmpdir)) == []
+
+
+class TestRun(object):
+    def test_directory_staging(self, app, credentials, tmpdir):
+        app.staging_root = str(tmpdir)
+        client = FakeDockerClient()
+        assert app.run("status", credentials=credentials, client=client) == b"output"
+        (container,) = client.created
+        assert container.mounted["/root/.kube/config"] == b"apiVersion: v1"
+        assert IMAGE_MAP_PATH in container.mounted
+        assert container.removed
+        assert os.listdir(str(tmpdir)) == []
+
+    def test_archive_staging(self, app, credentials):
+        client = FakeDockerClient()
+        app.run("status", credentials=credentials, client=client, staging=ARCHIVE)
+        (container,) = client.created
+        assert container.mounts == []
+        assert container.files["/root/.kube/config"] == b"apiVersion: v1"
+        assert IMAGE_MAP_PATH in container.files
+
+    def test_unknown_staging_mode(self, app, credentials):
+        with pytest.raises(ValueError):
+            app.run(
+                "status",
+                credentials=credentials,
+                client=FakeDockerClient(),
+                staging="tmp",
+            )
+
+    def test_pulls_missing_image(self, app, credentials):
+        client = FakeDockerClient(images=[])
+        app.run("status", credentials=credentials, client=client)
+        assert client.calls == [
+            ("create", "cnab/hellohelm:latest"),
+            ("pull", "cnab/hellohelm:latest"),
+            ("create", "cnab/hellohelm:latest"),
+        ]
+
+    def test_cleanup_on_failure(self, app, credentials, tmpdir):
+        app.staging_root = str(tmpdir)
+        client = FakeDockerClient(exit_code=2)
+        with pytest.raises(docker.errors.ContainerError):
+            app.run("status", credentials=credentials, client=client)
+        assert client.created[0].removed
+        assert os.listdir(str(tmpdir)) == []
@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest  # type: ignore
+
+from cnab import CNAB
+from cnab.testing import FakeDockerClient
+from cnab.tracing import Span, SpanCollector, span
+
+
+@pytest.fixture
+def spans():
+    return []
+
+
+@pytest.fixture
+def app(spans):
+    return CNAB("fixtures/helloworld/bundle.json", name="hello", tracer=spans.append)
+
+
+class TestSpan(object):
+    def test_without_tracer(self):
+        with span(None, "run"):
+            pass
+
+    def test_records_errors(self, spans):
+        with pytest.raises(KeyError):
+            with span(spans.append, "run", "install", "hello"):
+                raise KeyError("x")
+        (recorded,) = spans
+        assert recorded.name == "run"
+        assert recorded.action == "install"
+        assert recorded.installation == "hello"
+        assert recorded.error == "KeyError"
+        assert recorded.duration >= 0
+
+
+class TestRunPhases(object):
+    def test_run(self, app, spans):
+        app.run("install", client=FakeDockerClient(images=[]))
+        assert [s.name for s in spans] == [
+            "check_action",
+            "validate_parameters",
+            "build_environment",
+            "stage_credentials",
+            "stage_image_map",
+            "stage_files",
+            "create_container",
+            "pull_image",
+            "create_container",
+            "start_container",
+            "wait_container",
+            "collect_output",
+            "cleanup",
+            "run",
+        ]
+        assert all(s.action == "install" for s in spans)
+        assert all(s.installation == "hello" for s in spans)
+        run = spans[-1]
+        assert run.duration >= sum(s.duration for s in spans[:-1])
+
+    def test_failed_run(self, app, spans):
+        docker = pytest.importorskip("docker")
+        with pytest.raises(docker.errors.ContainerError):
+            app.run("install", client=FakeDockerClient(exit_code=1))
+        errors = {s.name: s.error for s in spans if s.error}
+        assert errors == {"collect_output": "ContainerError", "run": "ContainerError"}
+
+    def test_invalid_parameters(self, app, spans):
+        with pytest.raises(Exception):
+            app.run("install", parameters={"port": "http"})
+        assert [(s.name, s.error) for s in spans] == [
+            ("check_action", None),
+            ("validate_parameters", "InvalidParametersError"),
+            ("run", "InvalidParametersError"),
+        ]
+
+    def test_arun_and_stream(self, app, spans):
+        client = FakeDockerClient()
+        asyncio.run(app.arun("install", client=client, poll_interval=0))
+        assert spans[-1].name == "run"
+        del spans[:]
+        list(app.stream("install", client=client))
+        assert [s.name for s in spans][-4:] == [
+            "start_container",
+            "collect_output",
+            "wait_container",
+            "cleanup",
+        ]
+
+
+class TestSpanCollector(object):
+    def test_summary(self):
+        collector = SpanCollector()
+        for i in range(1, 101):
+            collector(Span("wait_container", 0, i / 1000))
+            collector(Span("run", 0, i / 100))
+        collector(Span("run", 0, 5, error="ContainerError"))
+        summary = collector.summary()
+        assert list(summary) == ["run", "wait_container"]
+        assert summary["wait_container"]["count"] == 100
+        assert summary["wait_container"]["p50"] == 0.05
+        assert summary["wait_container"]["p99"] == 0.099
+        assert summary["run"]["max"] == 5
+        assert collector.errors == {"run": 1}
+        assert collector.percentile("missing", 50) is None
+
+    def test_bounded(self):
+        collector = SpanCollector(maxlen=10)
+        for i in range(100):
+            collector(Span("run", 0, i))
+        assert collector.durations("run") == list(range(90, 100))
+
+    def test_with_cnab(self):
+        collector = SpanCollector()
+        app = CNAB("fixtures/helloworld/bundle.json", tracer=collector)
+        client = FakeDockerClient()
+        for _ in range(5):
+            app.run("install", client=client)
+        assert collector.summary()["run"]["count"] == 5
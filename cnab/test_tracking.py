@@ -0,0 +1,154 @@
+import copy
+import pickle
+import weakref
+
+import pytest  # type: ignore
+
+from cnab import (
+    Bundle,
+    InvocationImage,
+    Action,
+    Parameter,
+    Destination,
+    Maintainer,
+)
+from cnab.tracking import TrackedDict, TrackedList, watch
+
+
+@pytest.fixture
+def bundle():
+    return Bundle(
+        name="sample",
+        version="0.1.0",
+        invocation_images=[
+            InvocationImage(image_type="docker", image="garethr/helloworld:0.1.0")
+        ],
+        actions={"status": Action(modifies=False)},
+        parameters={
+            "port": Parameter(
+                type="int", default_value=8080, destination=Destination(env="PORT")
+            )
+        },
+        keywords=["one"],
+    )
+
+
+def test_digest_format(bundle):
+    digest = bundle.digest()
+    assert digest.startswith("sha256:")
+    assert len(digest) == 71
+
+
+def test_canonical_encoding_is_memoized(bundle):
+    assert bundle.to_canonical_json() is bundle.to_canonical_json()
+    assert bundle.to_json() == bundle.to_canonical_json().decode()
+
+
+def test_equal_bundles_have_equal_digests(bundle):
+    assert bundle.digest() == copy.deepcopy(bundle).digest()
+
+
+def test_containers_are_tracked_once_encoded(bundle):
+    bundle.digest()
+    assert isinstance(bundle.parameters, TrackedDict)
+    assert isinstance(bundle.keywords, TrackedList)
+    assert bundle.keywords == ["one"]
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        lambda b: setattr(b, "version", "0.2.0"),
+        lambda b: setattr(b.parameters["port"], "default_value", 9090),
+        lambda b: setattr(b.parameters["port"].destination, "env", "HTTP_PORT"),
+        lambda b: setattr(b.invocation_images[0], "digest", "sha256:aaaa"),
+        lambda b: setattr(b.actions["status"], "modifies", True),
+        lambda b: b.parameters.pop("port"),
+        lambda b: b.actions.update(
+            {"explode": Action(modifies=True, description="boom")}
+        ),
+        lambda b: b.keywords.append("two"),
+        lambda b: b.maintainers.append(Maintainer(name="test")),
+    ],
+)
+def test_changes_invalidate_digest(bundle, change):
+    before = bundle.digest()
+    change(bundle)
+    assert bundle.digest() != before
+    assert bundle.digest() == copy.deepcopy(bundle).digest()
+
+
+def test_changes_after_recompute_are_seen(bundle):
+    first = bundle.digest()
+    bundle.parameters["port"].default_value = 1
+    second = bundle.digest()
+    bundle.parameters["port"].default_value = 2
+    assert len({first, second, bundle.digest()}) == 3
+
+
+def test_shared_objects_invalidate_every_bundle(bundle):
+    other = copy.deepcopy(bundle)
+    other.parameters = {"port": bundle.parameters["port"]}
+    bundle.digest()
+    before = other.digest()
+    bundle.parameters["port"].default_value = 1
+    assert other.digest() != before
+
+
+def test_pickle_after_digest(bundle):
+    before = bundle.digest()
+    restored = pickle.loads(pickle.dumps(bundle))
+    assert restored == bundle
+    assert restored.digest() == before
+    restored.keywords.append("two")
+    assert restored.digest() != before
+
+
+def test_watch_with_depth(bundle):
+    class Watcher(object):
+        changes = 0
+
+        def _changed(self):
+            self.changes += 1
+
+    watcher = Watcher()
+    ref = weakref.ref(watcher)
+    watch(bundle, ref, 2)
+    bundle.parameters["port"].type = "string"
+    assert watcher.changes == 1
+    bundle.parameters["port"].destination.env = "HTTP_PORT"
+    assert watcher.changes == 1
+
+
+def test_dict_merge_operator_is_only_wrapped_where_it_exists():
+    # dict gained |= in Python 3.9, and importing must work on earlier versions
+    assert ("__ior__" in vars(TrackedDict)) == hasattr(dict, "__ior__")
+
+
+@pytest.mark.skipif(not hasattr(dict, "__ior__"), reason="needs Python 3.9")
+def test_merging_into_a_dict_changes_digest(bundle):
+    digest = bundle.digest()
+    bundle.actions |= {"extra": Action(modifies=True)}
+    assert bundle.digest() != digest
+
+
+def test_unwatched_objects_do_not_notify(monkeypatch):
+    changed = []
+    monkeypatch.setattr(Bundle, "_changed", lambda self: changed.append(self))
+    bundle = Bundle(name="sample", version="0.1.0", invocation_images=[])
+    bundle.version = "0.1.1"
+    assert changed == []
+    bundle.digest()
+    bundle.version = "0.1.2"
+    assert changed == [bundle]
+
+
+def test_constructor_defaults():
+    first = Parameter(type="int", destination=Destination())
+    second = Parameter("int", Destination(), 80)
+    assert first.allowed_values == []
+    assert first.allowed_values is not second.allowed_values
+    assert second.default_value == 80
+    assert first.max_value is None
+    with pytest.raises(TypeError):
+        Parameter(type="int")
@@ -2,6 +2,9 @@ import json
 
 from cnab import (
     Bundle,
+    Image,
+    ImagePlatform,
+    Ref,
     Credential,
     InvocationImage,
     Action,
@@ -65,6 +68,16 @@ def test_read_bundle():
     assert isinstance(Bundle.from_dict(data), Bundle)
 
 
+@pytest.mark.parametrize(
+    "path", ["fixtures/helloworld/bundle.json", "fixtures/hellohelm/bundle.json"]
+)
+def test_parsed_bundle_to_dict(path):
+    with open(path) as f:
+        data = json.load(f)
+
+    assert Bundle.from_dict(data).to_dict()["name"] == data["name"]
+
+
 class TestAllParameters(object):
     @pytest.fixture
     def bundle(self):
@@ -127,3 +140,72 @@ class TestAllParameters(object):
 
     def test_convert_bundle_to_dict(self, bundle):
         assert isinstance(bundle.to_dict(), dict)
+
+
+def test_default_value_is_serialized():
+    parameter = Parameter(type="int", default_value=0, destination=Destination())
+    assert parameter.to_dict()["defaultValue"] == 0
+
+
+def test_false_values_are_serialized():
+    assert Action(modifies=False).to_dict() == {"modifies": False}
+
+
+def test_encoding_includes_defaults_and_false_values():
+    bundle = Bundle(
+        name="sample",
+        version="0.1.0",
+        invocation_images=[InvocationImage(image="cnab/sample:0.1.0")],
+        actions={"status": Action(modifies=False, stateless=True)},
+        parameters={
+            "port": Parameter(
+                type="int",
+                default_value=0,
+                destination=Destination(env="PORT"),
+                required=False,
+            )
+        },
+    )
+    # what earlier releases produced, dropping modifies, defaultValue and required
+    before = (
+        '{"actions":{"status":{"stateless":true}},'
+        '"invocationImages":[{"image":"cnab/sample:0.1.0","imageType":"oci"}],'
+        '"name":"sample",'
+        '"parameters":{"port":{"destination":{"env":"PORT"},"type":"int"}},'
+        '"schemaVersion":"v1","version":"0.1.0"}'
+    )
+    after = (
+        '{"actions":{"status":{"modifies":false,"stateless":true}},'
+        '"invocationImages":[{"image":"cnab/sample:0.1.0","imageType":"oci"}],'
+        '"name":"sample",'
+        '"parameters":{"port":{"defaultValue":0,"destination":{"env":"PORT"},'
+        '"required":false,"type":"int"}},'
+        '"schemaVersion":"v1","version":"0.1.0"}'
+    )
+    assert bundle.to_json() == after
+    assert bundle.to_json() != before
+    assert bundle.digest() == (
+        "sha256:0ef71c6e0bb0a3568bfb344cc8e45c3af5b5f2150d899f57c85a8e21ef81b390"
+    )
+
+
+@pytest.mark.parametrize(
+    "instance",
+    [
+        Action(),
+        Credential(),
+        ImagePlatform(),
+        Ref(),
+        Image(image="alpine"),
+        InvocationImage(image="alpine"),
+        Maintainer(name="test"),
+        Destination(),
+        Metadata(),
+        Parameter(type="int", destination=Destination()),
+        Bundle(name="sample", version="0.1.0", invocation_images=[]),
+    ],
+)
+def test_types_are_slotted(instance):
+    assert not hasattr(instance, "__dict__")
+    with pytest.raises(AttributeError):
+        instance.unknown = True
@@ -0,0 +1,138 @@
+import hashlib
+
+import pytest  # type: ignore
+
+from cnab import Bundle, Image, InvocationImage
+from cnab.verify import (
+    FAILED,
+    MISMATCH,
+    MISSING,
+    SKIPPED,
+    VERIFIED,
+    hash_file,
+    verify_bundle,
+    verify_file,
+)
+
+
+def sha256(content):
+    return "sha256:" + hashlib.sha256(content).hexdigest()
+
+
+@pytest.fixture
+def layout(tmpdir):
+    blobs = tmpdir.mkdir("blobs").mkdir("sha256")
+    for content in [b"invocation" * 1000, b"demo" * 100000, b""]:
+        blobs.join(sha256(content)[7:]).write_binary(content)
+    return str(tmpdir)
+
+
+def bundle(images):
+    return Bundle(
+        name="sample",
+        version="0.1.0",
+        invocation_images=[
+            InvocationImage(
+                image="cnab/sample:0.1.0",
+                digest=sha256(b"invocation" * 1000),
+                size="10000",
+            )
+        ],
+        images=images,
+    )
+
+
+class TestHashFile(object):
+    def test_chunks(self, tmpdir):
+        path = tmpdir.join("file")
+        path.write_binary(b"x" * 10001)
+        assert hash_file(str(path), chunk_size=1000) == sha256(b"x" * 10001)
+
+    def test_empty_file(self, tmpdir):
+        path = tmpdir.join("empty")
+        path.write_binary(b"")
+        assert hash_file(str(path)) == sha256(b"")
+
+    def test_algorithm(self, tmpdir):
+        path = tmpdir.join("file")
+        path.write_binary(b"x")
+        expected = "sha512:" + hashlib.sha512(b"x").hexdigest()
+        assert hash_file(str(path), "sha512") == expected
+
+
+class TestVerifyFile(object):
+    def test_wrong_size_not_hashed(self, tmpdir):
+        path = tmpdir.join("file")
+        path.write_binary(b"abc")
+        assert verify_file(str(path), sha256(b"abc"), size=4) == (MISMATCH, None, 3)
+        assert verify_file(str(path), sha256(b"abc"), size=3)[0] == VERIFIED
+
+
+class TestVerifyBundle(object):
+    def test_oci_layout(self, layout):
+        images = {
+            "demo": Image(image="demo:1", digest=sha256(b"demo" * 100000), size=400000),
+            "empty": Image(image="empty:1", digest=sha256(b"")),
+            "undeclared": Image(image="other:1"),
+        }
+        results = verify_bundle(bundle(images), layout, workers=4, chunk_size=4096)
+        assert [(r.name, r.status) for r in results] == [
+            ("invocationImages.0", VERIFIED),
+            ("images.demo", VERIFIED),
+            ("images.empty", VERIFIED),
+            ("images.undeclared", SKIPPED),
+        ]
+        assert all(r.ok for r in results)
+        assert results[1].actual_size == 400000
+
+    def test_mismatches(self, layout):
+        images = {
+            "size": Image(image="demo:1", digest=sha256(b"demo" * 100000), size=1),
+            "missing": Image(image="missing:1", digest=sha256(b"missing")),
+        }
+        results = verify_bundle(bundle(images), layout)
+        assert [r.status for r in results] == [VERIFIED, MISMATCH, MISSING]
+        assert not results[1].ok
+
+    def test_mapping_of_tarballs(self, tmpdir):
+        tarball = tmpdir.join("demo.tar")
+        tarball.write_binary(b"not the declared content")
+        images = {"demo": Image(image="demo:1", digest=sha256(b"demo"))}
+        results = verify_bundle(bundle(images), {"demo:1": str(tarball)})
+        assert results[0].status == MISSING
+        assert results[1].status == MISMATCH
+        assert results[1].actual == sha256(b"not the declared content")
+
+    def test_shared_files_hashed_once(self, layout, monkeypatch):
+        import cnab.verify
+
+        calls = []
+
+        def counting(path, *args):
+            calls.append(path)
+            return verify_file(path, *args)
+
+        monkeypatch.setattr(cnab.verify, "verify_file", counting)
+        digest = sha256(b"demo" * 100000)
+        images = {f"demo{i}": Image(image=f"demo:{i}", digest=digest) for i in range(5)}
+        results = verify_bundle(bundle(images), layout)
+        assert all(r.status == VERIFIED for r in results)
+        assert len(calls) == 2
+
+    def test_unknown_algorithm(self, tmpdir):
+        tarball = tmpdir.join("demo.tar")
+        tarball.write_binary(b"demo")
+        images = {"demo": Image(image="demo:1", digest="md6:abc")}
+        results = verify_bundle(bundle(images), lambda image: str(tarball))
+        assert results[1].status == FAILED
+        assert "md6" in results[1].error
+
+    def test_invalid_size(self, layout):
+        images = {
+            "size": Image(image="demo:1", digest=sha256(b"demo" * 100000), size=1),
+        }
+        invalid = bundle(images)
+        invalid.invocation_images[0].size = "12MB"
+        results = verify_bundle(invalid, layout)
+        assert [r.status for r in results] == [FAILED, MISMATCH]
+        assert "12MB" in results[0].error
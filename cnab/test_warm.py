@@ -0,0 +1,149 @@
+import time
+
+import pytest  # type: ignore
+
+from cnab import CNAB
+from cnab.cnab import RUN_COMMAND
+from cnab.staging import IMAGE_MAP_PATH
+from cnab.testing import FakeDockerClient
+from cnab.warm import IDLE_COMMAND, PoolClosedError, WarmContainerPool
+
+docker = pytest.importorskip("docker")
+
+IMAGE = "cnab/helloworld:latest"
+
+
+@pytest.fixture
+def client():
+    return FakeDockerClient()
+
+
+@pytest.fixture
+def pool(client):
+    with WarmContainerPool(IMAGE, size=2, client=client) as pool:
+        yield pool
+
+
+@pytest.fixture
+def app(pool):
+    bundle = {
+        "name": "helloworld",
+        "version": "0.1.0",
+        "invocationImages": [{"imageType": "docker", "image": IMAGE}],
+        "actions": {"status": {"stateless": True, "modifies": False}},
+        "credentials": {"token": {"path": "/cnab/token"}},
+    }
+    return CNAB(bundle, warm_pool=pool)
+
+
+class TestWarmContainerPool(object):
+    def test_fill_starts_containers(self, pool, client):
+        assert pool.fill() == 2
+        assert len(pool) == 2
+        assert [c.status for c in client.created] == ["running", "running"]
+        assert client.created[0].options["entrypoint"] == IDLE_COMMAND
+        assert pool.fill() == 0
+
+    def test_acquire_reuses_released(self, pool, client):
+        container = pool.acquire()
+        pool.release(container)
+        assert pool.acquire() is container
+        assert len(client.created) == 1
+
+    def test_size_cap(self, pool, client):
+        containers = [pool.acquire() for _ in range(3)]
+        for container in containers:
+            pool.release(container)
+        assert len(pool) == 2
+        assert [c.removed for c in containers] == [False, False, True]
+
+    def test_release_without_reuse(self, pool):
+        container = pool.acquire()
+        pool.release(container, reuse=False)
+        assert container.removed
+        assert len(pool) == 0
+
+    def test_idle_eviction(self, client):
+        pool = WarmContainerPool(IMAGE, keep_alive=0.01, client=client)
+        pool.fill()
+        time.sleep(0.02)
+        assert pool.evict() == 2
+        assert all(c.removed for c in client.created)
+
+    def test_expired_not_reused(self, client):
+        pool = WarmContainerPool(IMAGE, keep_alive=0.01, client=client)
+        container = pool.acquire()
+        pool.release(container)
+        time.sleep(0.02)
+        assert pool.acquire() is not container
+        assert container.removed
+
+    def test_pulls_missing_image(self):
+        client = FakeDockerClient(images=[])
+        WarmContainerPool(IMAGE, client=client).acquire()
+        assert ("pull", IMAGE) in client.calls
+
+    def test_close(self, pool, client):
+        pool.fill()
+        pool.close()
+        assert all(c.removed for c in client.created)
+        with pytest.raises(PoolClosedError):
+            pool.acquire()
+
+
+class TestWarmRun(object):
+    def test_stateless_action_uses_pool(self, app, client):
+        assert app.run("status", credentials={"token": "one"}) == b"output"
+        assert app.run("status", credentials={"token": "two"}) == b"output"
+        (container,) = client.created
+        runs = [e for e in container.execs if e[0] == RUN_COMMAND]
+        assert [e[1]["CNAB_ACTION"] for e in runs] == ["status"] * 2
+        assert [e[2]["/cnab/token"] for e in runs] == [b"one", b"two"]
+        assert IMAGE_MAP_PATH in runs[0][2]
+        assert not container.removed
+
+    def test_staged_files_are_removed_after_each_run(self, app, client):
+        app.run("status", credentials={"token": "secret"})
+        (container,) = client.created
+        assert container.files == {}
+        assert container.execs[-1][0] == ["rm", "-f", IMAGE_MAP_PATH, "/cnab/token"]
+
+    def test_not_reused_when_files_cannot_be_removed(self, app, client, monkeypatch):
+        monkeypatch.setattr(CNAB, "_unstage", staticmethod(lambda c, files: False))
+        app.run("status", credentials={"token": "secret"})
+        assert len(app.warm_pool) == 0
+        assert client.created[0].removed
+
+    def test_run_client_and_staging_use_a_new_container(self, app, client):
+        other = FakeDockerClient()
+        app.run("status", credentials={"token": "one"}, client=other)
+        assert client.created == []
+        assert len(other.created) == 1
+
+    def test_other_actions_run_cold(self, app, client):
+        other = FakeDockerClient()
+        app.run("install", credentials={"token": "one"}, client=other)
+        assert client.created == []
+        assert other.created[0].removed
+
+    def test_failure(self, app, client):
+        client.exit_code = 2
+        with pytest.raises(docker.errors.ContainerError) as e:
+            app.run("status", credentials={"token": "one"})
+        assert e.value.stderr == b"error"
+        assert len(app.warm_pool) == 0
+        assert client.created[0].removed
+
+    def test_wrong_image(self, app):
+        app.warm_pool = WarmContainerPool("other:latest", client=FakeDockerClient())
+        with pytest.raises(ValueError):
+            app.run("status", credentials={"token": "one"})
+
+    def test_fake_exec_run_matches_docker(self):
+        import inspect
+
+        from cnab.testing import FakeContainer
+
+        fake = inspect.signature(FakeContainer.exec_run).parameters
+        real = inspect.signature(docker.models.containers.Container.exec_run)
+        assert set(fake) <= set(real.parameters)
@@ -0,0 +1,193 @@
+import io
+import tarfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set
+
+
+class FakeContainer:
+    """Stands in for a docker-py container in tests.
+
+    The container reports itself running for `runs_for` reloads after being
+    started, then exits with `exit_code`."""
+
+    def __init__(
+        self,
+        client: "FakeDockerClient",
+        image: str,
+        command: Any,
+        environment: Optional[dict] = None,
+        mounts: Optional[list] = None,
+        **kwargs,
+    ):
+        self.client = client
+        self.image = image
+        self.command = command
+        self.environment = environment or {}
+        self.mounts = mounts or []
+        self.options = kwargs
+        self.files: Dict[str, bytes] = {}
+        self.status = "created"
+        self.attrs: dict = {"State": {"ExitCode": None}}
+        self.reloads = 0
+        self.removed = False
+        self.streamed = False
+        # the command, environment and files of each exec_run
+        self.execs: List[tuple] = []
+        # the contents of bind mounted files, read when the container starts
+        self.mounted: Dict[str, bytes] = {}
+
+    def put_archive(self, path: str, data: bytes) -> bool:
+        with tarfile.open(fileobj=io.BytesIO(data)) as tar:
+            for member in tar.getmembers():
+                content = tar.extractfile(member)
+                if content is not None:
+                    target = "/" + member.name if path == "/" else path + member.name
+                    self.files[target] = content.read()
+        return True
+
+    def start(self) -> None:
+        for mount in self.mounts:
+            with open(mount["Source"], "rb") as f:
+                self.mounted[mount["Target"]] = f.read()
+        self.status = "running"
+        self.client.started.append(self)
+        self.client.active += 1
+        self.client.peak = max(self.client.peak, self.client.active)
+
+    def _exit(self) -> None:
+        if self.status == "running":
+            self.status = "exited"
+            self.attrs["State"]["ExitCode"] = self.client.exit_code
+            self.client.active -= 1
+
+    def reload(self) -> None:
+        self.reloads += 1
+        if self.reloads > self.client.runs_for:
+            self._exit()
+
+    def wait(self) -> dict:
+        self._exit()
+        return {"StatusCode": self.attrs["State"]["ExitCode"]}
+
+    def logs(self, stdout: bool = True, stderr: bool = True, **kwargs) -> Any:
+        output = self.client.output
+        if stderr and not stdout:
+            output = b"error"
+        if kwargs.get("stream"):
+            self.streamed = True
+            size = self.client.stream_chunk_size
+            return (output[i : i + size] for i in range(0, len(output), size))
+        return output
+
+    # only the arguments docker-py 3.7, the oldest release supported, accepts
+    def exec_run(
+        self, cmd: Any, environment: Optional[dict] = None, demux: bool = False
+    ) -> Any:
+        self.execs.append((cmd, environment or {}, dict(self.files)))
+        if cmd[:2] == ["rm", "-f"]:
+            for path in cmd[2:]:
+                self.files.pop(path, None)
+            return 0, b""
+        output = self.client.output
+        exit_code = self.client.exit_code
+        if demux:
+            return exit_code, (output or None, b"error" if exit_code else None)
+        return exit_code, output
+
+    def remove(self, force: bool = False) -> None:
+        if self.status == "running":
+            self.client.active -= 1
+            self.status = "exited"
+        self.removed = True
+
+
+class FakeContainers:
+    def __init__(self, client: "FakeDockerClient"):
+        self.client = client
+
+    def create(self, image: str, command: Any = None, **kwargs) -> FakeContainer:
+        self.client.calls.append(("create", image))
+        if image not in self.client.images.present:
+            from docker.errors import ImageNotFound  # type: ignore
+
+            raise ImageNotFound(image)
+        container = FakeContainer(self.client, image, command, **kwargs)
+        self.client.created.append(container)
+        return container
+
+
+class FakeImages:
+    def __init__(self, client: "FakeDockerClient", present: List[str]):
+        self.client = client
+        self.present = set(present)
+        # names that fail to pull, as if missing from the registry
+        self.missing: Set[str] = set()
+        self.pulling = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def pull(self, repository: str, tag: Optional[str] = None, **kwargs) -> Any:
+        name = f"{repository}:{tag}" if tag else repository
+        with self._lock:
+            self.client.calls.append(("pull", name))
+            self.pulling += 1
+            self.peak = max(self.peak, self.pulling)
+        try:
+            if self.client.pull_delay:
+                time.sleep(self.client.pull_delay)
+            if name in self.missing:
+                from docker.errors import NotFound  # type: ignore
+
+                raise NotFound(f"manifest for {name} not found")
+            self.present.add(name)
+            return name
+        finally:
+            with self._lock:
+                self.pulling -= 1
+
+    def get(self, name: str) -> Any:
+        if name not in self.present:
+            from docker.errors import ImageNotFound  # type: ignore
+
+            raise ImageNotFound(name)
+        return name
+
+
+class FakeDockerClient:
+    """An in-memory stand-in for `docker.DockerClient`, for use in tests.
+
+    Every image is treated as present locally unless `images` is given."""
+
+    def __init__(
+        self,
+        exit_code: int = 0,
+        output: bytes = b"output",
+        runs_for: int = 0,
+        images: Optional[List[str]] = None,
+        stream_chunk_size: int = 1024,
+        pull_delay: float = 0,
+    ):
+        self.exit_code = exit_code
+        self.output = output
+        self.stream_chunk_size = stream_chunk_size
+        self.pull_delay = pull_delay
+        self.runs_for = runs_for
+        self.calls: List[tuple] = []
+        self.created: List[FakeContainer] = []
+        self.started: List[FakeContainer] = []
+        self.active = 0
+        self.peak = 0
+        self.closed = False
+        self.containers = FakeContainers(self)
+        self.images = FakeImages(self, images or [])
+        if images is None:
+            self.images.present = _Everything()
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class _Everything(set):
+    def __contains__(self, item: Any) -> bool:
+        return True
@@ -0,0 +1,140 @@
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from typing import Callable, ContextManager, Deque, Dict, Iterator, List, Optional
+
+# The phases of running an action, in the order they happen. Spans are only
+# emitted for the phases an action goes through, so pull_image only appears
+# when the image was missing, and a warm run execs rather than starting and
+# waiting on a container.
+PHASES = (
+    "run",
+    "check_action",
+    "validate_parameters",
+    "build_environment",
+    "stage_credentials",
+    "stage_image_map",
+    "stage_files",
+    "acquire_container",
+    "create_container",
+    "pull_image",
+    "start_container",
+    "wait_container",
+    "exec_action",
+    "collect_output",
+    "cleanup",
+)
+
+
+@dataclass
+class Span:
+    name: str
+    # wall clock time the phase started, and how long it took in seconds
+    start: float
+    duration: float
+    action: Optional[str] = None
+    installation: Optional[str] = None
+    error: Optional[str] = None
+
+
+Tracer = Callable[[Span], None]
+
+_NOOP = nullcontext()
+
+
+@contextmanager
+def _traced(
+    tracer: Tracer, name: str, action: Optional[str], installation: Optional[str]
+) -> Iterator[None]:
+    start = time.time()
+    began = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        tracer(
+            Span(name, start, time.perf_counter() - began, action, installation, error)
+        )
+
+
+def span(
+    tracer: Optional[Tracer],
+    name: str,
+    action: Optional[str] = None,
+    installation: Optional[str] = None,
+) -> ContextManager:
+    """Time the body of a with statement, passing the span to `tracer`.
+
+    Without a tracer this costs nothing more than the with statement."""
+    if tracer is None:
+        return _NOOP
+    return _traced(tracer, name, action, installation)
+
+
+class SpanCollector:
+    """Keeps the most recent durations of each phase to summarise them.
+
+    An instance is a tracer, so can be passed to `CNAB` directly. At most
+    `maxlen` durations are kept per phase."""
+
+    maxlen: int
+
+    def __init__(self, maxlen: int = 10000):
+        self.maxlen = maxlen
+        self.errors: Dict[str, int] = {}
+        self._durations: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, span: Span) -> None:
+        with self._lock:
+            durations = self._durations.get(span.name)
+            if durations is None:
+                durations = self._durations[span.name] = deque(maxlen=self.maxlen)
+            durations.append(span.duration)
+            if span.error is not None:
+                self.errors[span.name] = self.errors.get(span.name, 0) + 1
+
+    def durations(self, name: str) -> List[float]:
+        with self._lock:
+            return list(self._durations.get(name, ()))
+
+    def percentile(self, name: str, q: float) -> Optional[float]:
+        """The q-th percentile duration of a phase, by nearest rank."""
+        durations = sorted(self.durations(name))
+        return _percentile(durations, q) if durations else None
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """The count, mean, p50, p99 and max duration of each phase."""
+        with self._lock:
+            names = sorted(self._durations, key=_phase_order)
+        result = {}
+        for name in names:
+            durations = sorted(self.durations(name))
+            result[name] = {
+                "count": len(durations),
+                "mean": sum(durations) / len(durations),
+                "p50": _percentile(durations, 50),
+                "p99": _percentile(durations, 99),
+                "max": durations[-1],
+            }
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._durations.clear()
+            self.errors.clear()
+
+
+def _percentile(durations: List[float], q: float) -> float:
+    rank = math.ceil(q / 100 * len(durations))
+    return durations[min(max(rank, 1), len(durations)) - 1]
+
+
+def _phase_order(name: str) -> int:
+    return PHASES.index(name) if name in PHASES else len(PHASES)
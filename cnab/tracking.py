@@ -0,0 +1,205 @@
+import weakref
+from dataclasses import MISSING, fields
+from functools import lru_cache
+from typing import Any, Callable, List, Optional, Tuple, Type
+
+# Bundles cache their canonical encoding. Rather than every object knowing its
+# parent, a bundle registers itself as a watcher of each object and container
+# beneath it when it computes that encoding. Any later change to one of those
+# objects invalidates the bundles watching it, and clears the registrations
+# until the next encoding. Until a bundle has been encoded, nothing is watched
+# and changes cost a single attribute check.
+#
+# Every type is slotted, so that holding many bundles in memory stays cheap.
+
+
+def notify(obj: Any) -> None:
+    watchers = obj._watchers
+    if watchers:
+        obj._watchers = None
+        for ref in watchers:
+            target = ref()
+            if target is not None:
+                target._changed()
+
+
+def _add_watcher(obj: Any, ref: weakref.ref) -> None:
+    watchers = obj._watchers
+    if watchers is None:
+        obj._watchers = [ref]
+    elif not any(existing is ref for existing in watchers):
+        # compared by identity, as equal bundles have equal references
+        watchers.append(ref)
+
+
+class Watched:
+    __slots__ = ("_watchers",)
+    _watchers: Optional[List[weakref.ref]]
+
+    def __new__(cls, *args, **kwargs):
+        obj = object.__new__(cls)
+        object.__setattr__(obj, "_watchers", None)
+        return obj
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
+        # nothing can depend on an object until it is watched, which keeps
+        # constructing and filling in new objects cheap
+        if self._watchers is not None and name[0] != "_":
+            self._changed()
+
+    def _changed(self) -> None:
+        notify(self)
+
+    def __getstate__(self) -> dict:
+        cls: Any = type(self)
+        return {name: getattr(self, name) for name in _field_names(cls)}
+
+    def __setstate__(self, state: dict) -> None:
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
+
+def slotted(cls: Any) -> Any:
+    """Recreate a dataclass with a slot for each of its fields.
+
+    This is what dataclass(slots=True) does on newer versions of Python. Any
+    __slots__ declared in the class body are kept alongside the fields."""
+    names = _field_names(cls)
+    extra = cls.__dict__.get("__slots__", ())
+    namespace = dict(cls.__dict__)
+    for name in names + tuple(extra):
+        namespace.pop(name, None)
+    namespace.pop("__dict__", None)
+    namespace.pop("__weakref__", None)
+    namespace["__slots__"] = names + tuple(extra)
+    namespace["__init__"] = _init(cls)
+    slotted_cls = type(cls)(cls.__name__, cls.__bases__, namespace)
+    slotted_cls.__qualname__ = cls.__qualname__
+    return slotted_cls
+
+
+def _init(cls: Any) -> Callable:
+    # The same __init__ dataclass generates, but storing each field directly.
+    # A new object has no watchers, so going through __setattr__ would only
+    # make constructing one slower.
+    params = []
+    body = []
+    namespace: dict = {"_set": object.__setattr__, "_MISSING": MISSING}
+    for f in fields(cls):
+        value = f.name
+        if f.default is not MISSING:
+            namespace[f"_default_{f.name}"] = f.default
+            params.append(f"{f.name}=_default_{f.name}")
+        elif f.default_factory is not MISSING:  # type: ignore
+            namespace[f"_factory_{f.name}"] = f.default_factory  # type: ignore
+            params.append(f"{f.name}=_MISSING")
+            value = f"_factory_{f.name}() if {f.name} is _MISSING else {f.name}"
+        else:
+            params.append(f.name)
+        body.append(f"    _set(self, {f.name!r}, {value})")
+    source = f"def __init__(self, {', '.join(params)}):\n"
+    source += "\n".join(body or ["    pass"]) + "\n"
+    exec(source, namespace)
+    init = namespace["__init__"]
+    init.__qualname__ = f"{cls.__qualname__}.__init__"
+    return init
+
+
+def _mutator(base: Type, name: str) -> Callable:
+    method = getattr(base, name)
+
+    def mutate(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        notify(self)
+        return result
+
+    mutate.__name__ = name
+    return mutate
+
+
+class TrackedDict(dict):
+    _watchers: Optional[List[weakref.ref]] = None
+
+    def __reduce__(self) -> Tuple:
+        return (dict, (dict(self),))
+
+
+class TrackedList(list):
+    _watchers: Optional[List[weakref.ref]] = None
+
+    def __reduce__(self) -> Tuple:
+        return (list, (list(self),))
+
+
+for _name in [
+    "__setitem__",
+    "__delitem__",
+    "__ior__",
+    "clear",
+    "pop",
+    "popitem",
+    "setdefault",
+    "update",
+]:
+    # dict only has __ior__ from Python 3.9
+    if hasattr(dict, _name):
+        setattr(TrackedDict, _name, _mutator(dict, _name))
+
+for _name in [
+    "__setitem__",
+    "__delitem__",
+    "__iadd__",
+    "__imul__",
+    "append",
+    "extend",
+    "insert",
+    "pop",
+    "remove",
+    "clear",
+    "sort",
+    "reverse",
+]:
+    setattr(TrackedList, _name, _mutator(list, _name))
+
+
+@lru_cache(maxsize=None)
+def _field_names(cls: Any) -> Tuple[str, ...]:
+    return tuple(f.name for f in fields(cls))
+
+
+def watch(value: Any, ref: weakref.ref, depth: Optional[int] = None) -> Any:
+    """Register `ref` as a watcher of value and everything beneath it.
+
+    With a `depth`, only that many levels beneath value are watched. Plain
+    dicts and lists are swapped for tracked ones, so the value to store in
+    place of the original is returned."""
+    kind: Any = type(value)
+    deeper = None if depth is None else depth - 1
+    if isinstance(value, Watched):
+        _add_watcher(value, ref)
+        if deeper is None or deeper >= 0:
+            for name in _field_names(kind):
+                child = getattr(value, name)
+                tracked = watch(child, ref, deeper)
+                if tracked is not child:
+                    object.__setattr__(value, name, tracked)
+    elif kind is dict or kind is TrackedDict:
+        if kind is dict:
+            value = TrackedDict(value)
+        _add_watcher(value, ref)
+        if deeper is None or deeper >= 0:
+            for key, child in value.items():
+                tracked = watch(child, ref, deeper)
+                if tracked is not child:
+                    dict.__setitem__(value, key, tracked)
+    elif kind is list or kind is TrackedList:
+        if kind is list:
+            value = TrackedList(value)
+        _add_watcher(value, ref)
+        if deeper is None or deeper >= 0:
+            for i, child in enumerate(value):
+                tracked = watch(child, ref, deeper)
+                if tracked is not child:
+                    list.__setitem__(value, i, tracked)
+    return value
@@ -1,8 +1,10 @@
-import canonicaljson  # type: ignore
+import hashlib
+import weakref
 
 from dataclasses import dataclass, field
 from typing import Optional, Any, List, Union, Dict, TypeVar, Callable, Type, cast
 
+from cnab.tracking import Watched, notify, slotted, watch
 
 T = TypeVar("T")
 
@@ -59,11 +61,12 @@ def from_dict(f: Callable[[Any], T], x: Any) -> Dict[str, T]:
 
 
 def clean(result: Dict) -> dict:
-    return {k: v for k, v in result.items() if v}
+    return {k: v for k, v in result.items() if v is not None and v != [] and v != {}}
 
 
+@slotted
 @dataclass
-class Action:
+class Action(Watched):
     modifies: Optional[bool] = None
     stateless: Optional[bool] = None
     description: Optional[str] = None
@@ -84,8 +87,9 @@ class Action:
         return clean(result)
 
 
+@slotted
 @dataclass
-class Credential:
+class Credential(Watched):
     description: Optional[str] = None
     env: Optional[str] = None
     path: Optional[str] = None
@@ -106,8 +110,9 @@ class Credential:
         return clean(result)
 
 
+@slotted
 @dataclass
-class ImagePlatform:
+class ImagePlatform(Watched):
     architecture: Optional[str] = None
     os: Optional[str] = None
 
@@ -125,8 +130,9 @@ class ImagePlatform:
         return clean(result)
 
 
+@slotted
 @dataclass
-class Ref:
+class Ref(Watched):
     field: Optional[str] = None
     media_type: Optional[str] = None
     path: Optional[str] = None
@@ -147,8 +153,9 @@ class Ref:
         return clean(result)
 
 
+@slotted
 @dataclass
-class Image:
+class Image(Watched):
     image: str
     description: Optional[str] = None
     digest: Optional[str] = None
@@ -172,7 +179,7 @@ class Image:
         )
         size = from_union([from_int, from_none], obj.get("size"))
         return Image(
-            description, digest, image, image_type, media_type, platform, refs, size
+            image, description, digest, image_type, media_type, platform, refs, size
         )
 
     def to_dict(self) -> dict:
@@ -185,13 +192,16 @@ class Image:
         result["platform"] = from_union(
             [lambda x: to_class(ImagePlatform, x), from_none], self.platform
         )
-        result["refs"] = from_list(lambda x: to_class(Ref, x), self.refs)
+        result["refs"] = from_union(
+            [lambda x: from_list(lambda x: to_class(Ref, x), x), from_none], self.refs
+        )
         result["size"] = from_union([from_int, from_none], self.size)
         return clean(result)
 
 
+@slotted
 @dataclass
-class InvocationImage:
+class InvocationImage(Watched):
     image: str
     digest: Optional[str] = None
     image_type: Optional[str] = "oci"
@@ -223,8 +233,9 @@ class InvocationImage:
         return clean(result)
 
 
+@slotted
 @dataclass
-class Maintainer:
+class Maintainer(Watched):
     name: str
     email: Optional[str] = None
     url: Optional[str] = None
@@ -245,8 +256,9 @@ class Maintainer:
         return clean(result)
 
 
+@slotted
 @dataclass
-class Destination:
+class Destination(Watched):
     description: Optional[str] = None
     env: Optional[str] = None
     path: Optional[str] = None
@@ -267,8 +279,9 @@ class Destination:
         return clean(result)
 
 
+@slotted
 @dataclass
-class Metadata:
+class Metadata(Watched):
     description: Optional[str] = None
 
     @staticmethod
@@ -283,8 +296,9 @@ class Metadata:
         return clean(result)
 
 
+@slotted
 @dataclass
-class Parameter:
+class Parameter(Watched):
     type: str
     destination: Destination
     default_value: Union[bool, int, None, str] = None
@@ -328,7 +342,12 @@ class Parameter:
 
     def to_dict(self) -> dict:
         result: dict = {}
-        result["allowedValues"] = from_list(lambda x: x, self.allowed_values)
+        result["defaultValue"] = from_union(
+            [from_int, from_bool, from_none, from_str], self.default_value
+        )
+        result["allowedValues"] = from_union(
+            [lambda x: from_list(lambda x: x, x), from_none], self.allowed_values
+        )
         result["destination"] = from_union(
             [lambda x: to_class(Destination, x)], self.destination
         )
@@ -344,8 +363,9 @@ class Parameter:
         return clean(result)
 
 
+@slotted
 @dataclass
-class Bundle:
+class Bundle(Watched):
     name: str
     version: str
     invocation_images: List[InvocationImage]
@@ -359,6 +379,15 @@ class Bundle:
     maintainers: List[Maintainer] = field(default_factory=list)
     parameters: Dict[str, Parameter] = field(default_factory=dict)
 
+    __slots__ = ("_canonical", "_digest", "_hashes", "__weakref__")
+
+    def __new__(cls, *args, **kwargs):
+        obj = Watched.__new__(cls)
+        object.__setattr__(obj, "_canonical", None)
+        object.__setattr__(obj, "_digest", None)
+        object.__setattr__(obj, "_hashes", None)
+        return obj
+
     @staticmethod
     def from_dict(obj: Any) -> "Bundle":
         assert isinstance(obj, dict)
@@ -408,31 +437,73 @@ class Bundle:
 
     def to_dict(self) -> dict:
         result: dict = {}
-        result["actions"] = from_dict(lambda x: to_class(Action, x), self.actions)
-        result["credentials"] = from_dict(
-            lambda x: to_class(Credential, x), self.credentials
+        result["actions"] = from_union(
+            [lambda x: from_dict(lambda x: to_class(Action, x), x), from_none],
+            self.actions,
+        )
+        result["credentials"] = from_union(
+            [lambda x: from_dict(lambda x: to_class(Credential, x), x), from_none],
+            self.credentials,
         )
         result["description"] = from_union([from_str, from_none], self.description)
         result["license"] = from_union([from_str, from_none], self.license)
-        result["images"] = from_dict(lambda x: to_class(Image, x), self.images)
+        result["images"] = from_union(
+            [lambda x: from_dict(lambda x: to_class(Image, x), x), from_none],
+            self.images,
+        )
         result["invocationImages"] = from_list(
             lambda x: to_class(InvocationImage, x), self.invocation_images
         )
-        result["keywords"] = from_list(from_str, self.keywords)
-        result["maintainers"] = from_list(
-            lambda x: to_class(Maintainer, x), self.maintainers
+        result["keywords"] = from_union(
+            [lambda x: from_list(from_str, x), from_none], self.keywords
+        )
+        result["maintainers"] = from_union(
+            [lambda x: from_list(lambda x: to_class(Maintainer, x), x), from_none],
+            self.maintainers,
         )
         result["name"] = from_str(self.name)
-        result["parameters"] = from_dict(
-            lambda x: to_class(Parameter, x), self.parameters
+        result["parameters"] = from_union(
+            [lambda x: from_dict(lambda x: to_class(Parameter, x), x), from_none],
+            self.parameters,
         )
-        result["schemaVersion"] = from_str(self.schema_version)
+        result["schemaVersion"] = from_union([from_str, from_none], self.schema_version)
         result["version"] = from_str(self.version)
         return clean(result)
 
+    def _changed(self) -> None:
+        if self._canonical is not None:
+            self._canonical: Optional[bytes] = None
+            self._digest: Optional[str] = None
+            self._hashes: Any = None
+        notify(self)
+
+    def to_canonical_json(self) -> bytes:
+        # The encoding is kept until the bundle, or anything beneath it, changes
+        canonical = self._canonical
+        if canonical is None:
+            from cnab.codec import get_codec
+
+            watch(self, weakref.ref(self))
+            canonical = get_codec().canonical(self.to_dict())
+            self._canonical = canonical
+        return canonical
+
     def to_json(self, pretty: bool = False) -> str:
         if pretty:
-            func = canonicaljson.encode_pretty_printed_json
-        else:
-            func = canonicaljson.encode_canonical_json
-        return func(self.to_dict()).decode()
+            from cnab.codec import get_codec
+
+            return get_codec().pretty(self.to_dict()).decode()
+        return self.to_canonical_json().decode()
+
+    def digest(self) -> str:
+        digest = self._digest
+        if digest is None:
+            digest = "sha256:" + hashlib.sha256(self.to_canonical_json()).hexdigest()
+            self._digest = digest
+        return digest
+
+    def diff(self, other: "Bundle") -> Any:
+        """What changed from this bundle to other, as a `cnab.diff.Changeset`."""
+        from cnab.diff import diff
+
+        return diff(self, other)
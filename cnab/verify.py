@@ -0,0 +1,158 @@
+import hashlib
+import mmap
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Union
+
+from cnab.types import Bundle
+
+# hashlib releases the GIL while hashing a large buffer, so files are hashed
+# on threads, a chunk of a memory map at a time
+CHUNK_SIZE = 4 * 1024 * 1024
+
+VERIFIED = "verified"
+MISMATCH = "mismatch"
+MISSING = "missing"
+SKIPPED = "skipped"
+FAILED = "failed"
+
+
+@dataclass
+class VerifyResult:
+    name: str
+    image: str
+    status: str
+    path: Optional[str] = None
+    expected: Optional[str] = None
+    actual: Optional[str] = None
+    expected_size: Optional[int] = None
+    actual_size: Optional[int] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status in (VERIFIED, SKIPPED)
+
+
+def hash_file(
+    path: str, algorithm: str = "sha256", chunk_size: int = CHUNK_SIZE
+) -> str:
+    """Hash a file without reading all of it into memory."""
+    digest = hashlib.new(algorithm)
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    for i in range(0, len(view), chunk_size):
+                        digest.update(view[i : i + chunk_size])
+                finally:
+                    view.release()
+    return f"{algorithm}:{digest.hexdigest()}"
+
+
+def verify_file(
+    path: str, digest: str, size: Optional[int] = None, chunk_size: int = CHUNK_SIZE
+) -> Tuple[str, Optional[str], int]:
+    """Check a file against a digest, and a size when given.
+
+    Returns the status, the digest of the file and its size. A file of the
+    wrong size is not hashed."""
+    actual_size = os.stat(path).st_size
+    if size is not None and actual_size != size:
+        return MISMATCH, None, actual_size
+    algorithm = digest.split(":", 1)[0]
+    actual = hash_file(path, algorithm, chunk_size)
+    return (VERIFIED if actual == digest else MISMATCH), actual, actual_size
+
+
+def oci_layout(root: str) -> Callable[[Any], Optional[str]]:
+    """Locate images by digest in the blobs of an OCI image layout."""
+
+    def locate(image: Any) -> Optional[str]:
+        algorithm, _, encoded = image.digest.partition(":")
+        return os.path.join(root, "blobs", algorithm, encoded)
+
+    return locate
+
+
+Locator = Union[str, Mapping[str, str], Callable[[Any], Optional[str]]]
+
+
+def _locator(locate: Locator) -> Callable[[Any], Optional[str]]:
+    if isinstance(locate, str):
+        return oci_layout(locate)
+    if isinstance(locate, Mapping):
+        paths = locate
+        return lambda image: paths.get(image.image)
+    return locate
+
+
+def _size(value: Any) -> Optional[int]:
+    # sizes of invocation images are declared as strings
+    return None if value is None else int(value)
+
+
+def _failed(result: VerifyResult, e: Exception) -> None:
+    result.status = FAILED
+    result.error = f"{type(e).__name__}: {e}"
+
+
+def verify_bundle(
+    bundle: Bundle,
+    locate: Locator,
+    workers: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> List[VerifyResult]:
+    """Verify the local content of every image in a bundle.
+
+    `locate` finds the file for an image: the root of an OCI image layout, a
+    mapping of image references to files such as saved tarballs, or a
+    function taking the image and returning a path. Files are hashed in
+    parallel on `workers` threads, each file once however many images refer
+    to it. Images without a declared digest are skipped."""
+    find = _locator(locate)
+    images: List[Tuple[str, Any]] = [
+        (f"invocationImages.{i}", image)
+        for i, image in enumerate(bundle.invocation_images or [])
+    ]
+    images += [(f"images.{key}", image) for key, image in (bundle.images or {}).items()]
+
+    results: List[Tuple[VerifyResult, Optional[Future]]] = []
+    pending: Dict[Tuple[str, str, Optional[int]], Future] = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for name, image in images:
+            result = VerifyResult(name, image.image, SKIPPED)
+            results.append((result, None))
+            if not image.digest:
+                continue
+            result.expected = image.digest
+            try:
+                result.expected_size = _size(image.size)
+                result.path = find(image)
+            except Exception as e:
+                _failed(result, e)
+                continue
+            if result.path is None or not os.path.isfile(result.path):
+                result.status = MISSING
+                continue
+            key = (result.path, result.expected, result.expected_size)
+            if key not in pending:
+                pending[key] = pool.submit(
+                    verify_file,
+                    result.path,
+                    image.digest,
+                    result.expected_size,
+                    chunk_size,
+                )
+            results[-1] = (result, pending[key])
+
+        for result, future in results:
+            if future is None:
+                continue
+            try:
+                result.status, result.actual, result.actual_size = future.result()
+            except Exception as e:
+                _failed(result, e)
+    return [result for result, _ in results]
@@ -0,0 +1,152 @@
+import threading
+import time
+from typing import Any, List, Optional, Tuple
+
+from cnab.client import _close
+
+# Keeps a warm container running, without depending on anything in the
+# invocation image other than a shell, until it is removed.
+IDLE_COMMAND = ["/bin/sh", "-c", "while true; do sleep 3600; done"]
+
+
+class PoolClosedError(Exception):
+    pass
+
+
+class WarmContainerPool:
+    """Started containers for one invocation image, reused by stateless actions.
+
+    Rather than creating, starting and removing a container for every run, a
+    stateless action is run with `exec` in a container from the pool, which is
+    then returned to it. At most `size` idle containers are kept; any more are
+    removed when released. Containers idle for longer than `keep_alive`
+    seconds are removed rather than reused. Staged files, including
+    credentials, are removed after each run, and a container is only reused
+    when the action succeeded and that removal did too."""
+
+    image: str
+    size: int
+    keep_alive: Optional[float]
+
+    def __init__(
+        self,
+        image: str,
+        size: int = 2,
+        keep_alive: Optional[float] = 300.0,
+        client: Any = None,
+        command: List[str] = IDLE_COMMAND,
+    ):
+        self.image = image
+        self.size = size
+        self.keep_alive = keep_alive
+        self.command = command
+        self._client = client
+        self._owns_client = client is None
+        self._idle: List[Tuple[Any, float]] = []
+        self._closed = False
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            import docker  # type: ignore
+
+            self._client = docker.from_env()
+        return self._client
+
+    def _create(self) -> Any:
+        import docker  # type: ignore
+
+        client = self.client
+        options = {"entrypoint": self.command, "detach": True}
+        try:
+            container = client.containers.create(self.image, **options)
+        except docker.errors.ImageNotFound:
+            client.images.pull(self.image)
+            container = client.containers.create(self.image, **options)
+        try:
+            container.start()
+        except Exception:
+            _remove(container)
+            raise
+        return container
+
+    def _expired(self, now: float) -> List[Any]:
+        # must be called holding the lock
+        if self.keep_alive is None:
+            return []
+        expired = [
+            c for c, last_used in self._idle if now - last_used > self.keep_alive
+        ]
+        if expired:
+            self._idle = [
+                (c, last_used)
+                for c, last_used in self._idle
+                if now - last_used <= self.keep_alive
+            ]
+        return expired
+
+    def acquire(self) -> Any:
+        with self._lock:
+            if self._closed:
+                raise PoolClosedError("Warm container pool is closed")
+            stale = self._expired(time.monotonic())
+            container = self._idle.pop()[0] if self._idle else None
+        for old in stale:
+            _remove(old)
+        if container is None:
+            container = self._create()
+        return container
+
+    def release(self, container: Any, reuse: bool = True) -> None:
+        with self._lock:
+            if reuse and not self._closed and len(self._idle) < self.size:
+                self._idle.append((container, time.monotonic()))
+                return
+        _remove(container)
+
+    def fill(self) -> int:
+        """Start containers until `size` are idle, returning how many started."""
+        with self._lock:
+            missing = self.size - len(self._idle)
+        started = []
+        for _ in range(max(missing, 0)):
+            started.append(self._create())
+        for container in started:
+            self.release(container)
+        return len(started)
+
+    def evict(self) -> int:
+        """Remove containers idle for longer than `keep_alive`."""
+        with self._lock:
+            expired = self._expired(time.monotonic())
+        for container in expired:
+            _remove(container)
+        return len(expired)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            idle = [container for container, _ in self._idle]
+            self._idle = []
+        for container in idle:
+            _remove(container)
+        if self._owns_client and self._client is not None:
+            _close(self._client)
+            self._client = None
+
+    def __len__(self) -> int:
+        return len(self._idle)
+
+    def __enter__(self) -> "WarmContainerPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _remove(container: Any) -> None:
+    try:
+        container.remove(force=True)
+    except Exception:
+        pass